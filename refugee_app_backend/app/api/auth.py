@@ -4,7 +4,7 @@ import random
 import string
 from typing import Any
 
-from db.session import get_db
+from db.session import get_db, mark_user_write
 from db import models
 from app.core import security
 from app.api import deps
@@ -52,6 +52,7 @@ def register(
                 
                 db.commit()
                 db.refresh(user)
+                mark_user_write(user.id)
                 
                 # Send verification email in background
                 background_tasks.add_task(send_verification_email, user_in.email, code)
@@ -77,6 +78,7 @@ def register(
         
         db.commit()
         db.refresh(db_user)
+        mark_user_write(db_user.id)
         
         # Send verification email in background
         background_tasks.add_task(send_verification_email, user_in.email, code)
@@ -115,6 +117,7 @@ def verify_email_route(data: VerifyCodeSchema, db: Session = Depends(get_db)):
         db.delete(db_code) # Remove used code
         db.commit()
         db.refresh(user)
+        mark_user_write(user.id)
         
         # Generate token after verification
         access_token = security.create_access_token(
@@ -239,10 +242,11 @@ def reset_password(
         
     # Delete code
     db.delete(db_code)
+    mark_user_write(user.id)  # Before commit expires user
     db.commit()
     
     return {"message": "Password reset successfully"}
 
 @router.get("/me", response_model=schemas.UserResponse)
-def read_users_me(current_user: models.User = Depends(deps.get_current_active_user)):
+def read_users_me(current_user: models.User = Depends(deps.get_current_active_user_read)):
     return current_user
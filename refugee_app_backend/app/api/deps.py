@@ -1,5 +1,5 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
@@ -8,13 +8,41 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.schemas import user as schemas
 from db import models
-from db.session import get_db
+from db.session import get_db, SessionLocal, ReadSessionLocal, is_sticky
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.User:
+def _token_user_id(request: Request) -> Optional[int]:
+    """
+    user_id claim of the bearer token, WITHOUT verifying it. Only used to pick
+    a database for reads; authentication still happens in get_current_user.
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get("user_id")
+    except JWTError:
+        return None
+
+def get_read_db(request: Request) -> Generator:
+    """
+    Database session dependency for read-only endpoints.
+    Uses the read replica (DATABASE_READ_URL) when configured and reachable,
+    except for users who wrote within the last READ_YOUR_WRITES_SECONDS.
+    """
+    user_id = _token_user_id(request)
+    db = SessionLocal() if user_id is not None and is_sticky(user_id) else ReadSessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def _authenticate(db: Session, token: str) -> models.User:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -54,6 +82,17 @@ def get_current_user(
     
     return user
 
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> models.User:
+    return _authenticate(db, token)
+
+def get_current_user_read(
+    db: Session = Depends(get_read_db), token: str = Depends(oauth2_scheme)
+) -> models.User:
+    """Same as get_current_user, but loads the user through get_read_db."""
+    return _authenticate(db, token)
+
 def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -61,6 +100,13 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def get_current_active_user_read(
+    current_user: models.User = Depends(get_current_user_read),
+) -> models.User:
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
 def get_current_admin_user(
     current_user: models.User = Depends(get_current_active_user),
 ) -> models.User:
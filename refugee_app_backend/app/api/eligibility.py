@@ -0,0 +1,72 @@
+"""
+Eligibility API Endpoints
+
+The current user's eligibility profile, matched against each grant's
+compiled eligibility_criteria by GET /grants/eligible
+(app/services/grant_eligibility.py).
+"""
+
+from typing import Dict, List
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+
+from db import models
+from app.schemas import eligibility as schemas
+from app.api import deps
+from db.session import get_db, mark_user_write
+from app.services.grant_eligibility import COUNTRIES, VOCABULARY
+from app.services.grant_dimensions import countries
+
+router = APIRouter(
+    prefix="/eligibility",
+    tags=["eligibility"]
+)
+
+
+@router.get("/vocabulary", response_model=Dict[str, List[str]])
+def get_vocabulary(response: Response):
+    """
+    Allowed profile values per attribute. Residence countries outside the
+    list are accepted and matched as "any other country".
+    """
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return {**{dimension: list(values) for dimension, values in VOCABULARY.items()},
+            "residence_country": list(COUNTRIES)}
+
+
+@router.get("/profile", response_model=schemas.EligibilityProfile)
+def get_profile(
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_user_read)
+):
+    """
+    The current user's eligibility profile (every attribute unset if never saved).
+    """
+    profile = db.get(models.EligibilityProfile, current_user.id)
+    return profile or schemas.EligibilityProfile()
+
+
+@router.put("/profile", response_model=schemas.EligibilityProfile)
+def update_profile(
+    profile_in: schemas.EligibilityProfileUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(deps.get_current_active_user)
+):
+    """
+    Replace the current user's eligibility profile (omitted attributes are
+    cleared). Residence countries are stored by canonical name, so ISO codes
+    and other spellings work too.
+    """
+    profile = db.get(models.EligibilityProfile, current_user.id)
+    if profile is None:
+        profile = models.EligibilityProfile(user_id=current_user.id)
+        db.add(profile)
+    for field, value in profile_in.dict().items():
+        setattr(profile, field, value)
+    country = countries.resolve(db, profile.residence_country)
+    if country is not None:
+        profile.residence_country = country.name  # "DE" -> "Germany"
+    mark_user_write(current_user.id)  # Before commit expires current_user
+    db.commit()
+    db.refresh(profile)
+    return profile
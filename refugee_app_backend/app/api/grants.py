@@ -3,20 +3,45 @@ Grants API Endpoints
 
 Provides endpoints for:
 - Public grant access (verified & active only)
+- Grant submission, one at a time or in batches
+- Typeahead suggestions and similar grants
 - Admin grant management (CRUD)
 - Grant verification workflow
 - Grants.gov import
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from db import models
 from app.schemas import grant as schemas
 from app.api import deps
-from db.session import get_db
-from app.services.grants_gov_importer import GrantsGovImporter
+from db.session import ReadSessionLocal, get_db, mark_user_write
+from app.services.grant_queries import (
+    grants_by_ids_query, public_grants_query, submissions_query, trending_grants_query
+)
+from app.services.grant_events import GrantChanges, publish_grant_changes
+from app.services.grant_index import public_grant_index
+from app.services.grant_suggest import grant_suggest_index
+from app.services.grant_stream import grant_stream
+from app.services import grant_dedup
+from app.services.grant_categories import detect_category
+from app.services import grant_eligibility
+from app.services import grant_dimensions
+from app.services.grant_encoding import ENCODED_RESPONSES, JSON, encoded_response, negotiate
+from app.services import grant_stats
+from app.services.grant_stats import CLICK, VIEW, grant_stats_recorder
+from app.services.feed_snapshot import feed_snapshot
+from app.core.config import settings
+from app.core.single_flight import SingleFlight
 
 router = APIRouter(
     prefix="/grants",
@@ -27,42 +52,285 @@ router = APIRouter(
 # PUBLIC ENDPOINTS (No Auth Required)
 # ============================================================================
 
-from datetime import datetime
-from sqlalchemy import or_
+# Identical feed requests that miss the snapshot share one query
+public_feed_flight = SingleFlight("public_feed")
 
-@router.get("/public", response_model=List[schemas.Grant])
+@router.get("/public", response_model=List[schemas.Grant], responses=ENCODED_RESPONSES)
 def get_public_grants(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     country: Optional[str] = Query(None, description="Filter by refugee country"),
-    db: Session = Depends(get_db)
+    category: Optional[str] = Query(None, description="Filter by category"),
+    deadline_from: Optional[datetime] = Query(None, description="Only grants due on/after this date"),
+    deadline_to: Optional[datetime] = Query(None, description="Only grants due on/before this date"),
+    sort: Literal["deadline", "trending"] = Query("deadline", description="Soonest deadline or most viewed lately"),
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_read_db)
 ):
     """
     Get all verified and active grants (public access).
     Excludes grants that have passed their deadline.
     
     Query params:
-    - country: Filter by refugee_country
+    - country: Filter by refugee_country (name, ISO code or other alias)
+    - category: Filter by category (name or synonym)
+    - deadline_from / deadline_to: Deadline window
+    - sort: "deadline" (default) or "trending" (recent views and apply clicks)
     - skip: Pagination offset
     - limit: Max results
+
+    Served, in order of preference, from the host-wide pre-serialized
+    snapshot (country/category filters only), the in-memory columnar index,
+    or the database. Both caches are in deadline order: the trending feed
+    always reads the precomputed scores in grant_stats.
+
+    Also available as columnar JSON or MessagePack (Accept header, see
+    app/services/grant_encoding.py); the snapshot only holds plain JSON.
     """
-    now = datetime.now()
-    
-    query = db.query(models.Grant).filter(
-        models.Grant.is_verified == True,
-        models.Grant.is_active == True,
-        or_(
-            models.Grant.deadline >= now,
-            models.Grant.deadline == None
-        )
+    response.headers["Vary"] = "Accept"
+    country, category = grant_dimensions.canonical_filters(db, country, category)
+    if sort == "deadline" and deadline_from is None and deadline_to is None and negotiate(accept) == JSON:
+        payload = feed_snapshot.page(country, category, skip, limit)
+        if payload is not None:
+            return Response(content=payload, media_type="application/json", headers={"Vary": "Accept"})
+
+    filters = dict(
+        country=country,
+        category=category,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
     )
-    
-    # Apply country filter if provided
-    if country:
-        query = query.filter(models.Grant.refugee_country == country)
-    
-    grants = query.order_by(models.Grant.deadline.asc()).offset(skip).limit(limit).all()
-    return grants
+
+    def load() -> List[schemas.Grant]:
+        if sort == "trending":
+            query = trending_grants_query(db, **filters)
+        elif public_grant_index.ensure_fresh(db):
+            return public_grant_index.query(skip=skip, limit=limit, **filters)
+        else:
+            query = public_grants_query(db, **filters)
+        grants = query.offset(skip).limit(limit).all()
+        # Detach from this session: the result is shared with coalesced requests
+        return [schemas.Grant.model_validate(grant) for grant in grants]
+
+    key = (sort, country, category, deadline_from, deadline_to, skip, limit)
+    grants = public_feed_flight.do(key, load)
+    return encoded_response(grants, accept) or grants
+
+
+@router.get("/suggest", response_model=List[schemas.GrantSuggestion])
+def suggest_grants(
+    response: Response,
+    prefix: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=25),
+    db: Session = Depends(deps.get_read_db)
+):
+    """
+    Typeahead suggestions over public grant titles, organizers and categories.
+
+    Every word of the prefix must start a word of the suggestion, in any
+    order and ignoring case and accents ("hous berl" finds "Berlin Housing
+    Fund"). Organizers and categories come first, most grants first; then
+    grants, soonest deadline first.
+
+    Served from the in-memory prefix index; while it is (re)building, falls
+    back to a case-insensitive SQL prefix match on titles.
+    """
+    # Keystrokes repeat across users: let the CDN / client cache briefly
+    response.headers["Cache-Control"] = "public, max-age=30"
+
+    if grant_suggest_index.ensure_fresh(db):
+        return grant_suggest_index.suggest(prefix, limit)
+
+    grants = public_grants_query(db).filter(
+        models.Grant.title.istartswith(prefix.strip(), autoescape=True)
+    ).with_entities(models.Grant.id, models.Grant.title).limit(limit).all()
+    return [schemas.GrantSuggestion(text=title, kind="grant", grant_id=grant_id) for grant_id, title in grants]
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match (a list of possibly weak tags, or *) matches etag."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+@router.get("/eligible", response_model=List[schemas.Grant], responses=ENCODED_RESPONSES)
+def get_eligible_grants(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    country: Optional[str] = Query(None, description="Filter by refugee country"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_user_read)
+):
+    """
+    Public grants the current user may be eligible for, soonest deadline first.
+
+    Each grant's compiled eligibility_criteria are matched against the
+    user's profile (PUT /eligibility/profile) with a few bit tests over the
+    whole catalogue in the columnar index (or in SQL while it rebuilds).
+    Grants without criteria and unset profile attributes exclude nothing.
+    Same country / category filters as /grants/public.
+    """
+    response.headers["Vary"] = "Accept"
+    country, category = grant_dimensions.canonical_filters(db, country, category)
+    requirements = grant_eligibility.profile_requirements(db.get(models.EligibilityProfile, current_user.id))
+    if public_grant_index.ensure_fresh(db):
+        grants = public_grant_index.query(
+            country=country, category=category, skip=skip, limit=limit, eligible=requirements
+        )
+    else:
+        query = public_grants_query(db, country=country, category=category).filter(
+            *grant_eligibility.sql_conditions(requirements)
+        )
+        grants = [schemas.Grant.model_validate(grant) for grant in query.offset(skip).limit(limit).all()]
+    return encoded_response(grants, accept) or grants
+
+
+@router.post("/batch-get", response_model=schemas.GrantBatchGetResult,
+             responses={304: {"description": "Nothing changed since the If-None-Match ETag"}})
+def batch_get_grants(
+    request_in: schemas.GrantBatchGet,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_read_db)
+):
+    """
+    Refresh bookmarked grants: up to 500 ids in one primary key lookup.
+
+    Public grants come back as summaries, in request order. Ids of deleted
+    grants are listed in missing, those of grants that are no longer public
+    (unverified, deactivated, expired) in retired.
+
+    The ETag is a hash of the response: sent back as If-None-Match, an
+    unchanged result is a bodiless 304. (A read-only POST, so the id list
+    isn't limited by URL length.)
+    """
+    ids = list(dict.fromkeys(request_in.ids))
+    rows = {row.id: row for row in grants_by_ids_query(db, ids).all()}
+
+    # Hashed from the rows: an unchanged result is answered before any response model is built.
+    # Weak: the same result may be sent gzipped or not.
+    content = [(grant_id, tuple(rows[grant_id]) if grant_id in rows else None) for grant_id in ids]
+    etag = 'W/"' + hashlib.blake2b(repr(content).encode(), digest_size=16).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    result = schemas.GrantBatchGetResult()
+    fields = list(schemas.GrantSummary.model_fields)
+    for grant_id in ids:
+        row = rows.get(grant_id)
+        if row is None:
+            result.missing.append(grant_id)
+        elif not row.is_public:
+            result.retired.append(grant_id)
+        else:
+            result.grants.append(schemas.GrantSummary(**{field: getattr(row, field) for field in fields}))
+    response.headers.update(headers)
+    return result
+
+
+def _stream_filters(country: Optional[str], category: Optional[str]):
+    db = ReadSessionLocal()  # Not a dependency: it would stay open for the whole stream
+    try:
+        return grant_dimensions.canonical_filters(db, country, category)
+    finally:
+        db.close()
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_grants(
+    country: Optional[str] = Query(None, description="Only grants for this refugee country"),
+    category: Optional[str] = Query(None, description="Only grants in this category"),
+    last_event_id: Optional[str] = Header(None, description="Resume after this event (sent by EventSource)"),
+):
+    """
+    Server-Sent Events stream of public grant changes.
+
+    Events: "grant" (a GrantSummary, published or updated), "retire" ({"id"},
+    deleted, unpublished or expired) and "reset" (events were missed: refetch
+    /grants/public). Filters apply to "grant" events; retirements are sent to
+    every subscriber. Comment lines are heartbeats. Reconnecting with
+    Last-Event-ID replays recent events; clients that fall too far behind are
+    disconnected and should reconnect the same way.
+    """
+    if not grant_stream.available:
+        raise HTTPException(status_code=404, detail="Grant stream is disabled")
+    country, category = await run_in_threadpool(_stream_filters, country, category)
+    subscriber = grant_stream.subscribe(country, category, last_event_id)
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers, please retry shortly",
+                            headers={"Retry-After": "30"})
+
+    async def frames():
+        try:
+            yield b"retry: 5000\n\n"
+            async for frame in subscriber.frames():
+                yield frame
+        finally:
+            grant_stream.unsubscribe(subscriber)
+
+    return StreamingResponse(frames(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # Don't let nginx buffer events
+    })
+
+
+@router.get("/{grant_id}/similar", response_model=List[schemas.Grant])
+def get_similar_grants(
+    grant_id: int,
+    limit: int = Query(6, ge=1, le=20),
+    db: Session = Depends(deps.get_read_db)
+):
+    """
+    Public grants related to a public grant, most similar first.
+
+    Reads the neighbours precomputed by app/services/grant_similarity.py.
+    Grants without any (not computed yet, or nothing close enough) get other
+    open grants of the same category instead.
+    """
+    grant = public_grants_query(db).filter(models.Grant.id == grant_id).first()
+    if not grant:
+        raise HTTPException(status_code=404, detail="Grant not found")
+
+    similar = []
+    if settings.SIMILAR_GRANTS_ENABLED:
+        similar = public_grants_query(db).join(
+            models.GrantSimilarity, models.GrantSimilarity.similar_id == models.Grant.id
+        ).filter(
+            models.GrantSimilarity.grant_id == grant_id
+        ).order_by(None).order_by(models.GrantSimilarity.score.desc()).limit(limit).all()
+
+    if not similar:
+        similar = public_grants_query(db, category=grant.category).filter(
+            models.Grant.id != grant_id
+        ).limit(limit).all()
+    return similar
+
+
+@router.post("/{grant_id}/view", status_code=204)
+def record_grant_view(grant_id: int):
+    """
+    Count a view of a grant's detail page, for the trending feed.
+
+    Only increments an in-memory counter (written to grant_stats in the
+    background), so the id isn't checked here: unknown ids are dropped at
+    the flush.
+    """
+    grant_stats_recorder.record(grant_id, VIEW)
+    return Response(status_code=204)
+
+
+@router.post("/{grant_id}/click", status_code=204)
+def record_grant_click(grant_id: int):
+    """Count a click through to a grant's application page; see record_grant_view."""
+    grant_stats_recorder.record(grant_id, CLICK)
+    return Response(status_code=204)
 
 
 
@@ -70,6 +338,30 @@ def get_public_grants(
 # USER / ORG ENDPOINTS (Auth Required)
 # ============================================================================
 
+def _submitter_fields(db: Session, user: models.User) -> dict:
+    """
+    Owner and trust of a user's submissions: admins and approved
+    organizations are verified on submit, everyone else waits for review.
+    """
+    fields = {'creator_id': user.id, 'is_verified': user.role == 'admin', 'is_active': True}
+    if user.role == 'organization':
+        org = db.query(models.Organization).filter(models.Organization.user_id == user.id).first()
+        if org:
+            fields['organization_id'] = org.id
+            if org.status == 'approved':
+                fields['is_verified'] = True # Trusted Org Auto-Verify
+    return fields
+
+
+def _grant_data(grant_in: schemas.GrantCreate, submitter: dict) -> dict:
+    grant_data = grant_in.dict()
+    grant_data.update(submitter)
+    if 'category' not in grant_in.model_fields_set:
+        grant_data['category'] = detect_category(grant_in.title, grant_in.description, grant_in.organizer)
+    grant_data.update(grant_eligibility.compiled_columns(grant_in.eligibility_criteria))
+    return grant_data
+
+
 @router.post("/submit", response_model=schemas.Grant)
 def submit_grant(
     grant_in: schemas.GrantCreate,
@@ -80,47 +372,200 @@ def submit_grant(
     Submit a grant. 
     - Normal Users: Created as unverified (pending review).
     - Approved Organizations: Created as verified (trusted).
+    - Near-duplicates of an existing grant: duplicate_of_id set, always
+      unverified (pending review).
+    - No category given: detected from the text, as on import.
+    - Country and category are stored as their canonical names ("DE" ->
+      "Germany"). Values never seen before become new ones for admins;
+      anyone else's are kept as typed, without a canonical key.
     """
-    grant_data = grant_in.dict()
-    
-    # Defaults
-    grant_data['creator_id'] = current_user.id
-    grant_data['is_verified'] = False 
-    grant_data['is_active'] = True
-
-    # Check for Admin Role (Admin submissions are trusted)
-    if current_user.role == 'admin':
-        grant_data['is_verified'] = True
-
-    # Check for Organization Role
-    elif current_user.role == 'organization':
-        org = db.query(models.Organization).filter(models.Organization.user_id == current_user.id).first()
-        if org:
-            grant_data['organization_id'] = org.id
-            if org.status == 'approved':
-                grant_data['is_verified'] = True # Trusted Org Auto-Verify
+    grant_data = _grant_data(grant_in, _submitter_fields(db, current_user))
+    grant_dimensions.assign(db, [grant_data], create=current_user.role == 'admin')
+
+    fingerprint = None
+    if grant_dedup.available():
+        fingerprint = grant_dedup.fingerprint(grant_in.title, grant_in.organizer, grant_in.description)
+        duplicate = fingerprint and grant_dedup.find_duplicate(db, fingerprint)
+        if duplicate:
+            grant_data['duplicate_of_id'] = duplicate[0]
+            grant_data['is_verified'] = False
 
     grant = models.Grant(**grant_data)
     db.add(grant)
+    db.flush()  # For grant.id
+    grant_stats.add_grants(db, [grant.id])  # Listed in the trending feed right away
+    if fingerprint:
+        grant_dedup.store_fingerprint(db, grant.id, fingerprint)
+    mark_user_write(current_user.id)  # Before commit expires current_user
     db.commit()
     db.refresh(grant)
+    publish_grant_changes(GrantChanges(upserted=[grant]))
     return grant
 
 
-@router.get("/my-submissions", response_model=List[schemas.Grant])
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# The body is read by read_grant_batch, so document it by hand
+BATCH_REQUEST_BODY = {"requestBody": {"required": True, "content": {
+    "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/GrantCreate"}}},
+    "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/GrantCreate"}},
+}}}
+
+
+async def read_grant_batch(request: Request) -> List[Any]:
+    """
+    The raw items of a batch body: a JSON array, or one JSON object per line
+    for NDJSON content types. An NDJSON line that isn't JSON becomes a
+    ValueError in its place, reported as that item's error.
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.GRANT_BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Batch larger than {settings.GRANT_BATCH_MAX_BYTES} bytes")
+
+    content_type = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        items: List[Any] = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(ValueError(f"Invalid JSON: {e}"))
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    if len(items) > settings.GRANT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.GRANT_BATCH_MAX_ITEMS} grants per batch")
+    return items
+
+
+@router.post("/submit/batch", response_model=schemas.GrantBatchResult, openapi_extra=BATCH_REQUEST_BODY)
+def submit_grant_batch(
+    atomic: bool = Query(False, description="Save nothing if any item is rejected"),
+    items: List[Any] = Depends(read_grant_batch),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(deps.get_current_active_user)
+):
+    """
+    Submit up to GRANT_BATCH_MAX_ITEMS grants at once: a JSON array of
+    GrantCreate, or NDJSON (one per line, Content-Type application/x-ndjson).
+
+    Each item follows the /submit rules. Items that don't validate, reuse
+    an external_id (of a saved grant or an earlier item), or near-duplicate
+    an earlier item of the same batch are listed in errors by position; the
+    rest are saved in one transaction (none of them with atomic=true, which
+    answers 422 instead).
+    """
+    result = schemas.GrantBatchResult()
+    valid = []  # (index, GrantCreate)
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            result.errors.append(schemas.GrantBatchError(index=index, errors=[str(item)]))
+            continue
+        try:
+            valid.append((index, schemas.GrantCreate.model_validate(item)))
+        except ValidationError as e:
+            result.errors.append(schemas.GrantBatchError(index=index, errors=[
+                f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}" for error in e.errors()
+            ]))
+
+    # external_id is unique: a repeat, in the batch or of a saved grant, would fail the whole INSERT
+    external_ids = {grant_in.external_id for _, grant_in in valid if grant_in.external_id is not None}
+    taken = set(db.execute(
+        select(models.Grant.external_id).where(models.Grant.external_id.in_(external_ids))
+    ).scalars()) if external_ids else set()
+    first = {}  # external_id -> index of the item that keeps it
+    kept = []
+    for index, grant_in in valid:
+        external_id = grant_in.external_id
+        if external_id in taken:
+            result.errors.append(schemas.GrantBatchError(
+                index=index, errors=[f"external_id: {external_id!r} is already used by another grant"]
+            ))
+        elif external_id is not None and external_id in first:
+            result.errors.append(schemas.GrantBatchError(
+                index=index, errors=[f"external_id: same as item {first[external_id]} in this batch"]
+            ))
+        else:
+            if external_id is not None:
+                first[external_id] = index
+            kept.append((index, grant_in))
+    valid = kept
+
+    fingerprints = [None] * len(valid)
+    if grant_dedup.available():
+        fingerprints = [grant_dedup.fingerprint(g.title, g.organizer, g.description) for _, g in valid]
+        earlier = grant_dedup.find_batch_duplicates(fingerprints)
+        for (index, _), position in zip(valid, earlier):
+            if position is not None:
+                result.errors.append(schemas.GrantBatchError(
+                    index=index, errors=[f"Near-duplicate of item {valid[position][0]} in this batch"]
+                ))
+        kept = [i for i, position in enumerate(earlier) if position is None]
+        valid, fingerprints = [valid[i] for i in kept], [fingerprints[i] for i in kept]
+    result.errors.sort(key=lambda error: error.index)
+
+    if atomic and result.errors:
+        raise HTTPException(status_code=422, detail=[error.model_dump() for error in result.errors])
+    if not valid:
+        return result
+
+    duplicates = grant_dedup.find_duplicates(db, fingerprints) if grant_dedup.available() else [None] * len(valid)
+    submitter = _submitter_fields(db, current_user)  # Trust resolved once for the batch
+    rows = []
+    for (_, grant_in), duplicate in zip(valid, duplicates):
+        grant_data = _grant_data(grant_in, submitter)
+        grant_data['duplicate_of_id'] = duplicate[0] if duplicate else None  # Same keys in every row: one INSERT
+        if duplicate:
+            grant_data['is_verified'] = False
+        rows.append(grant_data)
+    grant_dimensions.assign(db, rows, create=current_user.role == 'admin')
+
+    # Multi-row INSERT ... RETURNING (one statement per 1000 rows). RETURNING order isn't guaranteed,
+    # but ids are handed out in row order (SQLite rowids, PostgreSQL serials), so sorted they line
+    # up with the rows; sort_by_parameter_order would make SQLAlchemy insert row by row on SQLite.
+    ids = sorted(db.execute(insert(models.Grant).returning(models.Grant.id), rows).scalars().all())
+    grant_stats.add_grants(db, ids)
+    grant_dedup.store_fingerprints(db, [(grant_id, fp) for grant_id, fp in zip(ids, fingerprints) if fp])
+    mark_user_write(current_user.id)  # Before commit expires current_user
+    db.commit()
+
+    grants = db.query(models.Grant).filter(models.Grant.id.in_(ids)).all()  # One reload, not a refresh each
+    publish_grant_changes(GrantChanges(upserted=grants))
+    for (index, _), grant_id, row in zip(valid, ids, rows):
+        result.created.append(schemas.GrantBatchCreated(
+            index=index, id=grant_id, category=row['category'],
+            is_verified=row['is_verified'], duplicate_of_id=row['duplicate_of_id'],
+        ))
+    return result
+
+
+@router.get("/my-submissions", response_model=List[schemas.Grant], responses=ENCODED_RESPONSES)
 def get_my_submissions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_active_user)
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_user_read)
 ):
     """
     Get grants submitted by the current user.
+    Also available as columnar JSON or MessagePack (Accept header).
     """
-    grants = db.query(models.Grant).filter(
-        models.Grant.creator_id == current_user.id
-    ).order_by(models.Grant.created_at.desc()).offset(skip).limit(limit).all()
-    return grants
+    response.headers["Vary"] = "Accept"
+    grants = submissions_query(db, current_user.id).offset(skip).limit(limit).all()
+    return encoded_response(grants, accept) or grants
 
 
 @router.put("/my-submissions/{grant_id}", response_model=schemas.Grant)
@@ -162,13 +607,30 @@ def update_my_submission(
     # Security: Prevent user from setting is_verified to True
     if 'is_verified' in update_data:
         del update_data['is_verified'] # Ignore attempts to verify logic here
+    grant_dimensions.assign(db, [update_data], create=current_user.role == 'admin')
         
     for field, value in update_data.items():
         setattr(grant, field, value)
+    if 'eligibility_criteria' in update_data:
+        for field, value in grant_eligibility.compiled_columns(grant.eligibility_criteria).items():
+            setattr(grant, field, value)
+
+    # Edited text may now duplicate another grant (or no longer does)
+    if grant_dedup.available() and update_data.keys() & {'title', 'organizer', 'description'}:
+        grant_dedup.remove_fingerprint(db, grant.id)
+        fingerprint = grant_dedup.fingerprint(grant.title, grant.organizer, grant.description)
+        duplicate = fingerprint and grant_dedup.find_duplicate(db, fingerprint, exclude_id=grant.id)
+        grant.duplicate_of_id = duplicate[0] if duplicate else None
+        if duplicate:
+            grant.is_verified = False
+        if fingerprint:
+            grant_dedup.store_fingerprint(db, grant.id, fingerprint)
     
     db.add(grant)
+    mark_user_write(current_user.id)  # Before commit expires current_user
     db.commit()
     db.refresh(grant)
+    publish_grant_changes(GrantChanges(upserted=[grant]))
     return grant
 
 
@@ -204,11 +666,40 @@ def delete_my_submission(
          if not is_trusted_org:
              raise HTTPException(status_code=403, detail="Cannot delete verified grants. Contact admin.")
 
+    grant_dedup.remove_fingerprint(db, grant_id)
+    # Its duplicates become ordinary grants again
+    db.query(models.Grant).filter(models.Grant.duplicate_of_id == grant_id).update(
+        {models.Grant.duplicate_of_id: None}, synchronize_session=False
+    )
     db.delete(grant)
+    mark_user_write(current_user.id)  # Before commit expires current_user
     db.commit()
+    publish_grant_changes(GrantChanges(removed_ids=[grant_id]))
     return {"message": "Grant deleted successfully", "id": grant_id}
 
 
+# ============================================================================
+# GRANT DETAIL (last: "/{grant_id}" would shadow the fixed GET paths above)
+# ============================================================================
+
+@router.get("/{grant_id}", response_model=schemas.Grant, responses=ENCODED_RESPONSES)
+def get_grant(
+    grant_id: int,
+    response: Response,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_read_db)
+):
+    """
+    A public grant (verified, active, not expired).
+    Also available as columnar JSON or MessagePack (Accept header).
+    """
+    response.headers["Vary"] = "Accept"
+    grant = public_grants_query(db).filter(models.Grant.id == grant_id).first()
+    if not grant:
+        raise HTTPException(status_code=404, detail="Grant not found")
+    return encoded_response([grant], accept) or grant
+
+
 # ============================================================================
 
 
@@ -0,0 +1,37 @@
+"""
+Profiles API Endpoints
+
+Admin access to the request profiles kept by app/core/profiling.py.
+"""
+
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.api import deps
+from app.core.profiling import get_profile, profiles
+
+router = APIRouter(
+    prefix="/admin/profiles",
+    tags=["admin"],
+    dependencies=[Depends(deps.get_current_admin_user)],
+)
+
+
+@router.get("/", response_model=List[Dict[str, Any]])
+def list_profiles():
+    """
+    Most recent profiles first (on-demand and randomly sampled).
+    """
+    return [profile.summary() for profile in reversed(profiles)]
+
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+def get_collapsed_stacks(profile_id: int):
+    """
+    Collapsed stacks for one profile; feed to flamegraph.pl or speedscope.
+    """
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or already evicted")
+    return PlainTextResponse(profile.collapsed())
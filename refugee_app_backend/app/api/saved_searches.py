@@ -0,0 +1,91 @@
+"""
+Saved Searches API Endpoints
+
+Stored /grants/public filters; new public grants matching them are emailed
+as daily or instant digests (app/services/saved_searches.py).
+"""
+
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from db import models
+from app.schemas import saved_search as schemas
+from app.api import deps
+from db.session import get_db, mark_user_write
+from app.core.config import settings
+from app.services import grant_dimensions
+
+router = APIRouter(
+    prefix="/saved-searches",
+    tags=["saved-searches"]
+)
+
+
+@router.get("/", response_model=List[schemas.SavedSearch])
+def list_saved_searches(
+    db: Session = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_active_user_read)
+):
+    """
+    The current user's saved searches, newest first.
+    """
+    return db.query(models.SavedSearch).filter(
+        models.SavedSearch.user_id == current_user.id
+    ).order_by(models.SavedSearch.id.desc()).all()
+
+
+@router.post("/", response_model=schemas.SavedSearch)
+def create_saved_search(
+    search_in: schemas.SavedSearchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(deps.get_current_active_user)
+):
+    """
+    Save a search. Grants made public from now on that match it are emailed
+    (daily digest, or right away with frequency "instant").
+    """
+    count = db.query(models.SavedSearch).filter(models.SavedSearch.user_id == current_user.id).count()
+    if count >= settings.SAVED_SEARCHES_PER_USER:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.SAVED_SEARCHES_PER_USER} saved searches per user. Delete one first."
+        )
+
+    search_data = search_in.dict()
+    # Stored as the canonical names new grants carry, which is what they're matched on
+    search_data['refugee_country'], search_data['category'] = grant_dimensions.canonical_filters(
+        db, search_data['refugee_country'], search_data['category']
+    )
+    search = models.SavedSearch(**search_data, user_id=current_user.id)
+    db.add(search)
+    mark_user_write(current_user.id)  # Before commit expires current_user
+    db.commit()
+    db.refresh(search)
+    return search
+
+
+@router.delete("/{search_id}")
+def delete_saved_search(
+    search_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(deps.get_current_active_user)
+):
+    """
+    Delete one of the current user's saved searches, with its pending matches.
+    """
+    search = db.query(models.SavedSearch).filter(
+        models.SavedSearch.id == search_id,
+        models.SavedSearch.user_id == current_user.id
+    ).first()
+    if not search:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+
+    # Explicit for SQLite, where the ON DELETE CASCADE foreign key isn't enforced
+    db.query(models.SavedSearchMatch).filter(models.SavedSearchMatch.search_id == search_id).delete(
+        synchronize_session=False
+    )
+    db.delete(search)
+    mark_user_write(current_user.id)  # Before commit expires current_user
+    db.commit()
+    return {"message": "Saved search deleted", "id": search_id}
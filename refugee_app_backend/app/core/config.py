@@ -9,7 +9,35 @@ load_dotenv(dotenv_path=env_path)
 
 class Settings:
     PROJECT_NAME: str = "Refugee App Backend"
+    DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL")  # Optional read replica
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
+    # File-backed SQLite (db/sqlite.py): pooled WAL mode; false = one connection per request, no pragmas
+    SQLITE_POOLED: bool = os.getenv("SQLITE_POOLED", "true").lower() == "true"
+    SQLITE_POOL_SIZE: int = int(os.getenv("SQLITE_POOL_SIZE", 5))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    # A writer's wait for its turn in the process's writer queue: only for the writers ahead of it, in order
+    SQLITE_WRITE_QUEUE_TIMEOUT_MS: int = int(os.getenv("SQLITE_WRITE_QUEUE_TIMEOUT_MS", 30000))
+    SQLITE_MMAP_SIZE_MB: int = int(os.getenv("SQLITE_MMAP_SIZE_MB", 256))
+    SQLITE_CACHE_SIZE_MB: int = int(os.getenv("SQLITE_CACHE_SIZE_MB", 64))
+
+    # Warm pools and caches in a background thread after startup (app/core/warmup.py)
+    WARM_UP_ENABLED: bool = os.getenv("WARM_UP_ENABLED", "true").lower() == "true"
+
+    # Load shedding: answer 503 once this many threads are queued for a DB connection (0 = off)
+    POOL_SHED_WAITING: int = int(os.getenv("POOL_SHED_WAITING", 10))
+    POOL_SHED_RETRY_AFTER: int = int(os.getenv("POOL_SHED_RETRY_AFTER", 2))
+
+    # SQL accounting (db/query_stats.py)
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", 200))
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+
+    # Sampling profiler (app/core/profiling.py); admins can also ask with X-Profile: 1
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", 0.001))  # 0 = off
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+    PROFILE_BUFFER_SIZE: int = int(os.getenv("PROFILE_BUFFER_SIZE", 50))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
@@ -26,4 +54,65 @@ class Settings:
     MAIL_PORT: int = int(os.getenv("MAIL_PORT", 587))
     MAIL_FROM: str = os.getenv("MAIL_FROM")
 
+    # gzip responses of at least this many bytes, when the client accepts it
+    GZIP_MIN_SIZE: int = int(os.getenv("GZIP_MIN_SIZE", 1000))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", 6))  # 1-9; higher compresses little better for much more CPU
+
+    # Country / category alias map behind the feed filters (app/services/grant_dimensions.py); values first
+    # written by another process resolve after at most this long
+    DIMENSION_CACHE_SECONDS: float = float(os.getenv("DIMENSION_CACHE_SECONDS", 300))
+
+    # In-memory columnar index for /grants/public (falls back to SQL when off)
+    GRANT_INDEX_ENABLED: bool = os.getenv("GRANT_INDEX_ENABLED", "true").lower() == "true"
+    GRANT_INDEX_MAX_AGE_SECONDS: float = float(os.getenv("GRANT_INDEX_MAX_AGE_SECONDS", 60))
+
+    # Pre-serialized feed shared by all workers on a host via mmap
+    FEED_SNAPSHOT_ENABLED: bool = os.getenv("FEED_SNAPSHOT_ENABLED", "true").lower() == "true"
+    FEED_SNAPSHOT_DIR: str = os.getenv("FEED_SNAPSHOT_DIR")  # Default: per-database dir in /tmp
+    FEED_SNAPSHOT_MAX_AGE_SECONDS: float = float(os.getenv("FEED_SNAPSHOT_MAX_AGE_SECONDS", 60))
+
+    # In-memory prefix index for /grants/suggest (falls back to a SQL title prefix match when off)
+    SUGGEST_INDEX_ENABLED: bool = os.getenv("SUGGEST_INDEX_ENABLED", "true").lower() == "true"
+
+    # Precomputed "similar grants" (app/services/grant_similarity.py); off = same-category fallback only
+    SIMILAR_GRANTS_ENABLED: bool = os.getenv("SIMILAR_GRANTS_ENABLED", "true").lower() == "true"
+    SIMILAR_GRANTS_K: int = int(os.getenv("SIMILAR_GRANTS_K", 10))  # Neighbours stored per grant
+    # Vectors kept for incremental updates are re-read from the DB after this long
+    SIMILAR_GRANTS_MODEL_MAX_AGE_SECONDS: float = float(os.getenv("SIMILAR_GRANTS_MODEL_MAX_AGE_SECONDS", 3600))
+
+    # Near-duplicate detection on import / submit (app/services/grant_dedup.py)
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", 0.8))  # Estimated Jaccard similarity of word 3-shingles
+
+    # POST /grants/submit/batch (JSON array or NDJSON)
+    GRANT_BATCH_MAX_ITEMS: int = int(os.getenv("GRANT_BATCH_MAX_ITEMS", 500))
+    GRANT_BATCH_MAX_BYTES: int = int(os.getenv("GRANT_BATCH_MAX_BYTES", 5 * 1024 * 1024))
+
+    # Saved searches matched against new public grants, sent as digests (app/services/saved_searches.py);
+    # off = searches are still stored, but nothing is matched or sent
+    SAVED_SEARCHES_ENABLED: bool = os.getenv("SAVED_SEARCHES_ENABLED", "true").lower() == "true"
+    SAVED_SEARCHES_PER_USER: int = int(os.getenv("SAVED_SEARCHES_PER_USER", 20))
+    SAVED_SEARCH_DIGEST_MAX_GRANTS: int = int(os.getenv("SAVED_SEARCH_DIGEST_MAX_GRANTS", 20))  # Per search and email
+
+    # View / apply-click counters, buffered in memory and written behind (app/services/grant_stats.py);
+    # a crash loses at most GRANT_STATS_FLUSH_SECONDS of counts
+    GRANT_STATS_ENABLED: bool = os.getenv("GRANT_STATS_ENABLED", "true").lower() == "true"
+    GRANT_STATS_FLUSH_SECONDS: float = float(os.getenv("GRANT_STATS_FLUSH_SECONDS", 10))
+    GRANT_STATS_MAX_PENDING: int = int(os.getenv("GRANT_STATS_MAX_PENDING", 100_000))  # Distinct grants per flush
+    # Trending score: views + GRANT_TRENDING_CLICK_WEIGHT * clicks, halved every GRANT_TRENDING_HALF_LIFE_HOURS
+    GRANT_TRENDING_INTERVAL_SECONDS: float = float(os.getenv("GRANT_TRENDING_INTERVAL_SECONDS", 300))
+    GRANT_TRENDING_HALF_LIFE_HOURS: float = float(os.getenv("GRANT_TRENDING_HALF_LIFE_HOURS", 24))
+    GRANT_TRENDING_CLICK_WEIGHT: float = float(os.getenv("GRANT_TRENDING_CLICK_WEIGHT", 5))
+
+    # Server-Sent Events stream of grant changes (app/services/grant_stream.py)
+    GRANT_STREAM_ENABLED: bool = os.getenv("GRANT_STREAM_ENABLED", "true").lower() == "true"
+    GRANT_STREAM_MAX_SUBSCRIBERS: int = int(os.getenv("GRANT_STREAM_MAX_SUBSCRIBERS", 10_000))  # Per process
+    GRANT_STREAM_QUEUE_SIZE: int = int(os.getenv("GRANT_STREAM_QUEUE_SIZE", 64))  # Frames behind before a drop
+    GRANT_STREAM_LOG_SIZE: int = int(os.getenv("GRANT_STREAM_LOG_SIZE", 1000))  # Events kept for Last-Event-ID
+    GRANT_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("GRANT_STREAM_HEARTBEAT_SECONDS", 15))
+    # Streams end after this long (clients reconnect and resume), so shutdowns don't wait on them
+    GRANT_STREAM_MAX_SECONDS: float = float(os.getenv("GRANT_STREAM_MAX_SECONDS", 120))
+    # Poll for grants published by other processes (0 = only this process's writes)
+    GRANT_STREAM_POLL_SECONDS: float = float(os.getenv("GRANT_STREAM_POLL_SECONDS", 5))
+
 settings = Settings()
@@ -1,8 +1,55 @@
-import requests
 import json
+from html import escape
+from typing import List, Tuple
 from app.core.config import settings
 
 def send_verification_email(email_to: str, code: str, subject: str = "Your Verification Code - Relivo", heading: str = "Verification Code"):
+    return _send_email(email_to, subject, f"""
+        <html>
+            <body style="font-family: Arial, sans-serif;">
+                <div style="padding: 20px; background-color: #f4f4f4; border-radius: 10px;">
+                    <h2 style="color: #333;">{heading}</h2>
+                    <p style="font-size: 16px;">Your code is:</p>
+                    <h1 style="color: #4CAF50; letter-spacing: 5px;">{code}</h1>
+                    <p style="font-size: 14px; color: #666;">Please do not share this code with anyone.</p>
+                </div>
+            </body>
+        </html>
+        """)
+
+
+def send_saved_search_digest(email_to: str, sections: List[Tuple[str, List[Tuple[str, str]], int]]):
+    """
+    One email for all of a user's saved searches with new grants.
+    sections: (search name, [(grant title, apply url)], grants left out).
+    """
+    total = sum(len(grants) + more for _, grants, more in sections)
+    blocks = []
+    for name, grants, more in sections:
+        items = "".join(
+            f'<li style="margin-bottom: 6px;"><a href="{escape(url)}">{escape(title)}</a></li>' for title, url in grants
+        )
+        if more:
+            items += f'<li style="color: #666;">and {more} more</li>'
+        blocks.append(f'<h3 style="color: #333;">{escape(name)}</h3><ul>{items}</ul>')
+    body = "".join(blocks)
+    return _send_email(
+        email_to,
+        f"{total} new grant{'s' if total != 1 else ''} for your saved searches - Relivo",
+        f"""
+        <html>
+            <body style="font-family: Arial, sans-serif;">
+                <div style="padding: 20px; background-color: #f4f4f4; border-radius: 10px;">
+                    <h2 style="color: #333;">New grants matching your saved searches</h2>
+                    {body}
+                </div>
+            </body>
+        </html>
+        """,
+    )
+
+
+def _send_email(email_to: str, subject: str, html_content: str):
     print(f"DEBUG: Attempting to send email via Brevo API to {email_to}")
     
     url = "https://api.brevo.com/v3/smtp/email"
@@ -30,18 +77,7 @@ def send_verification_email(email_to: str, code: str, subject: str = "Your Verif
             }
         ],
         "subject": subject,
-        "htmlContent": f"""
-        <html>
-            <body style="font-family: Arial, sans-serif;">
-                <div style="padding: 20px; background-color: #f4f4f4; border-radius: 10px;">
-                    <h2 style="color: #333;">{heading}</h2>
-                    <p style="font-size: 16px;">Your code is:</p>
-                    <h1 style="color: #4CAF50; letter-spacing: 5px;">{code}</h1>
-                    <p style="font-size: 14px; color: #666;">Please do not share this code with anyone.</p>
-                </div>
-            </body>
-        </html>
-        """
+        "htmlContent": html_content
     }
     
     headers = {
@@ -50,6 +86,8 @@ def send_verification_email(email_to: str, code: str, subject: str = "Your Verif
         'content-type': 'application/json'
     }
     
+    import requests  # Deferred: only needed when an email is actually sent (cold start)
+
     try:
         response = requests.post(url, headers=headers, json=payload, timeout=10)
         
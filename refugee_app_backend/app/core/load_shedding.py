@@ -0,0 +1,53 @@
+"""
+Pool Saturation Load Shedding
+
+When too many threads are already queued for a database connection, new
+requests would only join the queue, hold a worker thread and most likely
+time out at pool_timeout. This middleware answers them immediately with
+503 + Retry-After instead, so clients back off and the backlog drains.
+"""
+
+import json
+
+from db.pool_metrics import max_waiting
+from app.core.metrics import REGISTRY
+
+# Probes, scrapes, the root page and the grant stream never touch the pool
+EXEMPT_PATHS = {"/", "/health", "/metrics", "/grants/stream"}
+
+shed_requests = REGISTRY.counter(
+    "relivo_load_shed_requests_total", "Requests rejected with 503 because the DB pool was saturated"
+).labels()
+
+
+class PoolSaturationMiddleware:
+    """Pure ASGI middleware: runs on the event loop, before any thread is used."""
+
+    def __init__(self, app, max_waiting: int, retry_after: int):
+        self.app = app
+        self.max_waiting = max_waiting
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.max_waiting
+            or scope["path"] in EXEMPT_PATHS
+            or max_waiting() < self.max_waiting
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        shed_requests.inc()
+        body = json.dumps({"detail": "Server busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
@@ -0,0 +1,253 @@
+"""
+Metrics
+
+Dependency-free counters, gauges and histograms plus a registry that renders
+them in the Prometheus text exposition format (served at /metrics).
+
+Hot-path updates never take a lock: every thread accumulates into its own
+cell and the cells are summed when the registry is scraped. Values that are
+cheaper to read on demand (pool occupancy, cache sizes, ...) are exported by
+collector callbacks registered with REGISTRY.register_collector().
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Seconds; tuned for DB checkout waits and request latencies
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _PerThread:
+    """One mutable cell per thread; only its owner thread writes to it."""
+
+    def __init__(self, factory: Callable[[], list]):
+        self._factory = factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cells: List[list] = []
+
+    def cell(self) -> list:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._factory()
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def cells(self) -> List[list]:
+        with self._lock:
+            return list(self._cells)
+
+
+class Counter:
+    """Monotonic count."""
+
+    def __init__(self):
+        self._cells = _PerThread(lambda: [0])
+
+    def inc(self, amount: float = 1):
+        self._cells.cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(cell[0] for cell in self._cells.cells())
+
+
+class Gauge:
+    """Up/down value, either tracked with inc()/dec() or read from a callback."""
+
+    def __init__(self, read: Optional[Callable[[], float]] = None):
+        self._read = read
+        self._cells = _PerThread(lambda: [0])
+
+    def inc(self, amount: float = 1):
+        self._cells.cell()[0] += amount
+
+    def dec(self, amount: float = 1):
+        self._cells.cell()[0] -= amount
+
+    @property
+    def value(self) -> float:
+        if self._read is not None:
+            return self._read()
+        return sum(cell[0] for cell in self._cells.cells())
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative buckets are computed on read)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        slots = len(self.buckets) + 1  # Last slot is +Inf
+        self._cells = _PerThread(lambda: [[0] * slots, 0.0])
+
+    def observe(self, value: float):
+        cell = self._cells.cell()
+        cell[0][bisect.bisect_left(self.buckets, value)] += 1
+        cell[1] += value
+
+    def _merged(self) -> Tuple[List[int], float]:
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for slot_counts, slot_sum in self._cells.cells():
+            for i, count in enumerate(slot_counts):
+                counts[i] += count
+            total += slot_sum
+        return counts, total
+
+    @property
+    def count(self) -> int:
+        return sum(self._merged()[0])
+
+    @property
+    def sum(self) -> float:
+        return self._merged()[1]
+
+    def cumulative_counts(self) -> List[int]:
+        counts, _ = self._merged()
+        running, cumulative = 0, []
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-quantile (coarse, for logs/health)."""
+        cumulative = self.cumulative_counts()
+        if not cumulative[-1]:
+            return 0.0
+        target = q * cumulative[-1]
+        for bound, seen in zip(self.buckets, cumulative):
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, float]:
+        counts, total = self._merged()
+        return {
+            "count": sum(counts),
+            "sum": round(total, 6),
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+Metric = Union[Counter, Gauge, Histogram]
+LabelValues = Tuple[str, ...]
+# A collected family: (name, type, help, [(labels, value or Histogram), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], Union[float, Histogram]]]]
+
+
+class MetricFamily:
+    """A named metric with zero or more labels; one child metric per label set."""
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: Sequence[str], factory: Callable[[], Metric]):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, Metric] = {}
+
+    def labels(self, *values: str) -> Metric:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def collect(self) -> Family:
+        samples = []
+        for values, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            samples.append((labels, child if isinstance(child, Histogram) else child.value))
+        return self.name, self.kind, self.help, samples
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _family(self, kind: str, name: str, help: str, labelnames: Sequence[str], factory) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(kind, name, help, labelnames, factory)
+            return family
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family("counter", name, help, labelnames, Counter)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family("gauge", name, help, labelnames, Gauge)
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> MetricFamily:
+        return self._family("histogram", name, help, labelnames, lambda: Histogram(buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        """Add a callback that yields families computed at scrape time."""
+        self._collectors.append(collector)
+        return collector
+
+    def collect(self) -> List[Family]:
+        families = [family.collect() for family in list(self._families.values())]
+        for collector in list(self._collectors):
+            families.extend(collector())
+        return families
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4."""
+        lines: List[str] = []
+        for name, kind, help, samples in self.collect():
+            lines.append(f"# HELP {name} {_escape_help(help)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if isinstance(value, Histogram):
+                    _render_histogram(lines, name, labels, value)
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _render_histogram(lines: List[str], name: str, labels: Dict[str, str], histogram: Histogram):
+    counts, total = histogram._merged()
+    running = 0
+    for bound, count in zip(histogram.buckets + (float("inf"),), counts):
+        running += count
+        bucket_labels = dict(labels, le=_format_value(float(bound)))
+        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {running}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+    lines.append(f"{name}_count{_format_labels(labels)} {running}")
+
+
+REGISTRY = Registry()
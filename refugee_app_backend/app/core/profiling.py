@@ -0,0 +1,217 @@
+"""
+Request Profiling
+
+Sampling profiler for finding where a slow endpoint spends its time:
+
+- on demand: an admin request with `X-Profile: 1` (or `?profile=1`); the
+  response carries `X-Profile-Id`
+- continuously: a random PROFILE_SAMPLE_RATE share of all requests
+
+While a profiled request is in flight, a background thread samples the Python
+stack of every thread running app code (sys._current_frames) every
+PROFILE_INTERVAL_MS. Profiles are kept as collapsed stacks ("a;b;c 12" lines,
+the input format of flamegraph.pl and speedscope) in a ring buffer of the
+last PROFILE_BUFFER_SIZE and served to admins at /admin/profiles.
+
+Stacks of other requests running at the same time in the same worker show up
+too, so profile on a quiet instance when precision matters.
+"""
+
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as Tally, deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.api import deps
+from app.core.config import settings
+from db.session import SessionLocal
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+APP_DIRS = tuple(os.path.join(BACKEND_ROOT, name) + os.sep for name in ("app", "db"))
+# Long-lived responses would keep the sampler running for as long as they stay open
+UNPROFILED_PATHS = {"/grants/stream"}
+
+
+@lru_cache(maxsize=None)
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(BACKEND_ROOT + os.sep):
+        filename = os.path.relpath(filename, BACKEND_ROOT)
+    else:
+        _, found, package_path = filename.rpartition("site-packages" + os.sep)
+        filename = package_path if found else os.path.basename(filename)
+    return f"{code.co_name} ({filename})"
+
+
+class Profile:
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = next(Profile._ids)
+        self.method = method
+        self.path = path
+        self.reason = reason  # "requested" or "sampled"
+        self.started_at = datetime.utcnow()
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.duration_ms: Optional[float] = None
+        self.samples = 0
+        self.stacks: Tally = Tally()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+        }
+
+
+class Sampler:
+    """One background thread per process, sampling only while profiles are active."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: List[Profile] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile):
+        with self._lock:
+            self._active.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile: Profile):
+        # Under the lock: no sample lands in the profile after this returns
+        with self._lock:
+            self._active.remove(profile)
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while True:
+            self._wake.wait()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+            stacks = self._sample(own_ident)
+            with self._lock:
+                for profile in self._active:
+                    profile.samples += 1
+                    profile.stacks.update(stacks)
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _sample(own_ident: int) -> List[str]:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            codes = []
+            in_app = False
+            while frame is not None:
+                codes.append(frame.f_code)
+                in_app = in_app or frame.f_code.co_filename.startswith(APP_DIRS)
+                frame = frame.f_back
+            if in_app:  # Skips idle workers and the event loop waiting on I/O
+                labels = [names.get(ident, "thread")]
+                labels.extend(_frame_label(code) for code in reversed(codes))
+                stacks.append(";".join(labels))
+        return stacks
+
+
+sampler = Sampler(settings.PROFILE_INTERVAL_MS / 1000)
+profiles: Deque[Profile] = deque(maxlen=settings.PROFILE_BUFFER_SIZE)
+
+
+def get_profile(profile_id: int) -> Optional[Profile]:
+    return next((profile for profile in profiles if profile.id == profile_id), None)
+
+
+def _profile_requested(scope) -> bool:
+    headers = dict(scope["headers"])
+    if headers.get(b"x-profile", b"").lower() in (b"1", b"true"):
+        return True
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [""])[-1].lower() in ("1", "true")
+
+
+def _is_admin(authorization: str) -> bool:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    db = SessionLocal()
+    try:
+        user = deps.get_current_user(db=db, token=token)
+        deps.get_current_admin_user(current_user=deps.get_current_active_user(current_user=user))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, sample_rate: float = 0.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNPROFILED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        reason = None
+        if _profile_requested(scope):
+            authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+            if await run_in_threadpool(_is_admin, authorization):
+                reason = "requested"
+        if reason is None and self.sample_rate and random.random() < self.sample_rate:
+            reason = "sampled"
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], reason)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                if reason == "requested":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-id", str(profile.id).encode("latin-1"))
+                    ]
+            await send(message)
+
+        started = time.perf_counter()
+        sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop(profile)
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            profile.route = getattr(scope.get("route"), "path", "unmatched")
+            profiles.append(profile)
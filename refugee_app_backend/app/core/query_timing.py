@@ -0,0 +1,58 @@
+"""
+Per-Request Query Timing
+
+Pure ASGI middleware that tracks the SQL statements each request issues
+(db/query_stats.py) and:
+
+- exports queries-per-request and DB time per route to /metrics
+- in DEBUG mode, adds `Server-Timing: db;dur=<ms>;desc="<n> queries"`
+- logs routes that repeat the same statement N_PLUS_ONE_THRESHOLD+ times
+"""
+
+import logging
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from db.query_stats import track_request
+
+logger = logging.getLogger(__name__)
+
+QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "relivo_db_queries_per_request",
+    "SQL statements issued per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 4, 5, 7, 10, 15, 25, 50, 100),
+)
+DB_SECONDS_PER_REQUEST = REGISTRY.histogram(
+    "relivo_db_seconds_per_request",
+    "Time spent in SQL statements per request",
+    ["route"],
+)
+
+
+class QueryTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_request() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    timing = f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries"'
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+                DB_SECONDS_PER_REQUEST.labels(route).observe(stats.seconds)
+                for sql in stats.repeated(settings.N_PLUS_ONE_THRESHOLD):
+                    logger.warning(f"Possible N+1 on {scope['method']} {route}: {sql}")
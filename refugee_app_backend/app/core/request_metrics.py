@@ -0,0 +1,58 @@
+"""
+Per-Route Request Metrics
+
+Pure ASGI middleware recording, for every HTTP request, a latency histogram
+labelled by method, route template (e.g. /grants/my-submissions/{grant_id},
+never the raw path, to keep cardinality bounded) and status code, plus an
+in-flight gauge. Everything is exported through REGISTRY at /metrics.
+"""
+
+import time
+
+from app.core.metrics import REGISTRY
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "relivo_http_request_duration_seconds",
+    "HTTP request latency by route and status",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "relivo_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        status_code = 500  # If the app raises before starting a response
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            REQUEST_LATENCY.labels(method, route_path, str(status_code)).observe(
+                time.perf_counter() - started
+            )
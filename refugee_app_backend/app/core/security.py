@@ -1,11 +1,21 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 from jose import jwt
-from passlib.context import CryptContext
 from app.core.config import settings
 
-# Changed to Argon2 for better security and stability
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+_pwd_context = None
+
+def get_pwd_context():
+    """
+    Password hashing context, created on first use: loading passlib's Argon2
+    and bcrypt backends is kept out of the import (cold start) path.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        # Changed to Argon2 for better security and stability
+        _pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+    return _pwd_context
 
 def create_access_token(subject: Union[str, Any], user_id: int, role: str, expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
@@ -23,7 +33,7 @@ def create_access_token(subject: Union[str, Any], user_id: int, role: str, expir
     return encoded_jwt
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
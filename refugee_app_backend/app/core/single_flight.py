@@ -0,0 +1,117 @@
+"""
+Single-Flight Request Coalescing
+
+When many identical requests arrive while the result isn't cached (cold
+start, right after an import), only the first one runs the query; the rest
+wait for and share its result instead of each taking a pooled connection.
+
+    feed_flight = SingleFlight("public_feed")
+    grants = feed_flight.do(key, lambda: load(db))             # sync handlers
+    grants = await feed_flight.do_async(key, lambda: load())   # async handlers
+
+Results are shared between requests, so they must be immutable or at least
+safe to hand out more than once (e.g. Pydantic models, not ORM objects bound
+to the leader's session). Exceptions are shared the same way.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+from app.core.metrics import REGISTRY
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+        _registry.append(self)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn() unless an identical call is in flight; then wait for its result."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant; coalesces callers on the same event loop."""
+        self.calls += 1  # Single event loop thread: no lock needed
+        future = self._async_calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = self._async_calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved: followers (if any) re-raise it
+            raise
+        finally:
+            del self._async_calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._async_calls),
+        }
+
+
+_registry: List[SingleFlight] = []
+
+
+def all_stats() -> Dict[str, Dict[str, int]]:
+    """Stats for every SingleFlight in the process, keyed by name."""
+    return {flight.name: flight.stats() for flight in _registry}
+
+
+@REGISTRY.register_collector
+def _collect_flights():
+    flights = [(flight.name, flight.stats()) for flight in _registry]
+    yield "relivo_single_flight_calls_total", "counter", "Calls made through a single-flight group", [
+        ({"flight": name}, stats["calls"]) for name, stats in flights
+    ]
+    yield "relivo_single_flight_coalesced_total", "counter", "Calls that waited for an identical in-flight call", [
+        ({"flight": name}, stats["coalesced"]) for name, stats in flights
+    ]
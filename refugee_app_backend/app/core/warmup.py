@@ -0,0 +1,116 @@
+"""
+Background Warm-Up
+
+Started from the startup event in a daemon thread, so uvicorn binds the port
+(and the platform health check passes) before the slow first-use work runs:
+
+- open the first DB connection(s)
+- load the password hashing backends
+- load the country / category alias map
+- build the public grant and typeahead indexes and map (or publish) the feed snapshot
+
+Every step is best effort: if one fails, the first request that needs it
+simply pays the cost as before.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def _database():
+    from db.session import engine, read_engine
+    for bind in (engine, read_engine):
+        if bind is not None:
+            with bind.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+
+def _password_hashing():
+    from app.core.security import get_pwd_context
+    # Default (Argon2) scheme only: bcrypt is just for verifying legacy hashes
+    get_pwd_context().handler().get_backend()  # Loads the backend without hashing anything
+
+
+def _grant_index():
+    from app.services.grant_index import public_grant_index
+    from db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        public_grant_index.ensure_fresh(db)
+    finally:
+        db.close()
+
+
+def _dimension_aliases():
+    from app.services import grant_dimensions
+    from db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        grant_dimensions.ensure_fresh(db)
+    finally:
+        db.close()
+
+
+def _suggest_index():
+    from app.services.grant_suggest import grant_suggest_index
+    from db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        grant_suggest_index.ensure_fresh(db)
+    finally:
+        db.close()
+
+
+def _feed_snapshot():
+    from app.services.feed_snapshot import feed_snapshot
+    feed_snapshot.page(None, None, 0, 1)  # Maps the current snapshot, or schedules a publish
+
+
+WARM_UP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("database", _database),
+    ("password hashing", _password_hashing),
+    ("dimension aliases", _dimension_aliases),
+    ("grant index", _grant_index),
+    ("suggest index", _suggest_index),
+    ("feed snapshot", _feed_snapshot),
+]
+
+
+_stopping = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def warm_up():
+    started = time.perf_counter()
+    for name, step in WARM_UP_STEPS:
+        if _stopping.is_set():
+            logger.info("Warm-up interrupted by shutdown")
+            return
+        step_started = time.perf_counter()
+        try:
+            step()
+            logger.info(f"Warm-up: {name} ready in {(time.perf_counter() - step_started) * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"Warm-up: {name} failed: {e}")
+    logger.info(f"✅ Warm-up finished in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def start_warm_up():
+    global _thread
+    _stopping.clear()
+    _thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    _thread.start()
+
+
+def stop_warm_up(timeout: float = 10.0):
+    """Skip the remaining steps and wait for the current one, so the interpreter
+    doesn't tear the thread down mid-query on shutdown."""
+    _stopping.set()
+    if _thread is not None:
+        _thread.join(timeout)
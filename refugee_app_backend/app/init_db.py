@@ -4,14 +4,13 @@ import os
 # Ensure the parent directory is in sys.path so we can import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.session import engine, Base
-# Import all models so they are registered with Base.metadata
-import db.models 
+from db.session import engine
+from db.migrate import migrate
 
 def init_db():
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Tables created successfully!")
+    print("Migrating database schema...")
+    applied = migrate(engine)
+    print(f"Schema up to date (applied: {applied or 'nothing'})")
 
 if __name__ == "__main__":
     init_db()
@@ -1,9 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
 import logging
 
 from app.api import auth
-from db.session import engine, Base
+from app.core.config import settings
+from app.core.load_shedding import PoolSaturationMiddleware
+from app.core.metrics import REGISTRY
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.query_timing import QueryTimingMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.warmup import start_warm_up, stop_warm_up
+from app.services.grant_similarity import similarity_updater
+from app.services.saved_searches import saved_search_notifier
+from app.services.grant_stats import grant_stats_recorder
+from db.session import engine
+from db.migrate import check_version
 import db.models # Import models to ensure they are registered with Base
 
 # Configure logging
@@ -12,6 +25,26 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Refugee App Backend", version="1.0.0")
 
+# Sampling profiler: admins send X-Profile: 1, plus a random PROFILE_SAMPLE_RATE share
+app.add_middleware(ProfilingMiddleware, sample_rate=settings.PROFILE_SAMPLE_RATE)
+
+# Per-request SQL counts / timing (Server-Timing header when DEBUG=true)
+app.add_middleware(QueryTimingMiddleware)
+
+# Shed load with 503s instead of queueing threads on a saturated DB pool
+# (added first so CORS still wraps the 503s)
+app.add_middleware(
+    PoolSaturationMiddleware,
+    max_waiting=settings.POOL_SHED_WAITING,
+    retry_after=settings.POOL_SHED_RETRY_AFTER,
+)
+
+# Per-route latency / in-flight metrics (wraps the shedder, so 503s are counted too)
+app.add_middleware(RequestMetricsMiddleware)
+
+# Compress large responses (event streams are left alone)
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE, compresslevel=settings.GZIP_LEVEL)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -21,23 +54,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Startup event to create tables
+# Startup only checks the schema version; migrations run once per deploy
+# (python -m db.migrate), not in every worker
 @app.on_event("startup")
 async def startup_event():
-    """Create database tables on startup"""
+    """Check that the database schema is up to date"""
     try:
-        logger.info("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully")
+        current, latest = check_version(engine)
+        if current < latest:
+            logger.error(
+                f"❌ Database schema is at version {current}, code expects {latest}. "
+                "Run `python -m db.migrate`."
+            )
+        else:
+            logger.info(f"✅ Database schema at version {current}")
     except Exception as e:
-        logger.error(f"❌ Error creating tables: {e}")
-        # Don't crash the app, tables might already exist
-        logger.warning("Continuing without creating tables - they may already exist")
+        logger.error(f"❌ Error checking schema version: {e}")
+
+    if settings.WARM_UP_ENABLED:
+        start_warm_up()
+    grant_stats_recorder.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await run_in_threadpool(stop_warm_up)
+    await run_in_threadpool(similarity_updater.stop)
+    await run_in_threadpool(saved_search_notifier.stop)
+    await run_in_threadpool(grant_stats_recorder.stop)  # Flushes pending counts
 
 # Include routers
 app.include_router(auth.router)
 from app.api import grants
 app.include_router(grants.router)
+from app.api import profiles
+app.include_router(profiles.router)
+from app.api import saved_searches
+app.include_router(saved_searches.router)
+from app.api import eligibility
+app.include_router(eligibility.router)
 
 @app.get("/")
 async def root():
@@ -47,6 +101,11 @@ async def root():
         "status": "healthy"
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -57,89 +116,15 @@ async def health_check():
         db = SessionLocal()
         db.execute(text("SELECT 1"))
         db.close()
-        return {"status": "healthy", "database": "connected"}
+        from app.core.single_flight import all_stats
+        from app.core.load_shedding import shed_requests
+        from db.pool_metrics import pool_stats
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "pool": {name: stats.snapshot() for name, stats in pool_stats().items()},
+            "shed_requests": shed_requests.value,
+            "single_flight": all_stats(),
+        }
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
-
-@app.get("/migrate-schema")
-async def migrate_schema():
-    """Manually apply schema updates (e.g. adding columns)"""
-    from db.session import engine
-    from sqlalchemy import text
-    try:
-        with engine.connect() as conn:
-            # Check if category column exists
-            # This is a simple way for PostgreSQL/SQLite
-            try:
-                conn.execute(text("ALTER TABLE grants ADD COLUMN category VARCHAR(100) DEFAULT 'General'"))
-                conn.commit()
-                message = "✅ Migration successful: Added 'category' column."
-            except Exception as e:
-                # If column already exists, it will error
-                if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
-                    message = "ℹ️ 'category' column already exists."
-                else:
-                    return {"error": str(e)}
-
-            # Perform one-time bulk categorization for 'General' grants
-            try:
-                # Update Housing
-                conn.execute(text("""
-                    UPDATE grants SET category = 'Housing' 
-                    WHERE category = 'General' AND (
-                        LOWER(title) LIKE '%housing%' OR LOWER(title) LIKE '%shelter%' OR 
-                        LOWER(description) LIKE '%housing%' OR LOWER(description) LIKE '%shelter%'
-                    )
-                """))
-                # Update Education
-                conn.execute(text("""
-                    UPDATE grants SET category = 'Education' 
-                    WHERE category = 'General' AND (
-                        LOWER(title) LIKE '%education%' OR LOWER(title) LIKE '%training%' OR 
-                        LOWER(description) LIKE '%education%' OR LOWER(description) LIKE '%training%'
-                    )
-                """))
-                # Update Healthcare
-                conn.execute(text("""
-                    UPDATE grants SET category = 'Healthcare' 
-                    WHERE category = 'General' AND (
-                        LOWER(title) LIKE '%health%' OR LOWER(title) LIKE '%medical%' OR 
-                        LOWER(description) LIKE '%health%' OR LOWER(description) LIKE '%medical%'
-                    )
-                """))
-                # Update Employment
-                conn.execute(text("""
-                    UPDATE grants SET category = 'Employment' 
-                    WHERE category = 'General' AND (
-                        LOWER(title) LIKE '%employment%' OR LOWER(title) LIKE '%job%' OR LOWER(title) LIKE '%business%' OR
-                        LOWER(description) LIKE '%employment%' OR LOWER(description) LIKE '%job%' OR LOWER(description) LIKE '%business%'
-                    )
-                """))
-                # Update Legal
-                conn.execute(text("""
-                    UPDATE grants SET category = 'Legal' 
-                    WHERE category = 'General' AND (
-                        LOWER(title) LIKE '%legal%' OR LOWER(title) LIKE '%asylum%' OR 
-                        LOWER(description) LIKE '%legal%' OR LOWER(description) LIKE '%asylum%'
-                    )
-                """))
-                # Update Emergency
-                conn.execute(text("""
-                    UPDATE grants SET category = 'Emergency' 
-                    WHERE category = 'General' AND (
-                        LOWER(title) LIKE '%emergency%' OR LOWER(title) LIKE '%urgent%' OR 
-                        LOWER(description) LIKE '%emergency%' OR LOWER(description) LIKE '%urgent%'
-                    )
-                """))
-                conn.commit()
-                return {"message": f"{message} Categorization sync complete."}
-            except Exception as e:
-                return {"message": f"{message} Error during categorization: {str(e)}"}
-    except Exception as e:
-        return {"error": str(e)}
-
-    finally:
-        db.close()
-
-
-
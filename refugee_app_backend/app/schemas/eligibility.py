@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+
+from app.services.grant_eligibility import VOCABULARY
+
+
+class EligibilityProfileBase(BaseModel):
+    """What grants' eligibility criteria are matched against; unset attributes exclude no grant"""
+    residence_country: Optional[str] = Field(None, max_length=100)  # Any country name
+    status: Optional[str] = None
+    age_band: Optional[str] = None
+    household: Optional[str] = None
+    occupation: Optional[str] = None
+
+    @field_validator("status", "age_band", "household", "occupation")
+    @classmethod
+    def known_value(cls, value: Optional[str], info: ValidationInfo) -> Optional[str]:
+        # GET /eligibility/vocabulary lists them
+        if value is not None and value not in VOCABULARY[info.field_name]:
+            raise ValueError(f"must be one of: {', '.join(VOCABULARY[info.field_name])}")
+        return value
+
+class EligibilityProfileUpdate(EligibilityProfileBase):
+    pass
+
+class EligibilityProfile(EligibilityProfileBase):
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -48,15 +48,68 @@ class GrantUpdate(BaseModel):
 
 class Grant(GrantBase):
     id: int
+    duplicate_of_id: Optional[int] = None  # Set on near-duplicates awaiting review
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class GrantSummary(BaseModel):
+    """The fields a grant list item shows"""
+    id: int
+    title: str
+    organizer: str
+    deadline: Optional[datetime] = None
+    amount: Optional[str] = None
+    refugee_country: Optional[str] = None
+    category: Optional[str] = None
+    apply_url: str
+
+    class Config:
+        from_attributes = True
+
+class GrantBatchCreated(BaseModel):
+    """One saved item of a batch submission"""
+    index: int  # Position in the submitted array / NDJSON line
+    id: int
+    category: Optional[str] = None  # Detected when the item left it out
+    is_verified: bool
+    duplicate_of_id: Optional[int] = None
+
+class GrantBatchError(BaseModel):
+    """Why one item of a batch submission wasn't saved"""
+    index: int
+    errors: List[str]
+
+class GrantBatchResult(BaseModel):
+    """Result of a batch submission: every item is either created or in errors"""
+    created: List[GrantBatchCreated] = []
+    errors: List[GrantBatchError] = []
+
+MAX_BATCH_GET_IDS = 500
+
+class GrantBatchGet(BaseModel):
+    """Bookmarked grant ids to refresh"""
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_GET_IDS)
+
+class GrantBatchGetResult(BaseModel):
+    """Public grants among the ids (request order), and what became of the others"""
+    grants: List[GrantSummary] = []
+    missing: List[int] = []  # No such grant (deleted)
+    retired: List[int] = []  # Still there, but no longer public (unverified, deactivated or expired)
+
 class GrantImportResult(BaseModel):
     """Result of Grants.gov import operation"""
     imported: int
     skipped: int
+    duplicates: int = 0  # Near-duplicates of existing grants, not imported
     errors: List[str] = []
 
+
+class GrantSuggestion(BaseModel):
+    """Typeahead entry: a public grant's title, or an organizer / category"""
+    text: str
+    kind: str  # "grant", "organizer" or "category"
+    grant_id: Optional[int] = None  # Set for kind == "grant"
+    count: int = 1  # Public grants behind the suggestion
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+
+class SavedSearchBase(BaseModel):
+    """Same filters as /grants/public, plus keywords; every given one must match"""
+    name: Optional[str] = Field(None, max_length=100)
+    category: Optional[str] = Field(None, max_length=100)
+    refugee_country: Optional[str] = Field(None, max_length=100)
+    keywords: Optional[str] = Field(None, max_length=200)  # All words in the title / organizer / description
+    deadline_from: Optional[datetime] = None
+    deadline_to: Optional[datetime] = None
+    frequency: Literal["daily", "instant"] = "daily"
+
+class SavedSearchCreate(SavedSearchBase):
+    @field_validator("deadline_from", "deadline_to")
+    @classmethod
+    def naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored without a timezone, like grant deadlines
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    @model_validator(mode="after")
+    def check_window(self):
+        if self.deadline_from and self.deadline_to and self.deadline_from > self.deadline_to:
+            raise ValueError("deadline_from must not be after deadline_to")
+        return self
+
+class SavedSearch(SavedSearchBase):
+    id: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
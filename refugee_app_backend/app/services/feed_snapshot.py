@@ -0,0 +1,306 @@
+"""
+Shared Public Feed Snapshot
+
+Pre-serialized /grants/public responses shared by every worker process on a
+host through memory-mapped files, so N gunicorn workers hold one copy of the
+feed (in the page cache) instead of N, and none of them rebuilds it alone.
+
+Files in FEED_SNAPSHOT_DIR:
+- feed.ctl           16-byte control block: magic + current version (u64)
+- feed.<version>.bin immutable snapshot: header, shard directory, payloads
+
+Each shard is one (country, category) filter combination ("" = any) stored
+as a ready JSON array plus item offsets, so a whole shard is served as a
+zero-copy memoryview and a page as a single slice. Readers only compare the
+version in feed.ctl on each request and re-map when it moves.
+
+The publisher runs after grant changes (debounced on a background thread)
+and whenever a snapshot expires: at the first deadline it contains or after
+FEED_SNAPSHOT_MAX_AGE_SECONDS, whichever comes first. An flock on feed.ctl
+makes sure only one process publishes at a time.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.schemas import grant as schemas
+from app.services.grant_events import GrantChanges, subscribe
+from app.services.grant_queries import public_grants_query
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX dev machines: publish without cross-process lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CTL_MAGIC = b"RFC1"
+CTL_FORMAT = "<4s4xQ"  # magic, padding, version
+DATA_MAGIC = b"RFD1"
+DATA_HEADER_FORMAT = "<4sQddI"  # magic, version, created_at, valid_until, directory length
+DATA_HEADER_SIZE = struct.calcsize(DATA_HEADER_FORMAT)
+
+ShardKey = Tuple[str, str]  # (country, category); "" matches any
+
+
+def _shard_keys(grant: schemas.Grant) -> List[ShardKey]:
+    country = grant.refugee_country or ""
+    category = grant.category or ""
+    keys = {("", ""), (country, ""), ("", category), (country, category)}
+    return list(keys)
+
+
+def _encode_key(key: ShardKey) -> str:
+    return f"{key[0]}\x1f{key[1]}"
+
+
+class Snapshot:
+    """One mapped snapshot version."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, self.version, self.created_at, self.valid_until, directory_length = struct.unpack_from(
+            DATA_HEADER_FORMAT, self._mm, 0
+        )
+        if magic != DATA_MAGIC:
+            raise ValueError(f"Not a feed snapshot: {path}")
+        directory = bytes(self._view[DATA_HEADER_SIZE:DATA_HEADER_SIZE + directory_length])
+        # key -> (payload offset, payload length, item count, offsets table position)
+        self._shards: Dict[str, List[int]] = json.loads(directory)
+        self._body = DATA_HEADER_SIZE + directory_length
+
+    def is_valid(self, now: float) -> bool:
+        return now < self.valid_until
+
+    def page(self, key: ShardKey, skip: int, limit: int) -> Optional[Union[memoryview, bytes]]:
+        shard = self._shards.get(_encode_key(key))
+        if shard is None:
+            return b"[]"  # Filter value with no live grants
+        offset, length, count, starts_at = shard
+        offset += self._body
+        starts_at += self._body
+
+        if skip <= 0 and limit >= count:
+            return self._view[offset:offset + length]
+
+        first, last = max(skip, 0), min(skip + limit, count)
+        if first >= last:
+            return b"[]"
+        starts = self._view[starts_at:starts_at + (count + 1) * 4].cast("I")
+        return b"[" + self._view[offset + starts[first]:offset + starts[last] - 1] + b"]"
+
+
+class FeedSnapshotStore:
+    """Publishes and serves the shared snapshot for this host."""
+
+    def __init__(self, directory: str, max_age_seconds: float = 60.0):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self._ctl_path = os.path.join(directory, "feed.ctl")
+        self._ctl: Optional[mmap.mmap] = None
+        self._snapshot: Optional[Snapshot] = None
+        self._lock = threading.Lock()
+        self._publish_pending = threading.Event()
+        self._publisher: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        return settings.FEED_SNAPSHOT_ENABLED
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _open_ctl(self) -> Optional[mmap.mmap]:
+        if self._ctl is None:
+            try:
+                with open(self._ctl_path, "rb") as f:
+                    self._ctl = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return None
+        return self._ctl
+
+    def current(self) -> Optional[Snapshot]:
+        """The latest published snapshot, re-mapped only when the version moved."""
+        ctl = self._open_ctl()
+        if ctl is None:
+            return None
+        magic, version = struct.unpack_from(CTL_FORMAT, ctl, 0)
+        if magic != CTL_MAGIC or version == 0:
+            return None
+
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                if self._snapshot is None or self._snapshot.version != version:
+                    try:
+                        self._snapshot = Snapshot(self._data_path(version))
+                    except (FileNotFoundError, ValueError) as e:
+                        logger.warning(f"Feed snapshot v{version} unavailable: {e}")
+                        return None
+                snapshot = self._snapshot
+        return snapshot
+
+    def page(
+        self,
+        country: Optional[str],
+        category: Optional[str],
+        skip: int,
+        limit: int,
+    ) -> Optional[Union[memoryview, bytes]]:
+        """Serialized JSON page, or None if there is no valid snapshot."""
+        if not self.available:
+            return None
+        snapshot = self.current()
+        if snapshot is None or not snapshot.is_valid(time.time()):
+            self.schedule_publish()
+            return None
+        return snapshot.page((country or "", category or ""), skip, limit)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def _data_path(self, version: int) -> str:
+        return os.path.join(self.directory, f"feed.{version}.bin")
+
+    def _read_version(self) -> int:
+        try:
+            with open(self._ctl_path, "rb") as f:
+                magic, version = struct.unpack(CTL_FORMAT, f.read(struct.calcsize(CTL_FORMAT)))
+            return version if magic == CTL_MAGIC else 0
+        except (FileNotFoundError, struct.error):
+            return 0
+
+    def schedule_publish(self):
+        """Debounced background publish; repeated calls while one runs coalesce."""
+        if not self.available:
+            return
+        self._publish_pending.set()
+        with self._lock:
+            if self._publisher is None or not self._publisher.is_alive():
+                self._publisher = threading.Thread(target=self._publish_loop, name="feed-snapshot", daemon=True)
+                self._publisher.start()
+
+    def _publish_loop(self):
+        from db.session import SessionLocal
+
+        while self._publish_pending.is_set():
+            self._publish_pending.clear()
+            db = SessionLocal()
+            try:
+                self.publish(db)
+            except Exception as e:
+                logger.error(f"Feed snapshot publish failed: {e}")
+            finally:
+                db.close()
+
+    def publish(self, db) -> Optional[int]:
+        """Serialize the live feed into a new snapshot version. Returns it, or
+        None if another process is publishing right now."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._ctl_path, "a+b") as ctl:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(ctl.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+            try:
+                return self._publish_locked(db)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(ctl.fileno(), fcntl.LOCK_UN)
+
+    def _publish_locked(self, db) -> int:
+        started = time.perf_counter()
+        now = datetime.now()
+        grants = [schemas.Grant.model_validate(g) for g in public_grants_query(db, now=now).all()]
+
+        shards: Dict[ShardKey, List[bytes]] = {("", ""): []}
+        valid_until = time.time() + self.max_age_seconds
+        for grant in grants:
+            item = grant.model_dump_json().encode()
+            for key in _shard_keys(grant):
+                shards.setdefault(key, []).append(item)
+            if grant.deadline is not None:
+                # The snapshot must not outlive its first deadline
+                valid_until = min(valid_until, grant.deadline.timestamp())
+
+        # Payloads + item offset tables; directory offsets are relative to the body
+        body = bytearray()
+        directory: Dict[str, List[int]] = {}
+        for key, items in shards.items():
+            starts = array("I", [1])
+            for item in items:
+                starts.append(starts[-1] + len(item) + 1)
+            payload = b"[" + b",".join(items) + b"]"
+            directory[_encode_key(key)] = [len(body), len(payload), len(items), len(body) + len(payload)]
+            body += payload
+            body += starts.tobytes()
+        directory_bytes = json.dumps(directory, separators=(",", ":")).encode()
+
+        version = self._read_version() + 1
+        header = struct.pack(DATA_HEADER_FORMAT, DATA_MAGIC, version, time.time(), valid_until, len(directory_bytes))
+
+        tmp_path = self._data_path(version) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(directory_bytes)
+            f.write(body)
+        os.replace(tmp_path, self._data_path(version))
+
+        # Flip the version last: readers never see a half-written snapshot
+        with open(self._ctl_path, "r+b") as ctl:
+            ctl.seek(0)
+            ctl.write(struct.pack(CTL_FORMAT, CTL_MAGIC, version))
+            ctl.flush()
+
+        # Workers still mapping the old file keep it alive until they re-map
+        old_path = self._data_path(version - 1)
+        if os.path.exists(old_path):
+            os.remove(old_path)
+
+        logger.info(
+            f"Feed snapshot v{version} published: {len(grants)} grants, {len(shards)} shards, "
+            f"{len(body) // 1024}KB in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return version
+
+
+def _default_directory() -> str:
+    # One snapshot per database, so unrelated instances on a host never mix
+    database = hashlib.sha1((settings.DATABASE_URL or "").encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"relivo-feed-{database}")
+
+
+feed_snapshot = FeedSnapshotStore(
+    directory=settings.FEED_SNAPSHOT_DIR or _default_directory(),
+    max_age_seconds=settings.FEED_SNAPSHOT_MAX_AGE_SECONDS,
+)
+
+
+@subscribe
+def _republish_on_change(changes: GrantChanges):
+    feed_snapshot.schedule_publish()
+
+
+@REGISTRY.register_collector
+def _collect_snapshot():
+    snapshot = feed_snapshot._snapshot
+    yield "relivo_feed_snapshot_version", "gauge", "Feed snapshot version mapped by this process", [
+        ({}, snapshot.version if snapshot else 0)
+    ]
@@ -0,0 +1,30 @@
+"""
+Grant Category Classifier
+
+Keyword rules for grants that arrive without a category: the Grants.gov
+importer and organization submissions that leave it out. The first rule
+with a keyword in the title, description or organizer wins; no match is
+'General'.
+"""
+
+from typing import List, Optional, Tuple
+
+# Earlier rules win
+CATEGORY_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("Housing", ["housing", "shelter", "accommodation", "rent"]),
+    ("Education", ["education", "training", "school", "university", "curriculum", "teaching"]),
+    ("Healthcare", ["health", "medical", "healthcare", "doctor", "patient", "disease"]),
+    ("Employment", ["employment", "job", "business", "entrepreneur", "startup", "work", "career"]),
+    ("Legal", ["legal", "reunification", "asylum", "law", "lawyer", "rights", "advocacy"]),
+    ("Emergency", ["emergency", "urgent", "crisis", "disaster", "immediate", "relief"]),
+]
+DEFAULT_CATEGORY = "General"
+
+
+def detect_category(title: Optional[str], description: Optional[str], organizer: Optional[str]) -> str:
+    """Detect category based on keywords"""
+    text = f"{title or ''} {description or ''} {organizer or ''}".lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return DEFAULT_CATEGORY
@@ -0,0 +1,252 @@
+"""
+Near-Duplicate Detection
+
+The same opportunity arrives from Grants.gov, from organizations and from
+manual seeding under different external ids (or none). Every grant gets a
+MinHash signature of the word 3-shingles of its normalized title, organizer
+and description; the signature is cut into NUM_BANDS bands of
+ROWS_PER_BAND values and each band is stored as a key in grant_lsh_buckets.
+Checking a new grant is one indexed lookup of its band keys plus a signature
+comparison with the (few, capped) grants sharing one, instead of a
+comparison against the whole table:
+
+- imports skip near-duplicates of grants already in the database
+- submissions are saved with duplicate_of_id set and kept unverified, so a
+  moderator decides (even for trusted organizations)
+
+Two grants whose shingle sets have Jaccard similarity s share a band with
+probability 1 - (1 - s**6)**20: ~0.998 at s=0.8, ~0.27 at 0.5, ~0.01 at 0.3.
+Candidates are confirmed when the share of equal signature values (an
+estimate of s) reaches DEDUP_THRESHOLD.
+"""
+
+import hashlib
+import importlib.util
+import logging
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+
+from db import models
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.services.text import tokenize
+
+# Imported on first use: app.main must not pull NumPy in (cold start)
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
+
+logger = logging.getLogger(__name__)
+
+NUM_BANDS = 20
+ROWS_PER_BAND = 6
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+SHINGLE_SIZE = 3
+MAX_DESCRIPTION_TOKENS = 300  # Enough of a long description to tell grants apart
+MAX_CANDIDATES = 200  # Caps the work for texts sharing buckets with very many grants
+PRIME = 4_294_967_291  # Largest prime below 2**32: signature values fit in uint32
+IN_CHUNK = 5000  # Keys per IN (...) of the batch lookups, under SQLite's parameter limit
+
+DEDUP_CHECKS = REGISTRY.counter(
+    "relivo_dedup_checks_total", "Near-duplicate checks of new / edited grants", ["result"]
+)
+
+_params = None
+
+
+def available() -> bool:
+    return HAS_NUMPY and settings.DEDUP_ENABLED
+
+
+def _hash_params():
+    """The NUM_PERM universal hash functions (a*x + b) mod PRIME, same in every process."""
+    global np, _params
+    if _params is None:
+        import numpy
+        np = numpy
+        a, b = [], []
+        for i in range(NUM_PERM):
+            digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=8).digest()
+            a.append(int.from_bytes(digest[:4], "little") % (PRIME - 1) + 1)
+            b.append(int.from_bytes(digest[4:], "little") % PRIME)
+        # Column vectors: one row per hash function; a*x + b stays below 2**64
+        _params = (np.array(a, dtype=np.uint64)[:, None], np.array(b, dtype=np.uint64)[:, None])
+    return _params
+
+
+def shingles(title: Optional[str], organizer: Optional[str], description: Optional[str]) -> Set[int]:
+    tokens = tokenize(title) + tokenize(organizer) + tokenize(description)[:MAX_DESCRIPTION_TOKENS]
+    if len(tokens) < SHINGLE_SIZE:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = (" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1))
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+
+@dataclass
+class Fingerprint:
+    signature: bytes  # NUM_PERM little-endian uint32 minimums
+    buckets: List[int]  # One signed 64-bit key per band
+
+
+def _bucket_key(band: int, values: bytes) -> int:
+    digest = hashlib.blake2b(bytes([band]) + values, digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)  # Fits BIGINT
+
+
+def fingerprint(title: Optional[str], organizer: Optional[str], description: Optional[str]) -> Optional[Fingerprint]:
+    """None for grants without any text to compare."""
+    hashes = shingles(title, organizer, description)
+    if not hashes:
+        return None
+    a, b = _hash_params()
+    x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    signature = ((a * x + b) % PRIME).min(axis=1).astype("<u4").tobytes()
+    width = ROWS_PER_BAND * 4
+    buckets = [_bucket_key(band, signature[band * width:(band + 1) * width]) for band in range(NUM_BANDS)]
+    return Fingerprint(signature, buckets)
+
+
+def similarity(signature: bytes, other: bytes) -> float:
+    """Estimated Jaccard similarity: the share of equal MinHash values."""
+    return float(np.mean(np.frombuffer(signature, dtype="<u4") == np.frombuffer(other, dtype="<u4")))
+
+
+def find_duplicate(db, fp: Fingerprint, exclude_id: Optional[int] = None) -> Optional[Tuple[int, float]]:
+    """
+    (original grant id, similarity) of the closest indexed grant at or over
+    DEDUP_THRESHOLD, else None. Candidates that are themselves flagged
+    duplicates resolve to their original. `db` is a Session or Connection.
+    """
+    buckets = models.GrantLshBucket.__table__
+    prints = models.GrantFingerprint.__table__
+    grants = models.Grant.__table__
+    # Most shared bands first: those are the likeliest matches when capping
+    candidates = select(buckets.c.grant_id).where(buckets.c.bucket.in_(fp.buckets)).group_by(
+        buckets.c.grant_id
+    ).order_by(func.count().desc()).limit(MAX_CANDIDATES).subquery()
+    query = select(prints.c.grant_id, prints.c.signature, grants.c.duplicate_of_id).select_from(
+        candidates
+    ).join(prints, prints.c.grant_id == candidates.c.grant_id).join(grants, grants.c.id == prints.c.grant_id)
+    if exclude_id is not None:
+        # Including grants already flagged as duplicates of this one
+        query = query.where(
+            prints.c.grant_id != exclude_id,
+            (grants.c.duplicate_of_id == None) | (grants.c.duplicate_of_id != exclude_id),
+        )
+
+    best = None
+    for grant_id, signature, duplicate_of_id in db.execute(query):
+        score = similarity(fp.signature, signature)
+        if score < settings.DEDUP_THRESHOLD:
+            continue
+        original = duplicate_of_id or grant_id
+        # Closest wins; ties go to the older grant
+        if best is None or (score, -original) > (best[1], -best[0]):
+            best = (original, score)
+    DEDUP_CHECKS.labels("duplicate" if best else "unique").inc()
+    return best
+
+
+def find_duplicates(db, fps: List[Optional[Fingerprint]]) -> List[Optional[Tuple[int, float]]]:
+    """
+    find_duplicate for a batch of new grants: one bucket lookup and one
+    signature load for the whole batch instead of two queries per grant.
+    None fingerprints get None.
+    """
+    results: List[Optional[Tuple[int, float]]] = [None] * len(fps)
+    wanted = list({bucket for fp in fps if fp for bucket in fp.buckets})
+    buckets = models.GrantLshBucket.__table__
+    prints = models.GrantFingerprint.__table__
+    grants = models.Grant.__table__
+
+    grants_by_bucket: Dict[int, List[int]] = defaultdict(list)
+    for start in range(0, len(wanted), IN_CHUNK):
+        rows = db.execute(select(buckets.c.bucket, buckets.c.grant_id).where(
+            buckets.c.bucket.in_(wanted[start:start + IN_CHUNK])
+        ))
+        for bucket, grant_id in rows:
+            grants_by_bucket[bucket].append(grant_id)
+
+    # Most shared bands first, as in find_duplicate
+    candidates: List[List[int]] = []
+    for fp in fps:
+        shared = Counter(grant_id for bucket in set(fp.buckets) for grant_id in grants_by_bucket[bucket]) if fp else Counter()
+        candidates.append([grant_id for grant_id, _ in shared.most_common(MAX_CANDIDATES)])
+
+    loaded: Dict[int, Tuple[bytes, Optional[int]]] = {}
+    needed = list({grant_id for ids in candidates for grant_id in ids})
+    for start in range(0, len(needed), IN_CHUNK):
+        rows = db.execute(select(prints.c.grant_id, prints.c.signature, grants.c.duplicate_of_id).join(
+            grants, grants.c.id == prints.c.grant_id
+        ).where(prints.c.grant_id.in_(needed[start:start + IN_CHUNK])))
+        for grant_id, signature, duplicate_of_id in rows:
+            loaded[grant_id] = (signature, duplicate_of_id)
+
+    for i, fp in enumerate(fps):
+        if fp is None:
+            continue
+        best = None
+        for grant_id in candidates[i]:
+            if grant_id not in loaded:
+                continue
+            signature, duplicate_of_id = loaded[grant_id]
+            score = similarity(fp.signature, signature)
+            if score < settings.DEDUP_THRESHOLD:
+                continue
+            original = duplicate_of_id or grant_id
+            if best is None or (score, -original) > (best[1], -best[0]):
+                best = (original, score)
+        results[i] = best
+        DEDUP_CHECKS.labels("duplicate" if best else "unique").inc()
+    return results
+
+
+def find_batch_duplicates(fps: List[Optional[Fingerprint]]) -> List[Optional[int]]:
+    """
+    For each fingerprint, the position of an earlier one in the same batch it
+    near-duplicates (at or over DEDUP_THRESHOLD), else None. Only pairs that
+    share a band are compared.
+    """
+    results: List[Optional[int]] = [None] * len(fps)
+    earlier: Dict[int, List[int]] = defaultdict(list)  # bucket -> positions of kept fingerprints
+    for i, fp in enumerate(fps):
+        if fp is None:
+            continue
+        candidates = sorted({j for bucket in fp.buckets for j in earlier[bucket]})
+        for j in candidates:
+            if similarity(fp.signature, fps[j].signature) >= settings.DEDUP_THRESHOLD:
+                results[i] = j
+                break
+        else:
+            for bucket in fp.buckets:
+                earlier[bucket].append(i)
+    return results
+
+
+def store_fingerprint(db, grant_id: int, fp: Fingerprint):
+    db.execute(models.GrantFingerprint.__table__.insert().values(grant_id=grant_id, signature=fp.signature))
+    db.execute(models.GrantLshBucket.__table__.insert(), [
+        {"bucket": bucket, "grant_id": grant_id} for bucket in set(fp.buckets)
+    ])
+
+
+def remove_fingerprint(db, grant_id: int):
+    """Explicit for SQLite, where the ON DELETE CASCADE foreign keys aren't enforced."""
+    db.execute(models.GrantLshBucket.__table__.delete().where(models.GrantLshBucket.grant_id == grant_id))
+    db.execute(models.GrantFingerprint.__table__.delete().where(models.GrantFingerprint.grant_id == grant_id))
+
+
+def store_fingerprints(db, pairs: List[Tuple[int, Fingerprint]]):
+    """store_fingerprint for many grants, two executemany statements."""
+    if not pairs:
+        return
+    db.execute(models.GrantFingerprint.__table__.insert(), [
+        {"grant_id": grant_id, "signature": fp.signature} for grant_id, fp in pairs
+    ])
+    db.execute(models.GrantLshBucket.__table__.insert(), [
+        {"bucket": bucket, "grant_id": grant_id} for grant_id, fp in pairs for bucket in set(fp.buckets)
+    ])
@@ -0,0 +1,367 @@
+"""
+Grant Dimensions: Canonical Countries and Categories
+
+grants.refugee_country and grants.category used to be free text filtered by
+exact string equality, so "germany", "Germany " and "DE" missed each other.
+Grants now reference canonical rows of the countries / categories tables by
+small integer keys (country_id, category_id: what the public feed indexes are
+built on) and keep the canonical name in the text columns, for display and
+for the in-memory read models.
+
+Every spelling of a row is an alias, stored as alias_key() (case, accents,
+dots, dashes and repeated spaces ignored): the name itself, ISO 3166 codes
+for countries, common synonyms. Trusted writes (imports, admins, the
+migration of existing grants) add a value no alias matches as a new
+canonical row. Other submissions keep it as typed, without a key, so typos
+can't pile up canonical rows.
+
+Filter values (?country=, ?category=, saved searches, the grant stream) are
+resolved through an in-process alias map: one query loads it, it's reloaded
+after DIMENSION_CACHE_SECONDS, and rows this process creates are added from
+grant change events. Unknown filter values only match grants saved with
+exactly that text (and no key).
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from db import models
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.services.grant_events import GrantChanges, subscribe
+from app.services.text import normalize
+
+logger = logging.getLogger(__name__)
+
+# (name, ISO 3166-1 alpha-2, alpha-3, other spellings); on a fresh database ids follow this order
+COUNTRY_SEEDS: List[Tuple[str, str, str, Tuple[str, ...]]] = [
+    ("Germany", "DE", "DEU", ("Deutschland", "Federal Republic of Germany")),
+    ("France", "FR", "FRA", ()),
+    ("Sweden", "SE", "SWE", ("Sverige",)),
+    ("Netherlands", "NL", "NLD", ("The Netherlands", "Holland", "Nederland")),
+    ("Spain", "ES", "ESP", ("España",)),
+    ("Italy", "IT", "ITA", ("Italia",)),
+    ("Belgium", "BE", "BEL", ("Belgique", "België")),
+    ("Poland", "PL", "POL", ("Polska",)),
+    ("Austria", "AT", "AUT", ("Österreich",)),
+    ("Bulgaria", "BG", "BGR", ()),
+    ("Croatia", "HR", "HRV", ("Hrvatska",)),
+    ("Cyprus", "CY", "CYP", ()),
+    ("Czech Republic", "CZ", "CZE", ("Czechia", "Česko")),
+    ("Denmark", "DK", "DNK", ("Danmark",)),
+    ("Estonia", "EE", "EST", ()),
+    ("Finland", "FI", "FIN", ("Suomi",)),
+    ("Greece", "GR", "GRC", ("Hellas",)),
+    ("Hungary", "HU", "HUN", ("Magyarország",)),
+    ("Ireland", "IE", "IRL", ("Republic of Ireland", "Éire")),
+    ("Latvia", "LV", "LVA", ()),
+    ("Lithuania", "LT", "LTU", ()),
+    ("Luxembourg", "LU", "LUX", ()),
+    ("Malta", "MT", "MLT", ()),
+    ("Portugal", "PT", "PRT", ()),
+    ("Romania", "RO", "ROU", ("România",)),
+    ("Slovakia", "SK", "SVK", ("Slovak Republic",)),
+    ("Slovenia", "SI", "SVN", ()),
+    ("Iceland", "IS", "ISL", ()),
+    ("Liechtenstein", "LI", "LIE", ()),
+    ("Norway", "NO", "NOR", ("Norge",)),
+    ("Switzerland", "CH", "CHE", ("Schweiz", "Suisse", "Svizzera")),
+    ("United Kingdom", "GB", "GBR", ("UK", "Great Britain", "Britain")),
+    ("Turkey", "TR", "TUR", ("Türkiye",)),
+    ("Ukraine", "UA", "UKR", ()),
+    ("Moldova", "MD", "MDA", ("Republic of Moldova",)),
+    ("Jordan", "JO", "JOR", ()),
+    ("Lebanon", "LB", "LBN", ()),
+    ("Egypt", "EG", "EGY", ()),
+    ("Iraq", "IQ", "IRQ", ()),
+    ("Iran", "IR", "IRN", ()),
+    ("Pakistan", "PK", "PAK", ()),
+    ("Bangladesh", "BD", "BGD", ()),
+    ("Kenya", "KE", "KEN", ()),
+    ("Uganda", "UG", "UGA", ()),
+    ("Ethiopia", "ET", "ETH", ()),
+    ("Sudan", "SD", "SDN", ()),
+    ("Chad", "TD", "TCD", ()),
+    ("Colombia", "CO", "COL", ()),
+    ("Brazil", "BR", "BRA", ("Brasil",)),
+    ("Mexico", "MX", "MEX", ("México",)),
+    ("United States", "US", "USA", ("United States of America", "America")),
+    ("Canada", "CA", "CAN", ()),
+    ("Australia", "AU", "AUS", ()),
+    ("New Zealand", "NZ", "NZL", ()),
+]
+
+# (name, synonyms): every detect_category() result
+CATEGORY_SEEDS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("Housing", ("Shelter", "Accommodation")),
+    ("Education", ("Training", "Scholarship", "Scholarships", "Schooling", "Language Courses")),
+    ("Healthcare", ("Health", "Health Care", "Medical", "Mental Health")),
+    ("Employment", ("Jobs", "Work", "Livelihoods", "Business", "Entrepreneurship")),
+    ("Legal", ("Legal Aid", "Legal Support", "Law")),
+    ("Emergency", ("Emergency Relief", "Relief", "Urgent", "Crisis")),
+    ("General", ("Other", "Misc", "Miscellaneous")),
+]
+
+UNKNOWN_FILTERS = REGISTRY.counter(
+    "relivo_dimension_unknown_filters_total",
+    "Country / category filter values no alias matched (candidates for new aliases)",
+    ["dimension"],
+)
+CREATED_VALUES = REGISTRY.counter(
+    "relivo_dimension_values_created_total",
+    "Canonical countries / categories added by trusted grant writes (imports, admins)",
+    ["dimension"],
+)
+UNMAPPED_VALUES = REGISTRY.counter(
+    "relivo_dimension_unmapped_values_total",
+    "Submitted country / category values no alias matched, saved without a key (candidates for new aliases)",
+    ["dimension"],
+)
+
+_SEPARATORS = re.compile(r"[\s_\-]+")
+
+
+def alias_key(value: Optional[str]) -> str:
+    """How aliases are stored and looked up: "  the U.K. " -> "the uk"."""
+    return _SEPARATORS.sub(" ", normalize(value).replace(".", "")).strip()
+
+
+def _stored_name(value: str) -> str:
+    """How a grant's text column keeps a value no alias matches: whitespace collapsed, column length."""
+    return " ".join(value.split())[:100]
+
+
+def _display_name(value: str) -> str:
+    name = _stored_name(value)
+    return name.title() if name.islower() else name
+
+
+class Member(NamedTuple):
+    id: int
+    name: str
+
+
+class Dimension:
+    """A dimension table, its aliases and the process's alias map."""
+
+    def __init__(self, name: str, table: Table, alias_table: Table, key_column: str,
+                 seeds: Sequence[Tuple[str, Dict[str, Any], Sequence[str]]]):
+        self.name = name
+        self.table = table
+        self.alias_table = alias_table
+        self._key = alias_table.c[key_column]
+        self._seeds = seeds  # (name, other columns, other spellings)
+        self._aliases: Dict[str, Member] = {}
+        self._loaded_at: Optional[float] = None
+        self._load_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Alias map
+    # ------------------------------------------------------------------
+
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < settings.DIMENSION_CACHE_SECONDS
+        )
+
+    def load(self, db):
+        rows = db.execute(
+            select(self.alias_table.c.alias, self.table.c.id, self.table.c.name)
+            .join(self.table, self.table.c.id == self._key)
+        ).all()
+        self._aliases = {alias: Member(member_id, name) for alias, member_id, name in rows}
+        self._loaded_at = time.monotonic()
+
+    def ensure_fresh(self, db):
+        """Reload when stale. Only one thread reloads; the others keep the current map meanwhile."""
+        if self.is_fresh():
+            return
+        if not self._load_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if not self.is_fresh():
+                self.load(db)
+        finally:
+            self._load_lock.release()
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def learn(self, member_id: Optional[int], name: Optional[str]):
+        """Add a committed row's canonical name to the map (rows created since the last load)."""
+        if member_id is None or not name or self._loaded_at is None:
+            return
+        key = alias_key(name)
+        if key not in self._aliases:
+            self._aliases[key] = Member(member_id, name)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def resolve(self, db, value: Optional[str]) -> Optional[Member]:
+        """The canonical row a filter value means, None if no alias matches."""
+        key = alias_key(value)
+        if not key:
+            return None
+        self.ensure_fresh(db)
+        return self._aliases.get(key)
+
+    def canonical(self, db, value: Optional[str]) -> Optional[str]:
+        """
+        A filter value as the canonical name the read models hold (None if
+        blank). Unknown values come back as assign() stores them: they only
+        match grants saved with that text.
+        """
+        if not value or not value.strip():
+            return None
+        member = self.resolve(db, value)
+        if member is None:
+            UNKNOWN_FILTERS.labels(self.name).inc()
+            return _stored_name(value)
+        return member.name
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _lookup(self, db, key: str) -> Optional[Member]:
+        # Straight from the table: the map only ever holds committed rows
+        row = db.execute(
+            select(self.table.c.id, self.table.c.name)
+            .join(self.alias_table, self.table.c.id == self._key)
+            .where(self.alias_table.c.alias == key)
+        ).first()
+        return Member(row.id, row.name) if row else None
+
+    def find(self, db, value: Optional[str]) -> Optional[Member]:
+        """The canonical row of a written value, None if no alias matches (committed or not)."""
+        key = alias_key(value)
+        if not key:
+            return None
+        self.ensure_fresh(db)
+        return self._aliases.get(key) or self._lookup(db, key)
+
+    def get_or_create(self, db, value: Optional[str]) -> Optional[Member]:
+        """The canonical row of a written value, added (with the value as its alias) if new."""
+        key = alias_key(value)
+        if not key:
+            return None
+        member = self.find(db, value)
+        if member is not None:
+            return member
+
+        name = _display_name(value)
+        try:
+            with db.begin_nested():
+                member_id = db.execute(insert(self.table).values(name=name).returning(self.table.c.id)).scalar_one()
+                db.execute(insert(self.alias_table).values({"alias": key, self._key.name: member_id}))
+        except IntegrityError:
+            member = self._lookup(db, key)  # Another writer added it first
+            if member is None:
+                raise
+            return member
+        CREATED_VALUES.labels(self.name).inc()
+        logger.info(f"New {self.name} {name!r} (id {member_id})")
+        return Member(member_id, name)
+
+    def seed(self, db):
+        """Insert the seeded rows and aliases that are missing (idempotent)."""
+        ids = dict(db.execute(select(self.table.c.name, self.table.c.id)).all())
+        missing = [{"name": name, **columns} for name, columns, _ in self._seeds if name not in ids]
+        if missing:
+            db.execute(insert(self.table), missing)
+            ids = dict(db.execute(select(self.table.c.name, self.table.c.id)).all())
+
+        taken = set(db.execute(select(self.alias_table.c.alias)).scalars())
+        aliases: Dict[str, int] = {}
+        for name, _, spellings in self._seeds:
+            for spelling in (name, *spellings):
+                key = alias_key(spelling)
+                if key not in taken:
+                    aliases.setdefault(key, ids[name])
+        if aliases:
+            db.execute(insert(self.alias_table), [
+                {"alias": key, self._key.name: member_id} for key, member_id in aliases.items()
+            ])
+
+
+countries = Dimension(
+    "country", models.Country.__table__, models.CountryAlias.__table__, "country_id",
+    [(name, {"iso_code": alpha2}, (alpha2, alpha3, *spellings)) for name, alpha2, alpha3, spellings in COUNTRY_SEEDS],
+)
+categories = Dimension(
+    "category", models.Category.__table__, models.CategoryAlias.__table__, "category_id",
+    [(name, {}, synonyms) for name, synonyms in CATEGORY_SEEDS],
+)
+
+# (dimension, Grant name column, Grant key column)
+GRANT_FIELDS = (
+    (countries, "refugee_country", "country_id"),
+    (categories, "category", "category_id"),
+)
+
+
+def ensure_fresh(db):
+    for dimension, _, _ in GRANT_FIELDS:
+        dimension.ensure_fresh(db)
+
+
+def invalidate():
+    for dimension, _, _ in GRANT_FIELDS:
+        dimension.invalidate()
+
+
+def seed(db):
+    for dimension, _, _ in GRANT_FIELDS:
+        dimension.seed(db)
+
+
+def canonical_filters(db, country: Optional[str], category: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(country, category) filter values as canonical names, see Dimension.canonical."""
+    return countries.canonical(db, country), categories.canonical(db, category)
+
+
+def assign(db, rows: Sequence[Dict[str, Any]], create: bool = False):
+    """
+    Point grant rows (column values, as for models.Grant(**row)) at their
+    canonical country / category: the key column is set and the text column
+    replaced by the canonical name. Rows without the text column are left
+    alone; blank values clear both.
+
+    Values no alias matches become new canonical rows with create (trusted
+    writers only); otherwise they keep their text, without a key.
+    """
+    for dimension, name_field, key_field in GRANT_FIELDS:
+        members: Dict[str, Optional[Member]] = {}  # One lookup per distinct value
+        for row in rows:
+            if name_field not in row:
+                continue
+            key = alias_key(row[name_field])
+            if key not in members:
+                lookup = dimension.get_or_create if create else dimension.find
+                members[key] = lookup(db, row[name_field])
+                if members[key] is None and key:
+                    UNMAPPED_VALUES.labels(dimension.name).inc()
+            member = members[key]
+            if member is None and key:
+                row[name_field] = _stored_name(row[name_field])
+                row[key_field] = None
+                continue
+            row[name_field] = member.name if member else None
+            row[key_field] = member.id if member else None
+
+
+@subscribe
+def _learn_created(changes: GrantChanges):
+    # Rows added by this process's writes resolve in filters right away
+    for grant in changes.upserted:
+        for dimension, name_field, key_field in GRANT_FIELDS:
+            dimension.learn(getattr(grant, key_field), getattr(grant, name_field))
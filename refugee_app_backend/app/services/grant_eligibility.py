@@ -0,0 +1,334 @@
+"""
+Structured Eligibility Matching
+
+Grant.eligibility_criteria is a list of short statements ("Refugees",
+"Asylum seekers aged 18-25", "status: temporary_protection", "residence:
+Germany, Austria"). When a grant is written or imported they are compiled
+into two bitsets over a fixed vocabulary:
+
+- eligibility_mask: a range of DIMENSION_WIDTH bits per VOCABULARY
+  dimension (status, age band, household, occupation). The bits of the
+  values a grant accepts are set; a dimension it says nothing about has
+  its whole range set.
+- eligibility_countries: one bit per residence country in COUNTRIES
+  (OTHER_COUNTRY for the rest), all set when unconstrained. Countries are
+  recognized by the seeded spellings and ISO codes of
+  app/services/grant_dimensions.py, as in the country filters.
+
+NULL means unconstrained too: no recognized criteria, or rows written
+before compilation existed. Values of one dimension are alternatives;
+every dimension must hold. A user's eligibility profile becomes one
+(column, bit) requirement per attribute it sets, and a grant matches when
+it has all of them set. Evaluating the whole catalogue is then a few
+vectorized ANDs over two integer columns of the columnar feed index (or
+the same bit tests in SQL), not a criteria check per grant. Unset profile
+attributes exclude nothing.
+
+Bits are stored, so vocabulary values and countries are only ever
+appended. After changing the parsing rules, recompile existing grants:
+    python -m app.services.grant_eligibility --recompile
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+from db import models
+from app.core.metrics import REGISTRY
+from app.services.grant_dimensions import COUNTRY_SEEDS, alias_key
+from app.services.text import normalize
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_WIDTH = 8  # Bits reserved per dimension: room to append values without recompiling
+VOCABULARY: Dict[str, Tuple[str, ...]] = {
+    "status": ("refugee", "asylum_seeker", "temporary_protection", "stateless", "other"),
+    "age_band": ("under_18", "18_25", "26_64", "65_plus"),
+    "household": ("single", "couple", "family_with_children", "single_parent"),
+    "occupation": ("student", "employed", "self_employed", "unemployed"),
+}
+DIMENSIONS = list(VOCABULARY)
+AGE_BANDS = {"under_18": (0, 17), "18_25": (18, 25), "26_64": (26, 64), "65_plus": (65, 150)}
+
+# Residence bits by position; canonical names from grant_dimensions.COUNTRY_SEEDS
+COUNTRIES = (
+    "Austria", "Belgium", "Bulgaria", "Croatia", "Cyprus", "Czech Republic", "Denmark", "Estonia",
+    "Finland", "France", "Germany", "Greece", "Hungary", "Ireland", "Italy", "Latvia", "Lithuania",
+    "Luxembourg", "Malta", "Netherlands", "Poland", "Portugal", "Romania", "Slovakia", "Slovenia",
+    "Spain", "Sweden", "Iceland", "Liechtenstein", "Norway", "Switzerland", "United Kingdom",
+    "Turkey", "Ukraine", "Moldova", "Jordan", "Lebanon", "Egypt", "United States", "Canada",
+    "Australia", "New Zealand", "Iraq", "Iran", "Pakistan", "Bangladesh", "Kenya", "Uganda",
+    "Ethiopia", "Sudan", "Chad", "Colombia", "Brazil", "Mexico",
+)
+OTHER_COUNTRY = 62  # Bit for every country not in COUNTRIES (bit 63 would make the column negative)
+assert len(COUNTRIES) <= OTHER_COUNTRY, "no residence bits left for more countries"
+_SEED_BITS = {name: COUNTRIES.index(name) if name in COUNTRIES else OTHER_COUNTRY for name, _, _, _ in COUNTRY_SEEDS}
+ALL_COUNTRIES = (1 << 63) - 1
+
+# Positions in a profile requirement: (column, bit)
+MASK_COLUMN, COUNTRIES_COLUMN = 0, 1
+
+# Free-text phrases, matched as whole words (longest first)
+PHRASES: Dict[str, Tuple[str, str]] = {
+    "refugee": ("status", "refugee"),
+    "refugees": ("status", "refugee"),
+    "recognized refugees": ("status", "refugee"),
+    "recognised refugees": ("status", "refugee"),
+    "asylum seeker": ("status", "asylum_seeker"),
+    "asylum seekers": ("status", "asylum_seeker"),
+    "asylum applicants": ("status", "asylum_seeker"),
+    "temporary protection": ("status", "temporary_protection"),
+    "stateless": ("status", "stateless"),
+    "children": ("age_band", "under_18"),
+    "minors": ("age_band", "under_18"),
+    "unaccompanied minors": ("age_band", "under_18"),
+    "youth": ("age_band", "18_25"),
+    "young people": ("age_band", "18_25"),
+    "young adults": ("age_band", "18_25"),
+    "seniors": ("age_band", "65_plus"),
+    "elderly": ("age_band", "65_plus"),
+    "older people": ("age_band", "65_plus"),
+    "single adults": ("household", "single"),
+    "couples": ("household", "couple"),
+    "families": ("household", "family_with_children"),
+    "families with children": ("household", "family_with_children"),
+    "parents": ("household", "family_with_children"),
+    "single parents": ("household", "single_parent"),
+    "single mothers": ("household", "single_parent"),
+    "single fathers": ("household", "single_parent"),
+    "student": ("occupation", "student"),
+    "students": ("occupation", "student"),
+    "employed": ("occupation", "employed"),
+    "workers": ("occupation", "employed"),
+    "self employed": ("occupation", "self_employed"),
+    "self-employed": ("occupation", "self_employed"),
+    "entrepreneurs": ("occupation", "self_employed"),
+    "unemployed": ("occupation", "unemployed"),
+    "job seekers": ("occupation", "unemployed"),
+    "jobseekers": ("occupation", "unemployed"),
+}
+STRUCTURED_KEYS = {
+    "status": "status", "age": "age_band", "age_band": "age_band", "household": "household",
+    "occupation": "occupation", "residence": "country", "residence_country": "country", "country": "country",
+}
+
+_PHRASE = re.compile(r"\b(" + "|".join(re.escape(p) for p in sorted(PHRASES, key=len, reverse=True)) + r")\b")
+# Seeded spellings (as alias_key) -> residence bit. ISO codes only count as a whole value
+# ("residence: DE"): in free text, "in" or "it" are words
+_COUNTRY_NAMES = {
+    alias_key(spelling): _SEED_BITS[name] for name, _, _, spellings in COUNTRY_SEEDS for spelling in (name, *spellings)
+}
+_COUNTRY_BITS = {
+    **{alias_key(code): _SEED_BITS[name] for name, alpha2, alpha3, _ in COUNTRY_SEEDS for code in (alpha2, alpha3)},
+    **_COUNTRY_NAMES,
+}
+_COUNTRY = re.compile(r"\b(" + "|".join(re.escape(c) for c in sorted(_COUNTRY_NAMES, key=len, reverse=True)) + r")\b")
+_RESIDENCE = re.compile(r"\b(living|resident|residents|residing|based|registered|located)\s+(in|of)\b")
+_STRUCTURED = re.compile(r"^\s*([a-z_]+)\s*[:=]\s*(.+)$")
+_SEPARATOR = re.compile(r"\s*(?:,|/|;|\||\bor\b)\s*")
+_AGE_WORDS = re.compile(r"\b(age|aged|ages|years|year olds?)\b")
+_AGE_RANGE = re.compile(r"(\d+)\s*(?:-|–|to)\s*(\d+)")
+_AGE_UNDER = re.compile(r"\b(?:under|below|younger than)\s+(\d+)|<\s*(\d+)")
+_AGE_OVER = re.compile(r"\b(?:over|above|older than)\s+(\d+)|>\s*(\d+)")
+_AGE_PLUS = re.compile(r"(\d+)\s*(?:\+|and (?:over|older|above))")
+# A bare "under 18" is an age unless a unit follows ("under 6 months", "over 500 euros")
+_AGE_BOUND = re.compile(r"\b(?:under|over|below|above)\s+\d+\b(?!\s*(?:%|months?|weeks?|days?|hours?|euros?|eur|usd|dollars?|k\b|,\d))")
+# Ages of someone else than the applicant ("families with children under 5", "parents of kids aged 0-6")
+_DEPENDANT_AGE = re.compile(
+    r"\b(?:children|child|kids?|babies|baby|infants?|toddlers?|sons?|daughters?|dependants?|dependents?)"
+    r"(?:\s+(?:who are|aged|ages?|of age))?\s+(?:(?:under|below|over|above|younger than|older than|between)\s+)?"
+    r"\d+(?:\s*(?:-|–|to|and)\s*\d+)?(?:\s*\+)?(?:\s*(?:years?(?: old)?|year olds?))?"
+)
+
+UNPARSED_CRITERIA = REGISTRY.counter(
+    "relivo_eligibility_unparsed_criteria_total",
+    "Eligibility criteria entries compiled to no bit (informational only, they exclude nobody)",
+)
+
+
+def _offset(dimension: str) -> int:
+    return DIMENSIONS.index(dimension) * DIMENSION_WIDTH
+
+
+def value_bit(dimension: str, value: str) -> int:
+    return 1 << (_offset(dimension) + VOCABULARY[dimension].index(value))
+
+
+def _dimension_range(dimension: str) -> int:
+    return ((1 << DIMENSION_WIDTH) - 1) << _offset(dimension)
+
+
+ALL_ATTRIBUTES = sum(_dimension_range(dimension) for dimension in DIMENSIONS)
+
+
+def country_bit(country: str) -> int:
+    """
+    The residence bit of a country: any seeded spelling or ISO code of it
+    ("DE", "Deutschland"), OTHER_COUNTRY for those not in COUNTRIES.
+    """
+    return 1 << _COUNTRY_BITS.get(alias_key(country), OTHER_COUNTRY)
+
+
+def _age_bits(low: int, high: int) -> int:
+    return sum(value_bit("age_band", band) for band, (start, end) in AGE_BANDS.items() if start <= high and low <= end)
+
+
+def _ages(text: str) -> int:
+    """Age bands overlapping the ranges in text ("18-25", "under 18", "65+")."""
+    bits = 0
+    for low, high in _AGE_RANGE.findall(text):
+        bits |= _age_bits(int(low), int(high))
+    for match in _AGE_UNDER.findall(text):
+        bits |= _age_bits(0, int(match[0] or match[1]) - 1)
+    for match in _AGE_OVER.findall(text):
+        bits |= _age_bits(int(match[0] or match[1]) + 1, 150)
+    for age in _AGE_PLUS.findall(text):
+        bits |= _age_bits(int(age), 150)
+    return bits
+
+
+def _parse_structured(key: str, values: str, accepted: Dict[str, int]) -> int:
+    """ "status: refugee, asylum seeker" -> bits added to accepted; returns country bits."""
+    dimension = STRUCTURED_KEYS[key]
+    countries = 0
+    for value in _SEPARATOR.split(values.strip()):
+        if not value:
+            continue
+        if dimension == "country":
+            countries |= country_bit(value)
+            continue
+        key_value = re.sub(r"[\s-]+", "_", value).replace("+", "_plus")
+        if key_value in VOCABULARY[dimension]:
+            bits = value_bit(dimension, key_value)
+        elif dimension == "age_band":
+            bits = _ages(value)
+        elif PHRASES.get(value, (None,))[0] == dimension:
+            bits = value_bit(*PHRASES[value])
+        else:
+            bits = 0
+        if bits:
+            accepted[dimension] = accepted.get(dimension, 0) | bits
+    return countries
+
+
+def _parse(entry: str, accepted: Dict[str, int]) -> Tuple[bool, int]:
+    """Adds one entry's value bits to accepted; returns (recognized, country bits)."""
+    text = normalize(entry).strip()
+    before = dict(accepted)
+    structured = _STRUCTURED.match(text)
+    if structured and structured.group(1) in STRUCTURED_KEYS:
+        countries = _parse_structured(structured.group(1), structured.group(2), accepted)
+        return accepted != before or bool(countries), countries
+
+    for phrase in _PHRASE.findall(text):
+        dimension, value = PHRASES[phrase]
+        accepted[dimension] = accepted.get(dimension, 0) | value_bit(dimension, value)
+    own = _DEPENDANT_AGE.sub(" ", text)  # Only the applicant's own age narrows the age band
+    if _AGE_WORDS.search(own) or _AGE_PLUS.search(own) or _AGE_BOUND.search(own):
+        ages = _ages(own)
+        if ages:
+            accepted["age_band"] = accepted.get("age_band", 0) | ages
+    countries = 0
+    if _RESIDENCE.search(text):
+        for name in _COUNTRY.findall(alias_key(text)):
+            countries |= 1 << _COUNTRY_NAMES[name]
+    return accepted != before or bool(countries), countries
+
+
+def compile_criteria(criteria: Optional[Sequence[Any]]) -> Tuple[Optional[int], Optional[int]]:
+    """(eligibility_mask, eligibility_countries) for a criteria list; None where unconstrained."""
+    accepted: Dict[str, int] = {}
+    countries = 0
+    for entry in criteria or ():
+        recognized, entry_countries = _parse(entry, accepted) if isinstance(entry, str) else (False, 0)
+        countries |= entry_countries
+        if not recognized:
+            UNPARSED_CRITERIA.labels().inc()
+
+    mask = None
+    if accepted:
+        mask = ALL_ATTRIBUTES
+        for dimension, bits in accepted.items():
+            mask = (mask & ~_dimension_range(dimension)) | bits
+    return mask, countries or None
+
+
+def compiled_columns(criteria: Optional[Sequence[Any]]) -> Dict[str, Optional[int]]:
+    """The compiled criteria as Grant column values, for inserts and updates."""
+    mask, countries = compile_criteria(criteria)
+    return {"eligibility_mask": mask, "eligibility_countries": countries}
+
+
+def profile_requirements(profile: Any) -> List[Tuple[int, int]]:
+    """
+    (column, bit) pairs a grant must all have set to match a profile (an
+    EligibilityProfile row, or None for no profile: nothing required).
+    """
+    requirements = []
+    if profile is None:
+        return requirements
+    for dimension in DIMENSIONS:
+        value = getattr(profile, dimension, None)
+        if value in VOCABULARY[dimension]:
+            requirements.append((MASK_COLUMN, value_bit(dimension, value)))
+    if getattr(profile, "residence_country", None):
+        requirements.append((COUNTRIES_COLUMN, country_bit(profile.residence_country)))
+    return requirements
+
+
+def sql_conditions(requirements: Sequence[Tuple[int, int]]) -> list:
+    """The requirements as WHERE conditions, for when the columnar index can't answer."""
+    columns = (models.Grant.eligibility_mask, models.Grant.eligibility_countries)
+    return [or_(columns[column] == None, columns[column].op("&")(bit) != 0) for column, bit in requirements]
+
+
+def recompile(db: Session, batch_size: int = 1000) -> int:
+    """Recompile every grant's criteria in keyset batches; returns the number of rows changed."""
+    grants = models.Grant.__table__
+    statement = update(grants).where(grants.c.id == bindparam("grant_id")).values(
+        eligibility_mask=bindparam("mask"), eligibility_countries=bindparam("countries")
+    )
+    last_id, changed = 0, 0
+    while True:
+        rows = db.execute(
+            select(grants.c.id, grants.c.eligibility_criteria, grants.c.eligibility_mask,
+                   grants.c.eligibility_countries)
+            .where(grants.c.id > last_id).order_by(grants.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return changed
+        updates = []
+        for row in rows:
+            mask, countries = compile_criteria(row.eligibility_criteria)
+            if (mask, countries) != (row.eligibility_mask, row.eligibility_countries):
+                updates.append({"grant_id": row.id, "mask": mask, "countries": countries})
+        if updates:
+            db.execute(statement, updates)
+        db.commit()
+        changed += len(updates)
+        last_id = rows[-1].id
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.INFO)
+    from db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Compile grant eligibility criteria")
+    parser.add_argument("--recompile", action="store_true", help="Recompile every grant (after rule changes)")
+    args = parser.parse_args()
+    if not args.recompile:
+        parser.print_help()
+        sys.exit(1)
+    session = SessionLocal()
+    try:
+        print(f"✅ Recompiled eligibility criteria: {recompile(session)} grants changed")
+    finally:
+        session.close()
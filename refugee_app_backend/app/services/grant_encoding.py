@@ -0,0 +1,111 @@
+"""
+Compact Grant Response Encodings
+
+Plain JSON repeats every field name per grant and spells dates as ISO
+strings. Grant list endpoints also answer, by Accept header:
+
+- application/vnd.relivo.columns+json   columnar JSON
+- application/msgpack                   the same document as MessagePack
+
+The columnar document holds each field once, as an array of values per
+grant (keys once, values arrays). Datetimes are integer seconds since the
+Unix epoch; naive ones are in server local time, as everywhere else (the
+deadline filters compare them with datetime.now(), the columnar index and
+the feed snapshot convert them the same way). Categories and countries are
+indexes into per-response dictionaries:
+
+    {"count": 2,
+     "columns": {"id": [1, 2], "deadline": [1893456000, null],
+                 "category": [0, 0], "refugee_country": [0, null], ...},
+     "dictionaries": {"category": ["Housing"], "refugee_country": ["Germany"]}}
+
+A single grant (GET /grants/{id}) is the same document with count 1.
+Anything else, or no Accept header, gets the usual JSON. MessagePack is
+only offered when msgpack is installed.
+"""
+
+import importlib.util
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Response
+
+from app.schemas import grant as schemas
+
+HAS_MSGPACK = importlib.util.find_spec("msgpack") is not None
+
+JSON = "application/json"
+COLUMNS_JSON = "application/vnd.relivo.columns+json"
+MSGPACK = "application/msgpack"
+MSGPACK_ALIASES = {MSGPACK, "application/x-msgpack"}
+
+FIELDS = list(schemas.Grant.model_fields)
+DATETIME_FIELDS = {"deadline", "created_at", "updated_at"}
+DICTIONARY_FIELDS = ("category", "refugee_country")
+
+# For the OpenAPI docs of endpoints that negotiate
+ENCODED_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {"content": {COLUMNS_JSON: {}, MSGPACK: {}}, "description": "JSON, columnar JSON or MessagePack"},
+}
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """The media type to answer with: the supported one with the highest q, JSON by default."""
+    best, best_q = JSON, 0.0
+    for position, item in enumerate((accept or "").split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        media_type = media_type.lower()
+        if media_type in MSGPACK_ALIASES and HAS_MSGPACK:
+            media_type = MSGPACK
+        elif media_type not in (JSON, COLUMNS_JSON):
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:  # Ties keep the earlier type
+            best, best_q = media_type, q
+    return best
+
+
+def _epoch(value: Optional[datetime]) -> Optional[int]:
+    # Same as grant_index._epoch: naive datetimes are local time
+    return None if value is None else int(value.timestamp())
+
+
+def columns(grants: Iterable[Any]) -> Dict[str, Any]:
+    """The columnar document for grants (schemas.Grant or loaded models.Grant rows)."""
+    grants = list(grants)
+    document: Dict[str, Any] = {"count": len(grants), "columns": {}, "dictionaries": {}}
+    for field in FIELDS:
+        values: List[Any] = [getattr(grant, field) for grant in grants]
+        if field in DATETIME_FIELDS:
+            values = [_epoch(value) for value in values]
+        elif field in DICTIONARY_FIELDS:
+            codes: Dict[str, int] = {}
+            values = [None if value is None else codes.setdefault(value, len(codes)) for value in values]
+            document["dictionaries"][field] = list(codes)
+        document["columns"][field] = values
+    return document
+
+
+def encode(grants: Iterable[Any], media_type: str) -> bytes:
+    """Columnar JSON or MessagePack body (JSON goes through the response model)."""
+    document = columns(grants)
+    if media_type == MSGPACK:
+        import msgpack
+        return msgpack.packb(document, use_bin_type=True)
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def encoded_response(grants: Iterable[Any], accept: Optional[str]) -> Optional[Response]:
+    """The negotiated compact response, or None when the client should get plain JSON."""
+    media_type = negotiate(accept)
+    if media_type == JSON:
+        return None
+    return Response(content=encode(grants, media_type), media_type=media_type, headers={"Vary": "Accept"})
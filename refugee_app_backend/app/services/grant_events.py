@@ -0,0 +1,50 @@
+"""
+Grant Change Events
+
+Write paths (the grants API, the Grants.gov importer) publish what they
+changed after committing; in-process read models such as the columnar feed
+index subscribe here to keep themselves current without polling the DB.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+from db import models
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GrantChanges:
+    """Grants touched by one committed write."""
+    upserted: List[models.Grant] = field(default_factory=list)  # loaded, post-commit rows
+    removed_ids: List[int] = field(default_factory=list)
+    bulk: bool = False  # Too many / unknown rows changed: reload from the DB
+    created_ids: List[int] = field(default_factory=list)  # New rows of a bulk write, when known
+
+
+_listeners: List[Callable[[GrantChanges], None]] = []
+
+
+def subscribe(listener: Callable[[GrantChanges], None]) -> Callable[[GrantChanges], None]:
+    """Register a listener; usable as a decorator."""
+    _listeners.append(listener)
+    return listener
+
+
+def publish_grant_changes(changes: GrantChanges):
+    """
+    Notify listeners of a committed change.
+
+    Listener failures are logged and swallowed: read models fall back to the
+    database, so they must never fail the write that triggered them.
+    """
+    if not (changes.upserted or changes.removed_ids or changes.bulk):
+        return
+
+    for listener in list(_listeners):
+        try:
+            listener(changes)
+        except Exception as e:
+            logger.error(f"Grant change listener {getattr(listener, '__qualname__', listener)} failed: {e}")
@@ -0,0 +1,289 @@
+"""
+Columnar Public Grant Index
+
+Holds the live (verified & active) catalogue in memory as NumPy columns so
+/grants/public filters and sorting run as vectorized masks + argsort instead
+of a database round trip:
+
+- ids, deadlines (epoch seconds), country and category codes as arrays
+- the compiled eligibility bitsets, for GET /grants/eligible
+- countries / categories interned once in a compact string table
+- the serialized schemas.Grant payload per row, ready to return
+
+Rows are kept current incrementally from grant change events; the whole index
+is also rebuilt from the DB once it is older than GRANT_INDEX_MAX_AGE_SECONDS
+so edits made by other processes (admin backend, other workers) show up.
+Any time the index can't answer, callers fall back to the SQL query.
+"""
+
+import importlib.util
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from db import models
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.schemas import grant as schemas
+from app.services.grant_events import GrantChanges, subscribe
+from app.services.grant_queries import public_grants_query
+
+# Optional: without NumPy every request uses the DB path. Imported on the first
+# rebuild instead of here, as it's the largest import behind app.main.
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
+
+logger = logging.getLogger(__name__)
+
+NO_DEADLINE = 2**62  # Sorts after every real deadline (NULLs last, as on Postgres)
+NO_CODE = -1
+MIN_CAPACITY = 64
+UNCONSTRAINED = -1  # Every bit set: a NULL eligibility bitset
+COLUMNS = ("_ids", "_deadlines", "_countries", "_categories", "_eligibility_masks", "_eligibility_countries", "_alive")
+
+
+def _epoch(value: Optional[datetime]) -> int:
+    return NO_DEADLINE if value is None else int(value.timestamp())
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+
+def _is_public(grant: models.Grant) -> bool:
+    return bool(grant.is_verified) and bool(grant.is_active)
+
+
+class StringTable:
+    """Interns repeated strings (countries, categories) as small integer codes."""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_CODE
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+
+class PublicGrantIndex:
+    """In-memory column store of the public grant catalogue."""
+
+    def __init__(self, max_age_seconds: float = 60.0):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._row_of: Dict[int, int] = {}
+
+    def _reset(self, capacity: int):
+        _import_numpy()
+        capacity = max(capacity, MIN_CAPACITY)
+        self._size = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._deadlines = np.zeros(capacity, dtype=np.int64)
+        self._countries = np.zeros(capacity, dtype=np.int32)
+        self._categories = np.zeros(capacity, dtype=np.int32)
+        self._eligibility_masks = np.zeros(capacity, dtype=np.int64)
+        self._eligibility_countries = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._payloads: List[Optional[schemas.Grant]] = []
+        self._row_of: Dict[int, int] = {}
+        self._strings = StringTable()
+
+    # ------------------------------------------------------------------
+    # Freshness / loading
+    # ------------------------------------------------------------------
+
+    @property
+    def available(self) -> bool:
+        return HAS_NUMPY and settings.GRANT_INDEX_ENABLED
+
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.max_age_seconds
+        )
+
+    def ensure_fresh(self, db: Session) -> bool:
+        """
+        Rebuild from the DB if stale. Only one thread rebuilds; concurrent
+        callers get False and use the SQL path meanwhile.
+        """
+        if not self.available:
+            return False
+        if self.is_fresh():
+            return True
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+        try:
+            self.rebuild(db)
+            return True
+        except Exception as e:
+            logger.error(f"Public grant index rebuild failed: {e}")
+            return False
+        finally:
+            self._rebuild_lock.release()
+
+    def rebuild(self, db: Session):
+        started = time.perf_counter()
+        grants = public_grants_query(db).all()
+        with self._lock:
+            self._reset(len(grants) * 2)
+            for grant in grants:
+                self._append(grant)
+            self._loaded_at = time.monotonic()
+        logger.info(f"Public grant index rebuilt: {len(grants)} grants in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def invalidate(self):
+        """Force the next ensure_fresh() to reload from the DB."""
+        with self._lock:
+            self._loaded_at = None
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def apply_changes(self, changes: GrantChanges):
+        if not self.available or self._loaded_at is None:
+            return
+        if changes.bulk:
+            self.invalidate()
+            return
+
+        with self._lock:
+            for grant_id in changes.removed_ids:
+                self._remove(grant_id)
+            for grant in changes.upserted:
+                self._remove(grant.id)
+                if _is_public(grant):
+                    self._append(grant)
+            self._maybe_compact()
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _append(self, grant: models.Grant):
+        if self._size == len(self._ids):
+            self._grow()
+        row = self._size
+        self._ids[row] = grant.id
+        self._deadlines[row] = _epoch(grant.deadline)
+        self._countries[row] = self._strings.intern(grant.refugee_country)
+        self._categories[row] = self._strings.intern(grant.category)
+        self._eligibility_masks[row] = UNCONSTRAINED if grant.eligibility_mask is None else grant.eligibility_mask
+        self._eligibility_countries[row] = (
+            UNCONSTRAINED if grant.eligibility_countries is None else grant.eligibility_countries
+        )
+        self._alive[row] = True
+        self._payloads.append(schemas.Grant.model_validate(grant))
+        self._row_of[grant.id] = row
+        self._size += 1
+
+    def _remove(self, grant_id: int):
+        row = self._row_of.pop(grant_id, None)
+        if row is not None:
+            self._alive[row] = False
+            self._payloads[row] = None
+
+    def _maybe_compact(self):
+        """Drop tombstoned rows once they make up half the index."""
+        live = len(self._row_of)
+        if self._size < MIN_CAPACITY or live * 2 > self._size:
+            return
+        keep = np.flatnonzero(self._alive[:self._size])
+        capacity = max(live * 2, MIN_CAPACITY)
+        for name in COLUMNS:
+            column = getattr(self, name)
+            compacted = np.zeros(capacity, dtype=column.dtype)
+            compacted[:live] = column[keep]
+            setattr(self, name, compacted)
+        self._payloads = [self._payloads[row] for row in keep]
+        self._row_of = {int(grant_id): row for row, grant_id in enumerate(self._ids[:live])}
+        self._size = live
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def query(
+        self,
+        country: Optional[str] = None,
+        category: Optional[str] = None,
+        deadline_from: Optional[datetime] = None,
+        deadline_to: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100,
+        now: Optional[datetime] = None,
+        eligible: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> List[schemas.Grant]:
+        """
+        Same semantics as grant_queries.public_grants_query (NULL deadlines
+        last). eligible: (column, bit) requirements of a profile, from
+        grant_eligibility.profile_requirements.
+        """
+        now = now or datetime.now()
+
+        with self._lock:
+            n = self._size
+            deadlines = self._deadlines[:n]
+            mask = self._alive[:n] & (deadlines >= _epoch(now))
+
+            for value, column in ((country, self._countries), (category, self._categories)):
+                if value:
+                    code = self._strings.lookup(value)
+                    if code is None:
+                        return []
+                    mask &= column[:n] == code
+
+            if deadline_from is not None:
+                mask &= (deadlines >= _epoch(deadline_from)) & (deadlines != NO_DEADLINE)
+            if deadline_to is not None:
+                mask &= deadlines <= _epoch(deadline_to)
+            if eligible:
+                bitsets = (self._eligibility_masks[:n], self._eligibility_countries[:n])
+                for column, bit in eligible:
+                    mask &= (bitsets[column] & bit) != 0
+
+            rows = np.flatnonzero(mask)
+            ordered = rows[np.argsort(deadlines[rows], kind="stable")]
+            return [self._payloads[row] for row in ordered[skip:skip + limit]]
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+
+public_grant_index = PublicGrantIndex(max_age_seconds=settings.GRANT_INDEX_MAX_AGE_SECONDS)
+
+if HAS_NUMPY:
+    subscribe(public_grant_index.apply_changes)
+
+
+@REGISTRY.register_collector
+def _collect_index():
+    index = public_grant_index
+    yield "relivo_grant_index_grants", "gauge", "Live grants held by the columnar feed index", [({}, len(index))]
+    yield "relivo_grant_index_fresh", "gauge", "1 if the columnar feed index can serve requests", [
+        ({}, int(index.available and index.is_fresh()))
+    ]
@@ -0,0 +1,115 @@
+"""
+Grant Query Builders
+
+The hot read queries behind the grants API, kept in one place so the
+endpoints and the query-plan checks (benchmarks/query_plans.py) exercise
+exactly the same SQL. The indexes on models.Grant are designed around these.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, Session
+
+from db import models
+from app.schemas import grant as schemas
+from app.services.grant_dimensions import Dimension, categories, countries
+
+
+def _dimension_filter(db: Session, dimension: Dimension, key_column, name_column, value: str):
+    member = dimension.resolve(db, value)
+    if member is None:  # Only grants submitted with this text no alias matched
+        return and_(key_column == None, name_column == value)
+    return key_column == member.id
+
+
+def public_grants_query(
+    db: Session,
+    country: Optional[str] = None,
+    now: Optional[datetime] = None,
+    category: Optional[str] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+) -> Query:
+    """
+    Verified, active grants whose deadline hasn't passed, soonest first.
+
+    Served by ix_grants_public_deadline, or the country_id / category_id
+    variants when those filters are given (any alias of a country or
+    category, resolved by app/services/grant_dimensions.py; unknown values
+    only match grants saved with that text). All are partial on the verified/active predicate, so
+    the `== True` comparisons must stay literal (not bound parameters). A
+    deadline window excludes grants without a deadline.
+    """
+    now = now or datetime.now()
+
+    query = db.query(models.Grant).filter(
+        models.Grant.is_verified == True,
+        models.Grant.is_active == True,
+        or_(
+            models.Grant.deadline >= now,
+            models.Grant.deadline == None
+        )
+    )
+
+    if country:
+        query = query.filter(_dimension_filter(
+            db, countries, models.Grant.country_id, models.Grant.refugee_country, country
+        ))
+    if category:
+        query = query.filter(_dimension_filter(
+            db, categories, models.Grant.category_id, models.Grant.category, category
+        ))
+    if deadline_from:
+        query = query.filter(models.Grant.deadline >= deadline_from)
+    if deadline_to:
+        query = query.filter(models.Grant.deadline <= deadline_to)
+
+    return query.order_by(models.Grant.deadline.asc())
+
+
+def grants_by_ids_query(db: Session, ids: List[int], now: Optional[datetime] = None) -> Query:
+    """
+    The GrantSummary columns of the given grants plus an is_public flag (the
+    public_grants_query predicate), in one primary key IN lookup. Rows come
+    in no particular order; ids without a row no longer exist.
+    """
+    now = now or datetime.now()
+    is_public = and_(
+        models.Grant.is_verified == True,
+        models.Grant.is_active == True,
+        or_(models.Grant.deadline >= now, models.Grant.deadline == None),
+    ).label("is_public")
+    columns = [getattr(models.Grant, field) for field in schemas.GrantSummary.model_fields]
+    return db.query(*columns, is_public).filter(models.Grant.id.in_(ids))
+
+
+def submissions_query(db: Session, creator_id: int) -> Query:
+    """Grants submitted by a user, newest first (ix_grants_creator_created)."""
+    return db.query(models.Grant).filter(
+        models.Grant.creator_id == creator_id
+    ).order_by(models.Grant.created_at.desc())
+
+
+def trending_grants_query(
+    db: Session,
+    country: Optional[str] = None,
+    now: Optional[datetime] = None,
+    category: Optional[str] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+) -> Query:
+    """
+    Public grants, most trending first (ix_grant_stats_trending, then the
+    grant by primary key). Grants get their grant_stats row when they are
+    submitted or imported, and the trending job adds any still missing
+    (app/services/grant_stats.py).
+    """
+    query = public_grants_query(
+        db, country=country, now=now, category=category, deadline_from=deadline_from, deadline_to=deadline_to
+    )
+    # "+ 0": grant_stats can't be looked up by key, so the planner walks the
+    # trending index and stops at the limit instead of sorting every public grant
+    return query.join(models.GrantStats, models.Grant.id == models.GrantStats.grant_id + 0).order_by(None).order_by(
+        models.GrantStats.trending_score.desc(), models.GrantStats.grant_id
+    )
@@ -0,0 +1,396 @@
+"""
+Similar Grants
+
+Backs GET /grants/{id}/similar with neighbours precomputed into the
+grant_similarities table, so the endpoint is one indexed lookup:
+
+- each public grant's title (counted twice), description and eligibility
+  become a hashed TF-IDF vector: 2**18 buckets, sublinear term frequency,
+  terms found in over half the catalogue dropped, stored as one
+  L2-normalized row of a SciPy CSR matrix, so a dot product of two rows is
+  their cosine similarity
+- the batch rebuild multiplies the matrix with its transpose in row chunks
+  and keeps the top SIMILAR_GRANTS_K of each sparse result row; it runs after bulk imports
+  (grant change events) and from `python -m app.services.grant_similarity`,
+  writing the table in short transactions of COMMIT_GRANTS grants
+- submissions, edits and deletions are applied incrementally on a
+  background thread: the grant's vector is scored against the matrix kept
+  in memory, its own neighbour rows are rewritten, and it's offered to the
+  lists of its closest grants (each trimmed back to SIMILAR_GRANTS_K)
+
+Hashing means there's no vocabulary to keep in sync: new grants are
+vectorized with the IDF weights of the last build. Optional: without
+NumPy/SciPy the endpoint serves its same-category fallback only.
+"""
+
+import importlib.util
+import logging
+import queue
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db import models
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.services.grant_events import GrantChanges, subscribe
+from app.services.grant_queries import public_grants_query
+from app.services.text import STOPWORDS, tokenize
+
+# Optional, and imported on the first build: both are heavy imports
+HAS_SCIPY = importlib.util.find_spec("numpy") is not None and importlib.util.find_spec("scipy") is not None
+np = None
+sparse = None
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 2**18
+MAX_DOCUMENT_TOKENS = 300
+MAX_DF = 0.5  # Terms in more of the catalogue than this say nothing about similarity
+MIN_DOCUMENTS_FOR_MAX_DF = 20
+MIN_SCORE = 0.1  # Weaker matches aren't shown as "similar"
+CHUNK_ROWS = 128  # Rows scored per sparse product (bounds its scratch result)
+REVERSE_CANDIDATES = 5  # x K closest grants offered a new grant as their neighbour
+INSERT_BATCH = 5000
+COMMIT_GRANTS = 2000  # Grants whose lists the rebuild rewrites per transaction
+
+SIMILARITY_BUILDS = REGISTRY.counter(
+    "relivo_similar_grants_builds_total", "Similar grants batch rebuilds", ["result"]
+)
+SIMILARITY_UPDATES = REGISTRY.counter(
+    "relivo_similar_grants_updates_total", "Grants whose neighbours were updated incrementally", ["result"]
+)
+
+
+def _import_scipy():
+    global np, sparse
+    if sparse is None:
+        import numpy
+        import scipy.sparse
+        np = numpy
+        sparse = scipy.sparse
+
+
+@lru_cache(maxsize=N_FEATURES)
+def _bucket(token: str) -> int:
+    # crc32, not hash(): buckets must agree across processes and restarts
+    return zlib.crc32(token.encode()) & (N_FEATURES - 1)
+
+
+def _terms(text: Optional[str]) -> List[str]:
+    return [token for token in tokenize(text) if len(token) > 1 and token not in STOPWORDS and not token.isdigit()]
+
+
+def document_tokens(title: str, description: Optional[str], eligibility: Optional[str]) -> List[str]:
+    title_terms = _terms(title)
+    tokens = title_terms * 2  # Titles count double
+    tokens.extend(_terms(description))
+    tokens.extend(_terms(eligibility))
+    return tokens[:MAX_DOCUMENT_TOKENS]
+
+
+def _term_counts(documents: Iterable[List[str]]):
+    """CSR matrix of raw bucket counts, one row per document."""
+    indptr, indices, data = [0], [], []
+    for tokens in documents:
+        counts: Dict[int, int] = {}
+        for token in tokens:
+            bucket = _bucket(token)
+            counts[bucket] = counts.get(bucket, 0) + 1
+        indices.extend(counts)
+        data.extend(counts.values())
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, N_FEATURES),
+    )
+
+
+class SimilarityModel:
+    """TF-IDF vectors of the public catalogue, one L2-normalized CSR row per grant."""
+
+    def __init__(self, ids: Sequence[int], counts, idf):
+        self.idf = idf
+        self.ids: List[int] = list(ids)
+        self.matrix = self._weigh(counts)
+        self.row_of: Dict[int, int] = {grant_id: row for row, grant_id in enumerate(self.ids)}
+        self.dead: Set[int] = set()  # Rows of removed / replaced grants, dropped at the next build
+        self.built_at = time.monotonic()
+
+    @classmethod
+    def build(cls, rows: Sequence[Tuple[int, str, Optional[str], Optional[str]]]) -> "SimilarityModel":
+        """From (id, title, description, eligibility) rows."""
+        _import_scipy()
+        counts = _term_counts(document_tokens(*row[1:]) for row in rows)
+        n = counts.shape[0]
+        df = np.bincount(counts.indices, minlength=N_FEATURES)
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        if n >= MIN_DOCUMENTS_FOR_MAX_DF:
+            idf[df > MAX_DF * n] = 0
+        return cls([row[0] for row in rows], counts, idf)
+
+    def _weigh(self, counts):
+        weighted = counts.copy()
+        weighted.data = (1 + np.log(weighted.data)) * self.idf[weighted.indices]
+        lengths = np.diff(weighted.indptr)
+        rows = np.repeat(np.arange(weighted.shape[0]), lengths)
+        norms = np.sqrt(np.bincount(rows, weights=weighted.data ** 2, minlength=weighted.shape[0]))
+        norms[norms == 0] = 1
+        weighted.data /= np.repeat(norms, lengths).astype(np.float32)
+        weighted.eliminate_zeros()  # Terms dropped by MAX_DF
+        return weighted
+
+    def vectorize(self, title: str, description: Optional[str], eligibility: Optional[str]):
+        return self._weigh(_term_counts([document_tokens(title, description, eligibility)]))
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.built_at
+
+    @property
+    def memory_bytes(self) -> int:
+        matrix = self.matrix
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes + self.idf.nbytes
+
+    def neighbours(self, vectors, k: int, own_rows: Optional[Sequence[int]] = None) -> Iterator[List[Tuple[int, float]]]:
+        """Top-k (grant id, score) per row of `vectors`, best first; `own_rows` are excluded."""
+        ids = np.array(self.ids, dtype=np.int64)
+        dead = None
+        if self.dead:
+            dead = np.zeros(len(self.ids), dtype=bool)
+            dead[list(self.dead)] = True
+        for start in range(0, vectors.shape[0], CHUNK_ROWS):
+            # Sparse result: only grants sharing a term with the row are scored
+            scores = (vectors[start:start + CHUNK_ROWS] @ self.matrix.T).tocsr()
+            drop = scores.data < MIN_SCORE
+            if dead is not None:
+                drop |= dead[scores.indices]
+            if own_rows is not None:
+                own = np.asarray(own_rows[start:start + CHUNK_ROWS])
+                drop |= scores.indices == np.repeat(own, np.diff(scores.indptr))
+            scores.data[drop] = 0
+            scores.eliminate_zeros()
+
+            for i in range(scores.shape[0]):
+                lo, hi = scores.indptr[i], scores.indptr[i + 1]
+                rows, values = scores.indices[lo:hi], scores.data[lo:hi]
+                if hi - lo > k:
+                    top = np.argpartition(values, -k)[-k:]
+                    rows, values = rows[top], values[top]
+                order = np.argsort(-values, kind="stable")
+                yield list(zip(ids[rows[order]].tolist(), values[order].tolist()))
+
+    def add(self, grant_id: int, vector) -> int:
+        """Append (or replace) a grant's vector; returns its row."""
+        self.remove(grant_id)
+        self.matrix = sparse.vstack([self.matrix, vector], format="csr")
+        row = len(self.ids)
+        self.ids.append(grant_id)
+        self.row_of[grant_id] = row
+        return row
+
+    def remove(self, grant_id: int):
+        row = self.row_of.pop(grant_id, None)
+        if row is not None:
+            self.dead.add(row)
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+
+def _public_rows(db: Session) -> List[Tuple[int, str, Optional[str], Optional[str]]]:
+    return public_grants_query(db).with_entities(
+        models.Grant.id,
+        models.Grant.title,
+        models.Grant.description,
+        models.Grant.eligibility,
+    ).all()
+
+
+def rebuild_similarities(db: Session, k: Optional[int] = None) -> SimilarityModel:
+    """
+    Batch job: recompute every public grant's neighbours and rewrite the
+    table in grant id order, committing every COMMIT_GRANTS grants so other
+    writers never wait long behind it. Each grant's list is replaced in one
+    transaction, so readers see its old list or its new one.
+    """
+    k = k or settings.SIMILAR_GRANTS_K
+    started = time.perf_counter()
+    try:
+        model = SimilarityModel.build(_public_rows(db))
+        vectorized = time.perf_counter()
+
+        table = models.GrantSimilarity.__table__
+        order = np.argsort(np.array(model.ids, dtype=np.int64), kind="stable")
+        neighbours = model.neighbours(model.matrix[order], k, own_rows=order)
+        last_id, pairs = 0, 0  # Lists of grants <= last_id are rewritten
+        for start in range(0, len(order), COMMIT_GRANTS):
+            chunk = [model.ids[row] for row in order[start:start + COMMIT_GRANTS]]
+            batch = [
+                {"grant_id": grant_id, "similar_id": other, "score": score}
+                for grant_id, similar in zip(chunk, neighbours) for other, score in similar
+            ]
+            # Also drops the lists of grants in this id range that are no longer public
+            db.execute(table.delete().where(table.c.grant_id > last_id, table.c.grant_id <= chunk[-1]))
+            for offset in range(0, len(batch), INSERT_BATCH):
+                db.execute(table.insert(), batch[offset:offset + INSERT_BATCH])
+            db.commit()
+            last_id, pairs = chunk[-1], pairs + len(batch)
+        db.execute(table.delete().where(table.c.grant_id > last_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        SIMILARITY_BUILDS.labels("error").inc()
+        raise
+
+    SIMILARITY_BUILDS.labels("ok").inc()
+    logger.info(
+        f"Similar grants rebuilt: {len(model)} grants, {pairs} pairs in "
+        f"{(time.perf_counter() - started) * 1000:.0f}ms (vectors {(vectorized - started) * 1000:.0f}ms, "
+        f"{model.memory_bytes / 1024 / 1024:.1f}MB)"
+    )
+    return model
+
+
+@dataclass
+class _Change:
+    """What the background thread needs of a GrantChanges (ORM rows don't outlive the request)."""
+    bulk: bool = False
+    removed_ids: List[int] = field(default_factory=list)
+    upserted: List[Tuple[int, str, Optional[str], Optional[str]]] = field(default_factory=list)  # Public grants
+
+
+class SimilarityUpdater:
+    """Keeps grant_similarities current from grant change events, off the request path."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[_Change]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._model: Optional[SimilarityModel] = None
+
+    @property
+    def available(self) -> bool:
+        return HAS_SCIPY and settings.SIMILAR_GRANTS_ENABLED
+
+    def apply_changes(self, changes: GrantChanges):
+        if not self.available:
+            return
+        change = _Change(bulk=changes.bulk, removed_ids=list(changes.removed_ids))
+        for grant in changes.upserted:
+            if grant.is_verified and grant.is_active:
+                change.upserted.append((grant.id, grant.title, grant.description, grant.eligibility))
+            else:
+                change.removed_ids.append(grant.id)
+        self._queue.put(change)
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="similar-grants", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Block until every queued change has been applied."""
+        self._queue.join()
+
+    def stop(self, timeout: float = 10.0):
+        """Finish the change in progress and exit, so shutdown doesn't cut a write short."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        from db.session import SessionLocal
+        while True:
+            changes = [self._queue.get()]
+            while not self._queue.empty():  # Coalesce what piled up meanwhile
+                changes.append(self._queue.get_nowait())
+            stopping = None in changes
+            changes = [change for change in changes if change is not None]
+
+            db = SessionLocal()
+            try:
+                if any(change.bulk for change in changes):
+                    # Every queued change is already committed, so one rebuild covers them all
+                    self._model = rebuild_similarities(db)
+                else:
+                    for change in changes:
+                        self._apply(db, change)
+            except Exception as e:
+                logger.error(f"Similar grants update failed: {e}")
+                db.rollback()
+            finally:
+                db.close()
+                for _ in range(len(changes) + (1 if stopping else 0)):
+                    self._queue.task_done()
+            if stopping:
+                return
+
+    def _fresh_model(self, db: Session) -> SimilarityModel:
+        model = self._model
+        if model is None or model.age_seconds > settings.SIMILAR_GRANTS_MODEL_MAX_AGE_SECONDS:
+            model = self._model = SimilarityModel.build(_public_rows(db))
+        return model
+
+    def _apply(self, db: Session, change: _Change):
+        k = settings.SIMILAR_GRANTS_K
+        table = models.GrantSimilarity.__table__
+        model = self._fresh_model(db)
+
+        # Score everything before the first write: the writes hold SQLite's writer queue (db/sqlite.py)
+        removed = change.removed_ids + [row[0] for row in change.upserted]
+        for grant_id in removed:
+            model.remove(grant_id)
+        scored = []
+        for grant_id, title, description, eligibility in change.upserted:
+            vector = model.vectorize(title, description, eligibility)
+            row = model.add(grant_id, vector)
+            candidates = next(model.neighbours(vector, k * REVERSE_CANDIDATES, own_rows=[row]))
+            if candidates:
+                scored.append((grant_id, candidates))
+
+        for grant_id in removed:
+            db.execute(table.delete().where((table.c.grant_id == grant_id) | (table.c.similar_id == grant_id)))
+        for grant_id, candidates in scored:
+            db.execute(table.insert(), [
+                {"grant_id": grant_id, "similar_id": other, "score": score} for other, score in candidates[:k]
+            ])
+            db.execute(table.insert(), [
+                {"grant_id": other, "similar_id": grant_id, "score": score} for other, score in candidates
+            ])
+            for other, _ in candidates:
+                # Keep the other grant's k best, which may or may not include this one
+                keep = select(table.c.similar_id).where(table.c.grant_id == other).order_by(
+                    table.c.score.desc()
+                ).limit(k)
+                db.execute(table.delete().where(table.c.grant_id == other, table.c.similar_id.not_in(keep)))
+        db.commit()
+        SIMILARITY_UPDATES.labels("ok").inc(len(change.upserted) + len(change.removed_ids))
+
+
+similarity_updater = SimilarityUpdater()
+
+subscribe(similarity_updater.apply_changes)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.INFO)
+    from db.session import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rebuild_similarities(session)
+    finally:
+        session.close()
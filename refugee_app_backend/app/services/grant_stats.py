@@ -0,0 +1,294 @@
+"""
+Grant View / Click Counters and Trending Score
+
+An UPDATE per grant view would double the write load of the feed. Instead,
+the view and apply-click endpoints only bump in-memory counters, sharded per
+thread so concurrent requests rarely wait on the same lock. A background
+thread swaps the shards out every GRANT_STATS_FLUSH_SECONDS and adds the
+totals to grant_stats with batched upserts, so a crash loses at most one
+flush interval of counts. Each batch is its own transaction, so a flush
+never holds SQLite's writer queue (db/sqlite.py) for long.
+
+The same thread runs the trending job every GRANT_TRENDING_INTERVAL_SECONDS:
+a single UPDATE decays each score by the time since the previous run
+(half-life GRANT_TRENDING_HALF_LIFE_HOURS) and adds the views and weighted
+clicks counted since. Runs are claimed in job_runs (db/job_runs.py), so
+with several workers the decay still happens once per interval. The feed's
+?sort=trending walks ix_grant_stats_trending, so only grants with a row are
+listed: submissions and imports add theirs (add_grants), and the trending
+job adds any still missing.
+
+Usage (from refugee_app_backend/), e.g. from cron when workers are idle:
+    python -m app.services.grant_stats --trending
+"""
+
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Sequence
+
+from sqlalchemy import case, delete, exists, select, text, update
+from sqlalchemy.orm import Session
+
+from db import models
+from db.job_runs import claim_job
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+VIEW, CLICK = 0, 1
+NUM_SHARDS = 16
+WRITE_BATCH_SIZE = 1000  # Grants per upsert
+MIN_SCORE = 0.01  # Decayed below this: zero, so cold grants stop being rewritten
+TRENDING_JOB = "grant_trending"
+ANALYZE_MIN_NEW_ROWS = 1000  # E.g. the first run, which adds a row for every existing grant
+
+GRANT_STATS_EVENTS = REGISTRY.counter(
+    "relivo_grant_stats_events_total", "Grant views / apply clicks written to grant_stats", ["kind"]
+)
+GRANT_STATS_FLUSHES = REGISTRY.counter("relivo_grant_stats_flushes_total", "Grant stats flushes", ["result"])
+TRENDING_RUNS = REGISTRY.counter("relivo_trending_runs_total", "Trending score runs by this process", ["result"])
+
+
+def _insert(db: Session):
+    """Dialect insert, for ON CONFLICT clauses (SQLite and Postgres spell them the same)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(models.GrantStats.__table__)
+
+
+def add_grants(db: Session, grant_ids: Sequence[int]):
+    """Give new grants their (zero) grant_stats row, in the caller's transaction."""
+    if grant_ids:
+        db.execute(_insert(db).on_conflict_do_nothing(), [{"grant_id": grant_id} for grant_id in grant_ids])
+
+
+def write_counts(db: Session, counts: Dict[int, List[int]]):
+    """
+    Add {grant_id: [views, clicks]} to grant_stats, committing every
+    WRITE_BATCH_SIZE grants. Written grants are removed from `counts`, so on
+    an error it holds exactly what is still to be written.
+    """
+    table = models.GrantStats.__table__
+    ids = list(counts)
+    for start in range(0, len(ids), WRITE_BATCH_SIZE):
+        batch = ids[start:start + WRITE_BATCH_SIZE]
+        # The endpoints don't look grants up: drop unknown / deleted ids here
+        known = set(db.execute(select(models.Grant.id).where(models.Grant.id.in_(batch))).scalars())
+        rows = [
+            {"grant_id": grant_id, "views": counts[grant_id][VIEW], "clicks": counts[grant_id][CLICK]}
+            for grant_id in batch if grant_id in known
+        ]
+        if rows:
+            statement = _insert(db)
+            db.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.grant_id],
+                set_={"views": table.c.views + statement.excluded.views,
+                      "clicks": table.c.clicks + statement.excluded.clicks},
+            ), rows)
+        db.commit()
+        for grant_id in batch:
+            del counts[grant_id]
+
+
+def update_trending(db: Session, elapsed_seconds: float):
+    """Decay every score by `elapsed_seconds` and add what was counted since the last run; commits."""
+    stats = models.GrantStats
+    decay = 0.5 ** (elapsed_seconds / (settings.GRANT_TRENDING_HALF_LIFE_HOURS * 3600))
+    score = (
+        stats.trending_score * decay
+        + (stats.views - stats.trended_views)
+        + settings.GRANT_TRENDING_CLICK_WEIGHT * (stats.clicks - stats.trended_clicks)
+    )
+    # One statement: counts flushed meanwhile land wholly before or after it
+    db.execute(update(stats).where(
+        (stats.trending_score > 0) | (stats.views > stats.trended_views) | (stats.clicks > stats.trended_clicks)
+    ).values(
+        trending_score=case((score < MIN_SCORE, 0.0), else_=score),
+        trended_views=stats.views,
+        trended_clicks=stats.clicks,
+    ).execution_options(synchronize_session=False))
+    # Grants written without add_grants() (seed scripts, older code) still belong in the trending feed
+    added = db.execute(_insert(db).from_select(
+        ["grant_id"], select(models.Grant.id).where(~exists().where(stats.grant_id == models.Grant.id))
+    ).on_conflict_do_nothing()).rowcount
+    if added >= ANALYZE_MIN_NEW_ROWS:
+        # Without table statistics SQLite pre-scans every grant (Bloom filter) for the trending feed
+        db.execute(text("ANALYZE grant_stats"))
+    # Explicit for SQLite, where the ON DELETE CASCADE foreign key isn't enforced
+    db.execute(delete(stats).where(~exists().where(models.Grant.id == stats.grant_id)).execution_options(
+        synchronize_session=False
+    ))
+    db.commit()
+
+
+class _Shard:
+    __slots__ = ("lock", "counts")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Dict[int, List[int]] = {}
+
+
+class GrantStatsRecorder:
+    """In-memory view / click counters with a write-behind flush thread."""
+
+    def __init__(self, shards: int = NUM_SHARDS):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+        self._thread = None
+        self._stop = threading.Event()
+        self._next_trending = 0.0
+        self.dropped = 0
+
+    @property
+    def available(self) -> bool:
+        return settings.GRANT_STATS_ENABLED
+
+    def record(self, grant_id: int, kind: int):
+        """Count a view / click; never touches the database."""
+        if not self.available:
+            return
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # Round robin: thread idents are aligned addresses, useless modulo a small count
+            shard = self._local.shard = self._shards[next(self._next_shard) % len(self._shards)]
+        with shard.lock:
+            counts = shard.counts.get(grant_id)
+            if counts is None:
+                # Bounded memory even if clients post made-up ids (other shards' sizes read unlocked)
+                if sum(len(other.counts) for other in self._shards) >= settings.GRANT_STATS_MAX_PENDING:
+                    self.dropped += 1
+                    return
+                counts = shard.counts[grant_id] = [0, 0]
+            counts[kind] += 1
+
+    def drain(self) -> Dict[int, List[int]]:
+        """Take every pending count, merged across shards."""
+        merged: Dict[int, List[int]] = {}
+        for shard in self._shards:
+            with shard.lock:
+                counts, shard.counts = shard.counts, {}
+            for grant_id, (views, clicks) in counts.items():
+                total = merged.get(grant_id)
+                if total is None:
+                    merged[grant_id] = [views, clicks]
+                else:
+                    total[VIEW] += views
+                    total[CLICK] += clicks
+        return merged
+
+    def _restore(self, counts: Dict[int, List[int]]):
+        shard = self._shards[0]
+        with shard.lock:
+            for grant_id, (views, clicks) in counts.items():
+                pending = shard.counts.setdefault(grant_id, [0, 0])
+                pending[VIEW] += views
+                pending[CLICK] += clicks
+
+    def flush(self, db: Session) -> int:
+        """Write pending counts; on failure they are kept for the next flush. Returns grants counted."""
+        counts = self.drain()
+        if not counts:
+            return 0
+        grants = len(counts)
+        views = sum(c[VIEW] for c in counts.values())
+        clicks = sum(c[CLICK] for c in counts.values())
+        try:
+            write_counts(db, counts)
+        except Exception:
+            db.rollback()
+            self._restore(counts)  # Only the batches not committed yet
+            GRANT_STATS_FLUSHES.labels("error").inc()
+            raise
+        else:
+            GRANT_STATS_FLUSHES.labels("ok").inc()
+        finally:
+            GRANT_STATS_EVENTS.labels("view").inc(views - sum(c[VIEW] for c in counts.values()))
+            GRANT_STATS_EVENTS.labels("click").inc(clicks - sum(c[CLICK] for c in counts.values()))
+        return grants
+
+    def run_trending(self, db: Session) -> bool:
+        """Run the trending job if it's due and no other process has claimed it."""
+        elapsed = claim_job(db, TRENDING_JOB, settings.GRANT_TRENDING_INTERVAL_SECONDS)
+        if elapsed is None:
+            return False
+        started = time.perf_counter()
+        try:
+            update_trending(db, elapsed)
+        except Exception:
+            db.rollback()
+            TRENDING_RUNS.labels("error").inc()
+            raise
+        TRENDING_RUNS.labels("ok").inc()
+        logger.info(f"Trending scores updated ({elapsed:.0f}s of decay) in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def start(self):
+        if self.available and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="grant-stats", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what's pending and exit."""
+        if self._thread is not None and self._thread.is_alive():
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(settings.GRANT_STATS_FLUSH_SECONDS):
+            self._tick(trending=True)
+        self._tick(trending=False)
+
+    def _tick(self, trending: bool):
+        from db.session import SessionLocal
+        db = SessionLocal()
+        try:
+            self.flush(db)
+            if trending and time.monotonic() >= self._next_trending:
+                self._next_trending = time.monotonic() + settings.GRANT_TRENDING_INTERVAL_SECONDS
+                self.run_trending(db)
+        except Exception as e:
+            logger.error(f"Grant stats flush failed: {e}")
+        finally:
+            db.close()
+
+
+grant_stats_recorder = GrantStatsRecorder()
+
+
+@REGISTRY.register_collector
+def _collect_grant_stats():
+    recorder = grant_stats_recorder
+    pending = sum(len(shard.counts) for shard in recorder._shards)
+    yield "relivo_grant_stats_pending_grants", "gauge", "Grants with counts not flushed yet", [({}, pending)]
+    yield "relivo_grant_stats_dropped_total", "counter", "Counts dropped over GRANT_STATS_MAX_PENDING", [
+        ({}, recorder.dropped)
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.INFO)
+    from db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Grant stats maintenance")
+    parser.add_argument("--trending", action="store_true", help="Run the trending job if it is due")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.trending and not grant_stats_recorder.run_trending(session):
+            print("Trending job not due (or claimed by another process)")
+    finally:
+        session.close()
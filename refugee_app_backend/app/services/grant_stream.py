@@ -0,0 +1,346 @@
+"""
+Live Grant Stream (Server-Sent Events)
+
+Pushes public grant changes to GET /grants/stream subscribers instead of
+having clients poll the feed. One broadcaster per process:
+
+- grant change events (app/services/grant_events.py) are encoded once, in
+  the writing thread, and handed to the event loop
+- the loop appends each event to a short in-memory log and offers the same
+  bytes to every subscriber whose (country, category) filter matches: a
+  few dict lookups per event, not a scan over every connection
+- every subscriber has a bounded queue; one that falls GRANT_STREAM_QUEUE_SIZE
+  frames behind is disconnected (it reconnects and resumes) rather than
+  buffered without limit
+- a single task sends heartbeat comments (which also detect dead
+  connections) and polls for grants published by other processes: new ids
+  above a watermark, one primary key range query per tick
+- streams end after about GRANT_STREAM_MAX_SECONDS and EventSource
+  reconnects, resuming by Last-Event-ID: a graceful shutdown waits for open
+  responses, and reconnects rebalance clients across workers
+
+Events:
+    event: grant   data: GrantSummary   published or updated, and public
+    event: retire  data: {"id": ...}    deleted, unpublished or expired
+    event: reset   data: {}             can't resume: refetch the feed
+
+Retirements go to every subscriber (the grant's old country / category isn't
+known). Event ids are "<process>-<seq>"; a Last-Event-ID from this process
+still in the log is resumed exactly, anything else gets a reset. Edits and
+removals made through other processes are not streamed (nor, on SQLite, a
+grant that reuses the id of a deleted newest grant).
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import random
+import secrets
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from db import models
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.schemas import grant as schemas
+from app.services.grant_events import GrantChanges, subscribe
+
+logger = logging.getLogger(__name__)
+
+PROCESS_ID = secrets.token_hex(4)  # Event ids from another process (or run) can't be resumed here
+POLL_BATCH_SIZE = 500
+LOAD_BATCH_SIZE = 500  # Ids per IN (...) when loading imported grants
+HEARTBEAT = b": ping\n\n"
+
+FilterKey = Tuple[Optional[str], Optional[str]]  # (country, category); None matches any
+
+GRANT_STREAM_EVENTS = REGISTRY.counter("relivo_grant_stream_events_total", "Grant stream events", ["event"])
+GRANT_STREAM_DROPPED = REGISTRY.counter(
+    "relivo_grant_stream_dropped_total", "Grant stream subscribers disconnected for falling behind"
+)
+
+
+def _is_public(grant: models.Grant, now: datetime) -> bool:
+    return (
+        bool(grant.is_verified) and bool(grant.is_active)
+        and (grant.deadline is None or grant.deadline.replace(tzinfo=None) >= now)
+    )
+
+
+class _Event:
+    __slots__ = ("seq", "name", "data", "keys", "frame")
+
+    def __init__(self, name: str, data: bytes, keys: Optional[List[FilterKey]]):
+        self.seq = 0
+        self.name = name
+        self.data = data
+        self.keys = keys  # None: every subscriber
+        self.frame = b""
+
+
+class Subscriber:
+    __slots__ = ("key", "queue", "expires_at", "closed")
+
+    def __init__(self, key: FilterKey, queue_size: int, expires_at: float):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.expires_at = expires_at
+        self.closed = False
+
+    async def frames(self):
+        """Frames to send, until the subscriber is closed."""
+        while True:
+            frame = await self.queue.get()
+            if self.closed:
+                return
+            yield frame
+
+
+class GrantStreamBroadcaster:
+    def __init__(self):
+        self._groups: Dict[FilterKey, Set[Subscriber]] = {}
+        self._count = 0
+        self._log: Deque[_Event] = deque()
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        # Polling for other processes' grants; touched by writer and poll threads
+        self._lock = threading.Lock()
+        self._watermark: Optional[int] = None
+        self._streamed_here: Set[int] = set()  # New ids above the watermark already streamed by this process
+
+    @property
+    def available(self) -> bool:
+        return settings.GRANT_STREAM_ENABLED
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------------------------------------------------------
+    # Subscribers (event loop only)
+    # ------------------------------------------------------------------
+
+    def subscribe(self, country: Optional[str], category: Optional[str],
+                  last_event_id: Optional[str] = None) -> Optional[Subscriber]:
+        """Register a subscriber, with any events it missed queued; None when full."""
+        if self._count >= settings.GRANT_STREAM_MAX_SUBSCRIBERS:
+            return None
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._groups.clear()
+            self._count = 0
+            self._task = None
+        if self._task is None or self._task.done():
+            # Not in this request's context: its queries aren't the request's
+            self._task = contextvars.Context().run(loop.create_task, self._run())
+
+        # Jittered, so clients connected together don't all reconnect together
+        lifetime = settings.GRANT_STREAM_MAX_SECONDS * random.uniform(0.75, 1.0)
+        subscriber = Subscriber((country or None, category or None), settings.GRANT_STREAM_QUEUE_SIZE,
+                                loop.time() + lifetime)
+        if last_event_id:
+            for frame in self._missed(subscriber.key, last_event_id):
+                if subscriber.queue.full():
+                    break  # The client reconnects from where this left off
+                subscriber.queue.put_nowait(frame)
+        self._groups.setdefault(subscriber.key, set()).add(subscriber)
+        self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        group = self._groups.get(subscriber.key)
+        if group is not None and subscriber in group:
+            group.discard(subscriber)
+            if not group:
+                del self._groups[subscriber.key]
+            self._count -= 1
+
+    def _missed(self, key: FilterKey, last_event_id: str) -> List[bytes]:
+        process, _, seq = last_event_id.partition("-")
+        try:
+            after = int(seq)
+        except ValueError:
+            after = -1
+        first = self._log[0].seq if self._log else self._seq + 1
+        if process != PROCESS_ID or after < first - 1 or after > self._seq:
+            return [self._frame(_Event("reset", b"{}", None))]
+        return [event.frame for event in self._log if event.seq > after and self._matches(event, key)]
+
+    @staticmethod
+    def _matches(event: _Event, key: FilterKey) -> bool:
+        return event.keys is None or key in event.keys
+
+    # ------------------------------------------------------------------
+    # Fan-out (event loop only)
+    # ------------------------------------------------------------------
+
+    def _frame(self, event: _Event) -> bytes:
+        return b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (
+            PROCESS_ID.encode(), event.seq or self._seq, event.name.encode(), event.data
+        )
+
+    def _broadcast(self, events: List[_Event]):
+        for event in events:
+            self._seq += 1
+            event.seq = self._seq
+            event.frame = self._frame(event)
+            self._log.append(event)
+            if len(self._log) > settings.GRANT_STREAM_LOG_SIZE:
+                self._log.popleft()
+            GRANT_STREAM_EVENTS.labels(event.name).inc()
+            if event.keys is None:
+                groups = list(self._groups.values())
+            else:
+                groups = [self._groups[key] for key in event.keys if key in self._groups]
+            for group in groups:
+                for subscriber in list(group):
+                    self._offer(subscriber, event.frame)
+
+    def _offer(self, subscriber: Subscriber, frame: bytes):
+        try:
+            subscriber.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Its reader stops at the next frame instead of sending what's queued
+            subscriber.closed = True
+            self.unsubscribe(subscriber)
+            GRANT_STREAM_DROPPED.labels().inc()
+
+    def _heartbeat(self, now: float):
+        for group in list(self._groups.values()):
+            for subscriber in list(group):
+                if now < subscriber.expires_at:
+                    self._offer(subscriber, HEARTBEAT)
+                    continue
+                subscriber.closed = True
+                self.unsubscribe(subscriber)
+                if not subscriber.queue.full():  # Wake its reader; a full queue's reader isn't waiting
+                    subscriber.queue.put_nowait(b"")
+
+    async def _run(self):
+        """Heartbeats and polling while anyone is subscribed."""
+        loop = asyncio.get_running_loop()
+        poll_seconds = settings.GRANT_STREAM_POLL_SECONDS
+        heartbeat_seconds = settings.GRANT_STREAM_HEARTBEAT_SECONDS
+        next_heartbeat = loop.time() + heartbeat_seconds
+        while self._count and self._loop is loop:
+            if poll_seconds:  # The first poll sets the watermark, right as the first subscriber connects
+                try:
+                    events = await run_in_threadpool(self._poll)
+                    if events:
+                        self._broadcast(events)
+                except Exception as e:
+                    logger.error(f"Grant stream poll failed: {e}")
+            if loop.time() >= next_heartbeat:
+                next_heartbeat = loop.time() + heartbeat_seconds
+                self._heartbeat(loop.time())
+            await asyncio.sleep(min(poll_seconds, heartbeat_seconds) if poll_seconds else heartbeat_seconds)
+        with self._lock:
+            self._watermark = None  # Resubscribing starts from the then-newest grant
+            self._streamed_here.clear()
+
+    # ------------------------------------------------------------------
+    # Producers (any thread)
+    # ------------------------------------------------------------------
+
+    def _send(self, events: List[_Event]):
+        loop = self._loop
+        if not events or loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._broadcast, events)
+        except RuntimeError:  # Loop closed meanwhile
+            pass
+
+    @staticmethod
+    def _grant_event(grant: models.Grant) -> _Event:
+        summary = schemas.GrantSummary.model_validate(grant)
+        country, category = grant.refugee_country or None, grant.category or None
+        keys = list({(None, None), (country, None), (None, category), (country, category)})
+        return _Event("grant", summary.model_dump_json().encode(), keys)
+
+    @staticmethod
+    def _retire_event(grant_id: int) -> _Event:
+        return _Event("retire", json.dumps({"id": grant_id}).encode(), None)
+
+    def _events_for(self, grants: List[models.Grant]) -> List[_Event]:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return [
+            self._grant_event(grant) if _is_public(grant, now) else self._retire_event(grant.id)
+            for grant in grants
+        ]
+
+    def apply_changes(self, changes: GrantChanges):
+        """grant_events listener: runs in the writing thread."""
+        if not self.available or self._loop is None or not self._count:
+            return
+        events = self._events_for(changes.upserted)
+        events += [self._retire_event(grant_id) for grant_id in changes.removed_ids]
+        if changes.created_ids:
+            events += self._events_for(self._load(changes.created_ids))
+        elif changes.bulk:
+            events.append(_Event("reset", b"{}", None))
+        with self._lock:
+            if self._watermark is not None:
+                self._streamed_here.update(
+                    grant.id for grant in changes.upserted if grant.id > self._watermark
+                )
+                self._streamed_here.update(i for i in changes.created_ids if i > self._watermark)
+        self._send(events)
+
+    @staticmethod
+    def _load(ids: List[int]) -> List[models.Grant]:
+        from db.session import SessionLocal
+        db = SessionLocal()
+        try:
+            grants = []
+            for start in range(0, len(ids), LOAD_BATCH_SIZE):
+                grants += db.query(models.Grant).filter(
+                    models.Grant.id.in_(ids[start:start + LOAD_BATCH_SIZE])
+                ).all()
+            return grants
+        finally:
+            db.close()
+
+    def _poll(self) -> List[_Event]:
+        """Public grants created by other processes since the last poll (runs in a worker thread)."""
+        from db.session import SessionLocal
+        db = SessionLocal()
+        try:
+            with self._lock:
+                watermark = self._watermark
+            if watermark is None:
+                newest = db.query(models.Grant.id).order_by(models.Grant.id.desc()).limit(1).scalar() or 0
+                with self._lock:
+                    self._watermark = newest
+                return []
+
+            grants = db.query(models.Grant).filter(
+                models.Grant.id > watermark
+            ).order_by(models.Grant.id).limit(POLL_BATCH_SIZE).all()
+            if not grants:
+                return []
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            with self._lock:
+                self._watermark = grants[-1].id
+                fresh = [grant for grant in grants if grant.id not in self._streamed_here]
+                self._streamed_here = {i for i in self._streamed_here if i > self._watermark}
+            # Non-public new grants were never announced: nothing to retire
+            return [self._grant_event(grant) for grant in fresh if _is_public(grant, now)]
+        finally:
+            db.close()
+
+
+grant_stream = GrantStreamBroadcaster()
+
+subscribe(grant_stream.apply_changes)
+
+
+@REGISTRY.register_collector
+def _collect_grant_stream():
+    yield "relivo_grant_stream_subscribers", "gauge", "Open grant stream connections", [({}, len(grant_stream))]
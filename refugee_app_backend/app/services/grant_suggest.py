@@ -0,0 +1,371 @@
+"""
+Typeahead Suggestion Index
+
+Backs GET /grants/suggest. Titles, organizers and categories of the public
+catalogue are split into normalized tokens (case-folded, accents stripped)
+held in a sorted vocabulary, so a prefix is two bisects away from every token
+it completes, wherever the word sits in the title:
+
+- grants: each token has a posting list of (deadline, grant id) kept sorted,
+  so the soonest-due matches come out of a lazy k-way merge and a lookup
+  stops after `limit` hits instead of ranking every match; multi-word
+  prefixes whose words are all selective intersect their grant sets instead
+- organizers / categories: one facet per distinct value, ranked by how many
+  public grants carry it
+
+Memory stays proportional to the public catalogue: at most
+MAX_TOKENS_PER_GRANT tokens (each capped at text.MAX_TOKEN_LENGTH characters)
+per grant, and stopwords are skipped. Like the columnar feed index, it's kept
+current from grant change events and rebuilt from the DB once older than
+GRANT_INDEX_MAX_AGE_SECONDS; callers fall back to SQL while it isn't ready.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from db import models
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.schemas import grant as schemas
+from app.services.grant_events import GrantChanges, subscribe
+from app.services.grant_queries import public_grants_query
+from app.services.text import STOPWORDS, tokenize
+
+logger = logging.getLogger(__name__)
+
+MAX_TOKENS_PER_GRANT = 24
+MAX_EXPANSIONS = 200  # Vocabulary tokens merged per lookup (short prefixes complete to many)
+MAX_VISITS = 500  # Postings examined per lookup: caps broad multi-word prefixes that rarely co-occur
+MAX_SET_SIZE = 5000  # Multi-word prefixes intersect grant sets when every word matches fewer
+NO_DEADLINE = 2**62  # Sorts after every real deadline, as in the feed
+
+FACET_KINDS = ("organizer", "category")
+
+
+def _index_tokens(*fields: Optional[str]) -> str:
+    """
+    Distinct searchable tokens of a grant, title words first, capped; as one
+    " token token ..." string so _matches is a substring search in C.
+    """
+    tokens: Dict[str, None] = {}
+    for field in fields:
+        for token in tokenize(field):
+            if len(token) > 1 and token not in STOPWORDS:
+                tokens[token] = None
+    return "".join(f" {token}" for token in islice(tokens, MAX_TOKENS_PER_GRANT))
+
+
+def _epoch(value: Optional[datetime]) -> int:
+    return NO_DEADLINE if value is None else int(value.timestamp())
+
+
+def _matches(tokens: str, prefixes: List[str]) -> bool:
+    """Every prefix starts one of the tokens (as joined by _index_tokens)."""
+    return all(f" {prefix}" in tokens for prefix in prefixes)
+
+
+class _Vocabulary:
+    """Sorted token list plus a reference count per token."""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self._counts: Dict[str, int] = {}
+
+    def add(self, token: str, keep_sorted: bool = True):
+        count = self._counts.get(token, 0)
+        if count == 0:
+            if keep_sorted:
+                insort(self.tokens, token)
+            else:
+                self.tokens.append(token)  # Caller sorts once when done
+        self._counts[token] = count + 1
+
+    def discard(self, token: str):
+        count = self._counts.get(token, 0) - 1
+        if count > 0:
+            self._counts[token] = count
+        elif count == 0:
+            del self._counts[token]
+            del self.tokens[bisect_left(self.tokens, token)]
+
+    def completions(self, prefix: str, limit: int) -> List[str]:
+        start = bisect_left(self.tokens, prefix)
+        found = []
+        for token in self.tokens[start:start + limit]:
+            if not token.startswith(prefix):
+                break
+            found.append(token)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+
+class GrantSuggestIndex:
+    """In-memory prefix index over the public grant catalogue."""
+
+    def __init__(self, max_age_seconds: float = 60.0):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self):
+        # Grants
+        self._vocabulary = _Vocabulary()
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}  # token -> sorted (deadline, id)
+        self._grants: Dict[int, Tuple[str, int, str, Tuple[str, ...]]] = {}  # id -> title, deadline, tokens, facet keys
+        # Facets, keyed "kind:normalized value"
+        self._facet_vocabulary = _Vocabulary()
+        self._facet_postings: Dict[str, Set[str]] = {}  # token -> facet keys
+        self._facets: Dict[str, Tuple[str, str, str]] = {}  # key -> kind, display text, tokens
+        self._facet_counts: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Freshness / loading
+    # ------------------------------------------------------------------
+
+    @property
+    def available(self) -> bool:
+        return settings.SUGGEST_INDEX_ENABLED
+
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.max_age_seconds
+        )
+
+    def ensure_fresh(self, db: Session) -> bool:
+        """Rebuild if stale; concurrent callers get False and use SQL meanwhile."""
+        if not self.available:
+            return False
+        if self.is_fresh():
+            return True
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+        try:
+            self.rebuild(db)
+            return True
+        except Exception as e:
+            logger.error(f"Grant suggest index rebuild failed: {e}")
+            return False
+        finally:
+            self._rebuild_lock.release()
+
+    def rebuild(self, db: Session):
+        started = time.perf_counter()
+        rows = public_grants_query(db).with_entities(
+            models.Grant.id,
+            models.Grant.title,
+            models.Grant.organizer,
+            models.Grant.category,
+            models.Grant.deadline,
+        ).all()
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(*row, keep_sorted=False)
+            self._vocabulary.tokens.sort()
+            self._facet_vocabulary.tokens.sort()
+            for posting in self._postings.values():
+                posting.sort()
+            self._loaded_at = time.monotonic()
+        logger.info(
+            f"Grant suggest index rebuilt: {len(rows)} grants, {len(self._vocabulary)} tokens "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def apply_changes(self, changes: GrantChanges):
+        if not self.available or self._loaded_at is None:
+            return
+        if changes.bulk:
+            self.invalidate()
+            return
+
+        with self._lock:
+            for grant_id in changes.removed_ids:
+                self._remove(grant_id)
+            for grant in changes.upserted:
+                self._remove(grant.id)
+                if grant.is_verified and grant.is_active:
+                    self._add(grant.id, grant.title, grant.organizer, grant.category, grant.deadline)
+
+    def _add(self, grant_id: int, title: str, organizer: Optional[str], category: Optional[str],
+             deadline: Optional[datetime], keep_sorted: bool = True):
+        entry = (_epoch(deadline), grant_id)
+        tokens = _index_tokens(title, organizer, category)
+        for token in tokens.split():
+            self._vocabulary.add(token, keep_sorted)
+            posting = self._postings.setdefault(token, [])
+            if keep_sorted:
+                insort(posting, entry)
+            else:
+                posting.append(entry)
+
+        facet_keys = []
+        for kind, value in zip(FACET_KINDS, (organizer, category)):
+            if value and value.strip():
+                key = f"{kind}:{' '.join(tokenize(value))}"
+                self._add_facet(key, kind, value.strip(), keep_sorted)
+                facet_keys.append(key)
+        self._grants[grant_id] = (title, entry[0], tokens, tuple(facet_keys))
+
+    def _remove(self, grant_id: int):
+        stored = self._grants.pop(grant_id, None)
+        if stored is None:
+            return
+        _, deadline, tokens, facet_keys = stored
+        entry = (deadline, grant_id)
+        for token in tokens.split():
+            posting = self._postings[token]
+            del posting[bisect_left(posting, entry)]
+            if not posting:
+                del self._postings[token]
+            self._vocabulary.discard(token)
+        for key in facet_keys:
+            self._remove_facet(key)
+
+    def _add_facet(self, key: str, kind: str, text: str, keep_sorted: bool = True):
+        count = self._facet_counts.get(key, 0)
+        self._facet_counts[key] = count + 1
+        if count:
+            return
+        tokens = _index_tokens(text)
+        self._facets[key] = (kind, text, tokens)
+        for token in tokens.split():
+            self._facet_vocabulary.add(token, keep_sorted)
+            self._facet_postings.setdefault(token, set()).add(key)
+
+    def _remove_facet(self, key: str):
+        count = self._facet_counts[key] - 1
+        if count:
+            self._facet_counts[key] = count
+            return
+        del self._facet_counts[key]
+        _, _, tokens = self._facets.pop(key)
+        for token in tokens.split():
+            keys = self._facet_postings[token]
+            keys.discard(key)
+            if not keys:
+                del self._facet_postings[token]
+            self._facet_vocabulary.discard(token)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def suggest(self, prefix: str, limit: int = 10, now: Optional[datetime] = None) -> List[schemas.GrantSuggestion]:
+        """
+        Facets (most grants first) then grants (soonest deadline first) with a
+        token starting with every word of the prefix. Facets take at most half
+        the slots unless there aren't enough grants.
+        """
+        prefixes = [token for token in tokenize(prefix) if token not in STOPWORDS] or tokenize(prefix)
+        if not prefixes:
+            return []
+        prefixes = list(dict.fromkeys(prefixes))
+        now_epoch = _epoch(now or datetime.now())
+
+        with self._lock:
+            grants = self._suggest_grants(prefixes, limit, now_epoch)
+            facets = self._suggest_facets(prefixes, limit)
+
+        n_facets = min(len(facets), max(limit // 2, limit - len(grants)))
+        return (facets[:n_facets] + grants)[:limit]
+
+    def _suggest_grants(self, prefixes: List[str], limit: int, now_epoch: int) -> List[schemas.GrantSuggestion]:
+        expansions = {
+            prefix: [self._postings[token] for token in self._vocabulary.completions(prefix, MAX_EXPANSIONS)]
+            for prefix in prefixes
+        }
+        sizes = {prefix: sum(map(len, postings)) for prefix, postings in expansions.items()}
+        lead, *others = sorted(prefixes, key=sizes.__getitem__)
+
+        def ids(prefix: str) -> Set[int]:
+            return {grant_id for posting in expansions[prefix] for _, grant_id in posting}
+
+        if others and sizes[others[-1]] <= MAX_SET_SIZE:
+            # Every word is selective: intersect, then rank what's left
+            candidates = set.intersection(*(ids(prefix) for prefix in prefixes))
+            ranked = heapq.nsmallest(limit, (
+                (deadline, grant_id)
+                for grant_id in candidates
+                for deadline in (self._grants[grant_id][1],)
+                if deadline >= now_epoch
+            ))
+            return [
+                schemas.GrantSuggestion(text=self._grants[grant_id][0], kind="grant", grant_id=grant_id)
+                for _, grant_id in ranked
+            ]
+
+        # Walk the postings of the most selective word, soonest deadline first,
+        # checking each grant's tokens for the other words
+        needles = [f" {prefix}" for prefix in others]
+        postings = [
+            map(posting.__getitem__, range(bisect_left(posting, (now_epoch, -1)), len(posting)))  # Skip grants past their deadline
+            for posting in expansions[lead]
+        ]
+        found: List[schemas.GrantSuggestion] = []
+        seen: Set[int] = set()
+        for visited, (_, grant_id) in enumerate(heapq.merge(*postings)):
+            if len(found) == limit or visited == MAX_VISITS:
+                break
+            if grant_id in seen:
+                continue
+            seen.add(grant_id)
+            title, _, tokens, _ = self._grants[grant_id]
+            if needles and not all(needle in tokens for needle in needles):
+                continue
+            found.append(schemas.GrantSuggestion(text=title, kind="grant", grant_id=grant_id))
+        return found
+
+    def _suggest_facets(self, prefixes: List[str], limit: int) -> List[schemas.GrantSuggestion]:
+        # Few distinct organizers / categories: expand the longest word, filter the rest
+        lead = max(prefixes, key=len)
+        keys: Set[str] = set()
+        for token in self._facet_vocabulary.completions(lead, MAX_EXPANSIONS):
+            keys.update(self._facet_postings[token])
+        others = [prefix for prefix in prefixes if prefix != lead]
+        if others:
+            keys = {key for key in keys if _matches(self._facets[key][2], others)}
+        ranked = sorted(keys, key=lambda key: (-self._facet_counts[key], key))[:limit]
+        return [
+            schemas.GrantSuggestion(text=self._facets[key][1], kind=self._facets[key][0], count=self._facet_counts[key])
+            for key in ranked
+        ]
+
+    def __len__(self) -> int:
+        return len(self._grants)
+
+    @property
+    def token_count(self) -> int:
+        return len(self._vocabulary) + len(self._facet_vocabulary)
+
+
+grant_suggest_index = GrantSuggestIndex(max_age_seconds=settings.GRANT_INDEX_MAX_AGE_SECONDS)
+
+subscribe(grant_suggest_index.apply_changes)
+
+
+@REGISTRY.register_collector
+def _collect_suggest_index():
+    index = grant_suggest_index
+    yield "relivo_suggest_index_grants", "gauge", "Grants held by the typeahead index", [({}, len(index))]
+    yield "relivo_suggest_index_tokens", "gauge", "Distinct tokens in the typeahead index", [({}, index.token_count)]
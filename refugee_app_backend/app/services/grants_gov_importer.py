@@ -5,13 +5,32 @@ Downloads, parses, and imports grant data from Grants.gov public XML extract.
 """
 
 import requests
+import time
 import zipfile
 import io
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from typing import List, Dict, Tuple
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 from db import models
+from app.services.grant_events import GrantChanges, publish_grant_changes
+from app.services import grant_dedup
+from app.services.grant_categories import detect_category
+from app.services import grant_eligibility
+from app.services import grant_dimensions
+from app.services import grant_stats
+from app.core.metrics import REGISTRY
+
+IMPORT_GRANTS = REGISTRY.counter(
+    "relivo_import_grants_total", "Grants processed by the Grants.gov importer", ["outcome"]
+)
+IMPORT_RUNS = REGISTRY.counter("relivo_import_runs_total", "Grants.gov import runs", ["result"])
+IMPORT_DURATION = REGISTRY.histogram(
+    "relivo_import_duration_seconds",
+    "Wall time of a Grants.gov import run",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800),
+)
 
 
 class GrantsGovImporter:
@@ -24,6 +43,7 @@ class GrantsGovImporter:
         self.db = db
         self.imported_count = 0
         self.skipped_count = 0
+        self.duplicate_count = 0  # Near-duplicates of grants from other sources
         self.errors: List[str] = []
     
     def import_grants(self, xml_url: str = None) -> Dict[str, any]:
@@ -34,8 +54,9 @@ class GrantsGovImporter:
             xml_url: Optional custom URL for the XML extract
             
         Returns:
-            Dict with import statistics: {imported, skipped, errors}
+            Dict with import statistics: {imported, skipped, duplicates, errors}
         """
+        started = time.perf_counter()
         try:
             # Step 1: Download ZIP file
             # Use custom URL if provided, otherwise default
@@ -50,10 +71,12 @@ class GrantsGovImporter:
             # Step 3: Import to database
             print(f"Importing {len(grants_data)} grants...")
             self._import_to_database(grants_data)
+            self._record_run("success", started)
             
             return {
                 "imported": self.imported_count,
                 "skipped": self.skipped_count,
+                "duplicates": self.duplicate_count,
                 "errors": self.errors
             }
             
@@ -61,12 +84,23 @@ class GrantsGovImporter:
             error_msg = f"Import failed: {str(e)}"
             self.errors.append(error_msg)
             print(error_msg)
+            self._record_run("failed", started)
             return {
                 "imported": self.imported_count,
                 "skipped": self.skipped_count,
+                "duplicates": self.duplicate_count,
                 "errors": self.errors
             }
     
+    def _record_run(self, result: str, started: float):
+        """Export this run's outcome to /metrics"""
+        IMPORT_RUNS.labels(result).inc()
+        IMPORT_DURATION.labels().observe(time.perf_counter() - started)
+        IMPORT_GRANTS.labels("imported").inc(self.imported_count)
+        IMPORT_GRANTS.labels("skipped").inc(self.skipped_count)
+        IMPORT_GRANTS.labels("duplicate").inc(self.duplicate_count)
+        IMPORT_GRANTS.labels("error").inc(len(self.errors))
+    
     def _download_and_extract_xml(self, url: str) -> str:
         """Download ZIP file and extract XML content"""
         try:
@@ -193,22 +227,7 @@ class GrantsGovImporter:
     
     def _detect_category(self, title: str, description: str, organizer: str) -> str:
         """Detect category based on keywords"""
-        text = f"{title} {description or ''} {organizer}".lower()
-        
-        if any(kw in text for kw in ['housing', 'shelter', 'accommodation', 'rent']):
-            return 'Housing'
-        elif any(kw in text for kw in ['education', 'training', 'school', 'university', 'curriculum', 'teaching']):
-            return 'Education'
-        elif any(kw in text for kw in ['health', 'medical', 'healthcare', 'doctor', 'patient', 'disease']):
-            return 'Healthcare'
-        elif any(kw in text for kw in ['employment', 'job', 'business', 'entrepreneur', 'startup', 'work', 'career']):
-            return 'Employment'
-        elif any(kw in text for kw in ['legal', 'reunification', 'asylum', 'law', 'lawyer', 'rights', 'advocacy']):
-            return 'Legal'
-        elif any(kw in text for kw in ['emergency', 'urgent', 'crisis', 'disaster', 'immediate', 'relief']):
-            return 'Emergency'
-            
-        return 'General'
+        return detect_category(title, description, organizer)
     
     def _parse_date(self, date_str: str) -> datetime:
         """Parse date string to datetime object"""
@@ -230,9 +249,18 @@ class GrantsGovImporter:
         # If all formats fail, return None
         return None
     
+    def _add_stats_rows(self, grants: List[models.Grant]):
+        """Add the trending feed's grant_stats rows for new grants (flushed for their ids)"""
+        self.db.flush()
+        grant_stats.add_grants(self.db, [grant.id for grant in grants])
+        grants.clear()
+
     def _import_to_database(self, grants_data: List[Dict]):
         """Import grants to database with duplicate checking"""
-        
+        dedup = grant_dedup.available()
+        new_grants = []
+        uncommitted = []  # New grants since the last commit, for their grant_stats rows
+
         for grant_data in grants_data:
             try:
                 # Check if grant already exists by external_id
@@ -245,13 +273,32 @@ class GrantsGovImporter:
                     self.skipped_count += 1
                     continue
                 
+                # Same opportunity already listed under another source / id
+                fingerprint = None
+                if dedup:
+                    fingerprint = grant_dedup.fingerprint(
+                        grant_data['title'], grant_data['organizer'], grant_data['description']
+                    )
+                    if fingerprint and grant_dedup.find_duplicate(self.db, fingerprint):
+                        self.duplicate_count += 1
+                        continue
+
                 # Create new grant
+                grant_data.update(grant_eligibility.compiled_columns(grant_data.get('eligibility_criteria')))
+                grant_dimensions.assign(self.db, [grant_data], create=True)
                 new_grant = models.Grant(**grant_data)
                 self.db.add(new_grant)
+                new_grants.append(new_grant)
+                uncommitted.append(new_grant)
+                if fingerprint:
+                    # Flushed for its id; also catches duplicates within this extract
+                    self.db.flush()
+                    grant_dedup.store_fingerprint(self.db, new_grant.id, fingerprint)
                 self.imported_count += 1
                 
                 # Commit in batches of 100 for performance
                 if self.imported_count % 100 == 0:
+                    self._add_stats_rows(uncommitted)
                     self.db.commit()
                     print(f"Imported {self.imported_count} grants...")
                 
@@ -262,8 +309,16 @@ class GrantsGovImporter:
         
         # Final commit
         try:
+            self._add_stats_rows(uncommitted)
             self.db.commit()
-            print(f"Import complete: {self.imported_count} imported, {self.skipped_count} skipped")
+            print(f"Import complete: {self.imported_count} imported, {self.skipped_count} skipped, "
+                  f"{self.duplicate_count} duplicates")
         except Exception as e:
             self.db.rollback()
             raise Exception(f"Database commit failed: {str(e)}")
+
+        # Too many rows to hand over one by one; read models reload from the DB
+        if self.imported_count:
+            # Identity keys: reading .id would reload every expired row
+            created_ids = [inspect(grant).identity[0] for grant in new_grants if inspect(grant).identity]
+            publish_grant_changes(GrantChanges(bulk=True, created_ids=created_ids))
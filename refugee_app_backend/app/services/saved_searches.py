@@ -0,0 +1,378 @@
+"""
+Saved Searches
+
+Users store /grants/public filters (category, country, keywords, deadline
+window) and get digest emails when new public grants match them, instead of
+polling the feed.
+
+Matching runs off the request path, in a thread fed by grant change events
+(submissions that are public right away, edits, Grants.gov imports). Each
+grant is matched through an in-memory inverted index over the searches'
+predicates instead of a scan: every search is filed under one anchor key,
+its most selective predicate (a keyword, else category + country, else one
+of them), and only the searches filed under one of the grant's own keys are
+checked in full.
+
+Matches are recorded in saved_search_matches (once per search and grant).
+"instant" searches are emailed right away, one digest per user per batch of
+changes; "daily" ones by a daily cron run:
+
+    python -m app.services.saved_searches --daily
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+
+from db import models
+from app.core.config import settings
+from app.core.email_utils import send_saved_search_digest
+from app.core.metrics import REGISTRY
+from app.services.grant_events import GrantChanges, subscribe
+from app.services.grant_queries import public_grants_query
+from app.services.text import STOPWORDS, tokenize
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ("daily", "instant")
+LOAD_BATCH_SIZE = 500  # Ids per IN (...) when loading imported grants / digest recipients
+ANY = ("any",)  # Anchor of searches without category, country or keywords
+
+SAVED_SEARCH_MATCHES = REGISTRY.counter(
+    "relivo_saved_search_matches_total", "New public grants matched to saved searches"
+)
+SAVED_SEARCH_DIGESTS = REGISTRY.counter(
+    "relivo_saved_search_digests_total", "Saved search digest emails", ["frequency", "result"]
+)
+
+
+def keyword_tokens(keywords: Optional[str]) -> FrozenSet[str]:
+    return frozenset(token for token in tokenize(keywords) if token not in STOPWORDS)
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Deadlines are stored without a timezone; compare them the same way."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class GrantFacts:
+    """What matching needs of a grant, detached from its session."""
+    id: int
+    category: Optional[str]
+    country: Optional[str]
+    deadline: Optional[datetime]
+    tokens: FrozenSet[str]
+
+    @classmethod
+    def of(cls, grant) -> "GrantFacts":
+        text = " ".join(filter(None, (grant.title, grant.organizer, grant.description)))
+        return cls(grant.id, grant.category, grant.refugee_country, _naive(grant.deadline), frozenset(tokenize(text)))
+
+
+@dataclass(frozen=True)
+class _Search:
+    id: int
+    category: Optional[str]
+    country: Optional[str]
+    keywords: FrozenSet[str]
+    deadline_from: Optional[datetime]
+    deadline_to: Optional[datetime]
+    frequency: str
+
+    def matches(self, grant: GrantFacts) -> bool:
+        if self.category and grant.category != self.category:
+            return False
+        if self.country and grant.country != self.country:
+            return False
+        if self.deadline_from or self.deadline_to:
+            # Same as the /grants/public window: grants without a deadline are out
+            if grant.deadline is None:
+                return False
+            if self.deadline_from and grant.deadline < self.deadline_from:
+                return False
+            if self.deadline_to and grant.deadline > self.deadline_to:
+                return False
+        return self.keywords <= grant.tokens
+
+    @property
+    def anchor(self) -> tuple:
+        if self.keywords:
+            # Longer words are rarer: fewer grants reach this search
+            return "keyword", max(self.keywords, key=lambda token: (len(token), token))
+        if self.category and self.country:
+            return "place", self.category, self.country
+        if self.category:
+            return "category", self.category
+        if self.country:
+            return "country", self.country
+        return ANY
+
+
+class SavedSearchIndex:
+    """Saved searches filed under their anchor key."""
+
+    def __init__(self):
+        self._anchored: Dict[tuple, List[_Search]] = defaultdict(list)
+        self.version: Optional[Tuple[int, int]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, search_id: int, category: Optional[str], country: Optional[str], keywords: Optional[str],
+            deadline_from: Optional[datetime], deadline_to: Optional[datetime], frequency: str):
+        search = _Search(search_id, category or None, country or None, keyword_tokens(keywords),
+                         _naive(deadline_from), _naive(deadline_to), frequency)
+        self._anchored[search.anchor].append(search)
+        self._size += 1
+
+    def match(self, grant: GrantFacts) -> List[_Search]:
+        keys = [ANY, ("category", grant.category), ("country", grant.country),
+                ("place", grant.category, grant.country)]
+        keys.extend(("keyword", token) for token in grant.tokens)
+        # Each search has a single anchor, so none is reported twice
+        return [
+            search
+            for key in keys
+            for search in self._anchored.get(key, ())
+            if search.matches(grant)
+        ]
+
+    @staticmethod
+    def current_version(db: Session) -> Tuple[int, int]:
+        """Changes whenever a search is created or deleted (searches are never edited)."""
+        count, max_id = db.query(func.count(models.SavedSearch.id), func.max(models.SavedSearch.id)).one()
+        return count, max_id or 0
+
+    @classmethod
+    def load(cls, db: Session, version: Optional[Tuple[int, int]] = None) -> "SavedSearchIndex":
+        started = time.perf_counter()
+        index = cls()
+        index.version = version or cls.current_version(db)
+        rows = db.query(
+            models.SavedSearch.id,
+            models.SavedSearch.category,
+            models.SavedSearch.refugee_country,
+            models.SavedSearch.keywords,
+            models.SavedSearch.deadline_from,
+            models.SavedSearch.deadline_to,
+            models.SavedSearch.frequency,
+        ).all()
+        for row in rows:
+            index.add(*row)
+        logger.info(f"Saved search index loaded: {len(index)} searches in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return index
+
+
+def record_matches(db: Session, index: SavedSearchIndex, grants: List[GrantFacts]) -> List[_Search]:
+    """Match `grants` and store the new matches (not committed); returns the searches matched."""
+    rows = {(search.id, grant.id): search for grant in grants for search in index.match(grant)}
+    if not rows:
+        return []
+    # A grant can be re-announced (edited, re-verified): each pair only once
+    table = models.SavedSearchMatch.__table__
+    existing = db.query(models.SavedSearchMatch.search_id, models.SavedSearchMatch.grant_id).filter(
+        models.SavedSearchMatch.grant_id.in_([grant.id for grant in grants])
+    ).all()
+    for pair in existing:
+        rows.pop(tuple(pair), None)
+    if rows:
+        db.execute(table.insert(), [{"search_id": search_id, "grant_id": grant_id} for search_id, grant_id in rows])
+        SAVED_SEARCH_MATCHES.labels().inc(len(rows))
+    return list(rows.values())
+
+
+def _describe(name: Optional[str], category: Optional[str], country: Optional[str], keywords: Optional[str]) -> str:
+    if name:
+        return name
+    parts = [part for part in (category, country, f'"{keywords}"' if keywords else None) if part]
+    return ", ".join(parts) or "All grants"
+
+
+def send_digests(db: Session, frequency: str) -> int:
+    """Email every user with pending matches of their `frequency` searches; returns the emails sent."""
+    Match, Search = models.SavedSearchMatch, models.SavedSearch
+    pending = (Match.notified_at == None, Search.frequency == frequency, models.User.is_active == True)
+    user_ids = db.query(Search.user_id).join(Match, Match.search_id == Search.id).join(
+        models.User, models.User.id == Search.user_id
+    ).filter(*pending).distinct().all()
+    user_ids = [user_id for user_id, in user_ids]
+
+    sent = 0
+    limit = settings.SAVED_SEARCH_DIGEST_MAX_GRANTS
+    for start in range(0, len(user_ids), LOAD_BATCH_SIZE):
+        rows = db.query(
+            Search.user_id, models.User.email, Match.search_id, Match.grant_id,
+            Search.name, Search.category, Search.refugee_country, Search.keywords,
+            models.Grant.title, models.Grant.apply_url,
+        ).select_from(Match).join(Search, Search.id == Match.search_id).join(
+            models.User, models.User.id == Search.user_id
+        ).join(
+            models.Grant, models.Grant.id == Match.grant_id
+        ).filter(
+            *pending, Search.user_id.in_(user_ids[start:start + LOAD_BATCH_SIZE])
+        ).order_by(Search.user_id, Match.search_id, Match.grant_id.desc()).all()
+
+        for (user_id, email), user_rows in groupby(rows, key=lambda row: (row.user_id, row.email)):
+            user_rows = list(user_rows)
+            sections = []
+            for _, search_rows in groupby(user_rows, key=lambda row: row.search_id):
+                search_rows = list(search_rows)
+                first = search_rows[0]
+                sections.append((
+                    _describe(first.name, first.category, first.refugee_country, first.keywords),
+                    [(row.title, row.apply_url) for row in search_rows[:limit]],
+                    max(len(search_rows) - limit, 0),
+                ))
+            if not send_saved_search_digest(email, sections):
+                SAVED_SEARCH_DIGESTS.labels(frequency, "error").inc()
+                continue  # Still pending: retried with the next digest
+            db.query(Match).filter(
+                tuple_(Match.search_id, Match.grant_id).in_([(row.search_id, row.grant_id) for row in user_rows])
+            ).update({Match.notified_at: func.now()}, synchronize_session=False)
+            db.commit()
+            SAVED_SEARCH_DIGESTS.labels(frequency, "sent").inc()
+            sent += 1
+    return sent
+
+
+@dataclass
+class _Change:
+    """Snapshot of GrantChanges safe to hand to another thread."""
+    grants: List[GrantFacts] = field(default_factory=list)
+    created_ids: List[int] = field(default_factory=list)
+
+
+class SavedSearchNotifier:
+    """Matches new public grants against saved searches and sends instant digests, off the request path."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[_Change]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._index: Optional[SavedSearchIndex] = None
+
+    @property
+    def available(self) -> bool:
+        return settings.SAVED_SEARCHES_ENABLED
+
+    def apply_changes(self, changes: GrantChanges):
+        if not self.available:
+            return
+        now = datetime.now()
+        change = _Change(created_ids=list(changes.created_ids))
+        for grant in changes.upserted:
+            if grant.is_verified and grant.is_active and (grant.deadline is None or _naive(grant.deadline) >= now):
+                change.grants.append(GrantFacts.of(grant))
+        if change.grants or change.created_ids:
+            self._queue.put(change)
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="saved-searches", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Block until every queued change has been matched (and instant digests sent)."""
+        self._queue.join()
+
+    def stop(self, timeout: float = 10.0):
+        """Finish the batch in progress and exit."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self):
+        from db.session import SessionLocal
+        while True:
+            changes = [self._queue.get()]
+            while not self._queue.empty():  # Coalesce: one digest per user for the lot
+                changes.append(self._queue.get_nowait())
+            stopping = None in changes
+            changes = [change for change in changes if change is not None]
+
+            db = SessionLocal()
+            try:
+                self._process(db, changes)
+            except Exception as e:
+                logger.error(f"Saved search matching failed: {e}")
+                db.rollback()
+            finally:
+                db.close()
+                for _ in range(len(changes) + (1 if stopping else 0)):
+                    self._queue.task_done()
+            if stopping:
+                return
+
+    def _fresh_index(self, db: Session) -> SavedSearchIndex:
+        version = SavedSearchIndex.current_version(db)
+        if self._index is None or self._index.version != version:
+            self._index = SavedSearchIndex.load(db, version)
+        return self._index
+
+    def _process(self, db: Session, changes: List[_Change]):
+        index = self._fresh_index(db)
+        if not len(index):
+            return
+        grants = [grant for change in changes for grant in change.grants]
+        created_ids = [grant_id for change in changes for grant_id in change.created_ids]
+        # Imports only hand over ids; the public ones among them are loaded here
+        for start in range(0, len(created_ids), LOAD_BATCH_SIZE):
+            batch = public_grants_query(db).filter(
+                models.Grant.id.in_(created_ids[start:start + LOAD_BATCH_SIZE])
+            ).order_by(None).all()
+            grants.extend(GrantFacts.of(grant) for grant in batch)
+
+        matched = record_matches(db, index, grants)
+        db.commit()
+        if any(search.frequency == "instant" for search in matched):
+            send_digests(db, "instant")
+
+
+saved_search_notifier = SavedSearchNotifier()
+
+subscribe(saved_search_notifier.apply_changes)
+
+
+@REGISTRY.register_collector
+def _collect_saved_search_index():
+    index = saved_search_notifier._index
+    yield "relivo_saved_search_index_searches", "gauge", "Saved searches in the matcher index", [
+        ({}, len(index) if index is not None else 0)
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    logging.basicConfig(level=logging.INFO)
+    from db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Send saved search digests")
+    parser.add_argument("--daily", action="store_true", help="Send the daily digests (run once a day)")
+    parser.add_argument("--instant", action="store_true", help="Retry instant digests that failed to send")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        for frequency in [f for f in FREQUENCIES if getattr(args, f)] or ["daily"]:
+            print(f"{frequency}: {send_digests(session, frequency)} digests sent")
+    finally:
+        session.close()
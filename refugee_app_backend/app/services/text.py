@@ -0,0 +1,33 @@
+"""
+Text Normalization
+
+Shared by the in-memory text features over grants (typeahead, similar
+grants): case-folded, accent-stripped word tokens, so "Éducation" and
+"education" are the same token everywhere.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+MAX_TOKEN_LENGTH = 32
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "de", "for", "in", "of", "on", "or", "the", "to", "with",
+})
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase and strip accents, so "Éducation" matches "educ"."""
+    if not text:
+        return ""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [token[:MAX_TOKEN_LENGTH] for token in _WORD.findall(normalize(text))]
@@ -0,0 +1,145 @@
+"""
+Bookmark Refresh Benchmark: POST /grants/batch-get vs the Alternatives
+
+Drives the API in-process against a temporary SQLite database seeded with
+seed_scale.py grants and refreshes BOOKMARKS bookmarked grant ids (public
+ones plus some that were deleted or are no longer public) by:
+
+- paging the whole public feed, as the app does today
+- one GET /grants/{id} per bookmark
+- one POST /grants/batch-get
+- the same batch-get with If-None-Match, nothing changed (304)
+
+Reports wall time, requests, SQL statements and (uncompressed) response
+bytes for each. Fails (exit code 1) if batch-get reports a bookmark
+wrongly, isn't faster than the per-id requests, or if the conditional
+refresh has a body.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.batch_get [--grants 20000]
+"""
+
+import os
+import sys
+import argparse
+import random
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="relivo-batch-get-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'batch_get.db')}"
+os.environ["DATABASE_READ_URL"] = ""
+# Background workers would compete for the database
+os.environ["FEED_SNAPSHOT_ENABLED"] = "false"
+os.environ["WARM_UP_ENABLED"] = "false"
+os.environ["SIMILAR_GRANTS_ENABLED"] = "false"
+os.environ["SAVED_SEARCHES_ENABLED"] = "false"
+os.environ["GRANT_STATS_ENABLED"] = "false"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.schemas.grant import MAX_BATCH_GET_IDS
+from app.services.grant_queries import public_grants_query
+from db import models
+from db.session import SessionLocal, engine
+from db.query_stats import count_queries
+from benchmarks.query_plans import seed
+
+BOOKMARKS = MAX_BATCH_GET_IDS
+RETIRED = 20  # Bookmarks whose grant is no longer public
+MISSING = 5  # Bookmarks of deleted grants
+FEED_PAGE = 100
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=20000)
+    args = parser.parse_args()
+
+    seed(engine, grants=args.grants)
+    rng = random.Random(11)
+    db = SessionLocal()
+    public = [grant_id for (grant_id,) in public_grants_query(db).with_entities(models.Grant.id)]
+    others = set(db.execute(select(models.Grant.id)).scalars()) - set(public)
+    top = max(public + list(others))
+    db.close()
+    retired = rng.sample(sorted(others), RETIRED)
+    missing = list(range(top + 1, top + 1 + MISSING))
+    bookmarks = rng.sample(public, BOOKMARKS - RETIRED - MISSING) + retired + missing
+    rng.shuffle(bookmarks)
+
+    failures = []
+    results = {}
+
+    def measure(label, run):
+        with count_queries() as stats:
+            started = time.perf_counter()
+            requests, size = run()
+            results[label] = (time.perf_counter() - started, requests, stats.count, size)
+
+    with TestClient(app) as client:
+        client.get("/grants/public")  # Feed index built, as in a warm worker
+
+        def page_feed():
+            skip, requests, size = 0, 0, 0
+            while True:
+                response = client.get(f"/grants/public?skip={skip}&limit={FEED_PAGE}")
+                requests += 1
+                size += len(response.content)
+                if len(response.json()) < FEED_PAGE:
+                    return requests, size
+                skip += FEED_PAGE
+
+        def per_id():
+            size = 0
+            for grant_id in bookmarks:
+                size += len(client.get(f"/grants/{grant_id}").content)
+            return len(bookmarks), size
+
+        batch = {}
+
+        def batch_get():
+            response = client.post("/grants/batch-get", json={"ids": bookmarks})
+            response.raise_for_status()
+            batch["response"] = response
+            return 1, len(response.content)
+
+        def conditional():
+            response = client.post("/grants/batch-get", json={"ids": bookmarks},
+                                   headers={"If-None-Match": batch["response"].headers["ETag"]})
+            batch["conditional"] = response
+            return 1, len(response.content)
+
+        measure("page the feed", page_feed)
+        measure("GET /grants/{id} each", per_id)
+        measure("batch-get", batch_get)
+        measure("batch-get, unchanged", conditional)
+
+    result = batch["response"].json()
+    if sorted(result["missing"]) != sorted(missing) or sorted(result["retired"]) != sorted(retired):
+        failures.append("batch-get reported missing / retired bookmarks wrongly")
+    if len(result["grants"]) != BOOKMARKS - RETIRED - MISSING:
+        failures.append(f"batch-get returned {len(result['grants'])} public grants")
+    if batch["conditional"].status_code != 304 or batch["conditional"].content:
+        failures.append(f"unchanged refresh answered {batch['conditional'].status_code} with a body")
+    if results["batch-get"][0] >= results["GET /grants/{id} each"][0]:
+        failures.append("batch-get isn't faster than a request per bookmark")
+
+    print(f"\n{BOOKMARKS} bookmarks ({RETIRED} retired, {MISSING} deleted) over {args.grants} grants\n")
+    print(f"{'':<24}{'ms':>9}{'requests':>10}{'queries':>9}{'KB':>9}")
+    for label, (seconds, requests, queries, size) in results.items():
+        print(f"{label:<24}{seconds * 1000:>9.1f}{requests:>10}{queries:>9}{size / 1024:>9.1f}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Bookmark refresh OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
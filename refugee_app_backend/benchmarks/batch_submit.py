@@ -0,0 +1,166 @@
+"""
+Batch Submission Benchmark: POST /grants/submit/batch vs a Loop of /submit
+
+Drives the API in-process against a temporary SQLite database (seeded with
+seed_scale.py grants) as an approved organization, and submits the same
+number of distinct grants:
+
+- one POST /grants/submit per grant, as an upload script does today
+- POST /grants/submit/batch in chunks of GRANT_BATCH_MAX_ITEMS, as a JSON
+  array and as NDJSON
+
+Every grant gets the near-duplicate check; the batches run against the
+fingerprints the loop stored. Reports grants per second and SQL statements
+per grant for each. Fails (exit code 1) if a grant is missing from a batch
+response, if batches aren't at least MIN_SPEEDUP times the loop's
+throughput, or if an external_id already taken (by a saved grant or an
+earlier item) isn't reported as an item error.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.batch_submit [--grants 2000]
+"""
+
+import os
+import sys
+import argparse
+import json
+import random
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="relivo-batch-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'batch.db')}"
+os.environ["DATABASE_READ_URL"] = ""
+# Background workers would compete for the database
+os.environ["FEED_SNAPSHOT_ENABLED"] = "false"
+os.environ["WARM_UP_ENABLED"] = "false"
+os.environ["SIMILAR_GRANTS_ENABLED"] = "false"
+os.environ["SAVED_SEARCHES_ENABLED"] = "false"
+os.environ["GRANT_STATS_ENABLED"] = "false"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core import security
+from app.core.config import settings
+from db import models
+from db.session import SessionLocal, engine
+from db.migrate import migrate
+from db.query_stats import count_queries
+from benchmarks.query_plans import seed
+
+PASSWORD = "batch-password"
+MIN_SPEEDUP = 5.0
+SEED_GRANTS = 20000
+VOCABULARY = 20000
+WORD_WEIGHTS = [1 / (rank + 1) for rank in range(VOCABULARY)]
+
+
+def _grants(rng: random.Random, count: int):
+    """Distinct grants (random Zipf text, so none is a near-duplicate of another)."""
+    def words(n):
+        return " ".join(f"w{i}" for i in rng.choices(range(VOCABULARY), weights=WORD_WEIGHTS, k=n))
+    return [{
+        "title": words(8),
+        "organizer": "Benchmark Foundation",
+        "description": words(60),
+        "apply_url": "https://example.org/apply",
+        "refugee_country": "Germany",
+        "deadline": "2030-01-01T00:00:00",
+    } for _ in range(count)]
+
+
+def _seed_org():
+    db = SessionLocal()
+    try:
+        user = models.User(email="org@example.org", hashed_password=security.get_password_hash(PASSWORD),
+                           is_verified=True, role="organization")
+        db.add(user)
+        db.flush()
+        db.add(models.Organization(user_id=user.id, name="Benchmark Foundation", status="approved"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=2000)
+    args = parser.parse_args()
+
+    migrate(engine)
+    seed(engine, grants=SEED_GRANTS)
+    _seed_org()
+    rng = random.Random(7)
+    chunk = settings.GRANT_BATCH_MAX_ITEMS
+    failures = []
+    results = {}
+
+    with TestClient(app) as client:
+        token = client.post("/auth/login", json={"email": "org@example.org", "password": PASSWORD}).json()
+        auth = {"Authorization": f"Bearer {token['access_token']}"}
+
+        grants = _grants(rng, args.grants)
+        with count_queries() as stats:
+            started = time.perf_counter()
+            for grant in grants:
+                client.post("/grants/submit", json=grant, headers=auth).raise_for_status()
+            results["loop of /submit"] = (time.perf_counter() - started, stats.count)
+
+        for label, content_type in (("batch, JSON array", "application/json"),
+                                    ("batch, NDJSON", "application/x-ndjson")):
+            grants = _grants(rng, args.grants)
+            created = 0
+            with count_queries() as stats:
+                started = time.perf_counter()
+                for start in range(0, len(grants), chunk):
+                    items = grants[start:start + chunk]
+                    if content_type == "application/json":
+                        body = json.dumps(items)
+                    else:
+                        body = "\n".join(json.dumps(item) for item in items)
+                    response = client.post("/grants/submit/batch", content=body,
+                                           headers={**auth, "Content-Type": content_type})
+                    response.raise_for_status()
+                    result = response.json()
+                    created += len(result["created"])
+                    if result["errors"]:
+                        failures.append(f"{label}: unexpected errors {result['errors'][:3]}")
+                results[label] = (time.perf_counter() - started, stats.count)
+            if created != len(grants):
+                failures.append(f"{label}: {created} of {len(grants)} grants created")
+
+        # A taken external_id and a repeat within the batch are item errors, not a failed INSERT
+        first, taken, repeated = _grants(rng, 3)
+        client.post("/grants/submit", json={**first, "external_id": "BENCH-1"}, headers=auth).raise_for_status()
+        batch = [{**taken, "external_id": "BENCH-1"}, {**repeated, "external_id": "BENCH-2"},
+                 {**repeated, "title": "Another title", "external_id": "BENCH-2"}]
+        response = client.post("/grants/submit/batch", json=batch, headers=auth)
+        if response.status_code != 200:
+            failures.append(f"external_id collisions: HTTP {response.status_code}")
+        elif ([item["index"] for item in response.json()["created"]] != [1]
+              or [error["index"] for error in response.json()["errors"]] != [0, 2]):
+            failures.append(f"external_id collisions: {response.json()}")
+        response = client.post("/grants/submit/batch?atomic=true", json=batch[:1], headers=auth)
+        if response.status_code != 422:
+            failures.append(f"atomic batch with a taken external_id: HTTP {response.status_code}")
+
+    print(f"\n{args.grants} grants per run ({SEED_GRANTS} seeded), batches of {chunk}\n")
+    print(f"{'':<20}{'grants/s':>10}{'queries/grant':>15}")
+    loop_seconds = results["loop of /submit"][0]
+    for label, (seconds, queries) in results.items():
+        print(f"{label:<20}{args.grants / seconds:>10.0f}{queries / args.grants:>15.2f}")
+        if label != "loop of /submit" and loop_seconds / seconds < MIN_SPEEDUP:
+            failures.append(f"{label} only {loop_seconds / seconds:.1f}x the loop (min {MIN_SPEEDUP}x)")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Batch submission OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Eligibility Matching Benchmark: Compiled Bitsets vs Parsing per Request
+
+Seeds a temporary SQLite database, gives the grants eligibility_criteria
+drawn from realistic free-text and structured entries, compiles them with
+grant_eligibility.recompile (as migration 8 does) and times GET
+/grants/eligible's work for a set of random profiles:
+
+- parse: load the public grants and parse every grant's criteria in Python
+  for each request, the only option without the compiled columns
+- sql: the bitwise-AND conditions in SQL (the fallback path)
+- index: bit tests over the columnar index (the normal path)
+
+Fails (exit code 1) if the three disagree on any profile's eligible grants,
+if a free-text criterion of RULES doesn't compile like its structured
+equivalent, or if a canonical country has no residence bit of its own.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.eligibility [--grants 20000] [--profiles 20]
+"""
+
+import os
+import sys
+import argparse
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.schemas import grant as schemas
+from app.services import grant_eligibility
+from app.services.grant_eligibility import COUNTRIES, DIMENSIONS, VOCABULARY
+from app.services.grant_index import PublicGrantIndex
+from app.services.grant_queries import public_grants_query
+from db import models
+from benchmarks.query_plans import seed
+
+CRITERIA = [
+    "Refugees",
+    "Asylum seekers",
+    "Recognised refugees and stateless persons",
+    "Holders of temporary protection",
+    "Aged 18-25",
+    "Under 18",
+    "65+",
+    "Young people aged 16 to 30",
+    "Families with children",
+    "Families with children under 5",
+    "Single parents",
+    "Students enrolled at a university",
+    "Unemployed or self-employed",
+    "Living in Germany",
+    "Residents of France or Belgium",
+    "residence: Austria, Switzerland",
+    "status: refugee, asylum seeker",
+    "Must submit a business plan",
+    "Open to everyone",
+]
+
+# Free text -> the structured criteria it must compile to
+RULES = {
+    "Under 18": ["age: under_18"],
+    "Aged 18-25": ["age: 18_25"],
+    # The children's age, not the applicant's
+    "Families with children under 5": ["household: family_with_children"],
+    "Parents of kids aged 0-6": ["household: family_with_children"],
+    # Countries by any seeded spelling or ISO code, as the country filters
+    "residence: DE": ["residence: Germany"],
+    "Living in Deutschland": ["residence: Germany"],
+    "Residents of the U.K.": ["residence: United Kingdom"],
+}
+
+
+def _criteria(rng: random.Random):
+    if rng.random() < 0.3:
+        return None
+    return rng.sample(CRITERIA, rng.randint(1, 3))
+
+
+def _profile(rng: random.Random) -> models.EligibilityProfile:
+    values = {dimension: rng.choice((None,) + VOCABULARY[dimension]) for dimension in DIMENSIONS}
+    return models.EligibilityProfile(residence_country=rng.choice((None, "Syria", "DE") + COUNTRIES[:8]), **values)
+
+
+def _time(fn, repeat: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _matches(requirements, mask, countries) -> bool:
+    bitsets = (mask, countries)
+    return all(bitsets[column] is None or bitsets[column] & bit for column, bit in requirements)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=20000)
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    failures = []
+    for text, structured in RULES.items():
+        if grant_eligibility.compile_criteria([text]) != grant_eligibility.compile_criteria(structured):
+            failures.append(f"{text!r} doesn't compile like {structured}")
+    bits = {grant_eligibility.country_bit(country) for country in COUNTRIES}
+    if len(bits) != len(COUNTRIES) or grant_eligibility.country_bit("Syria") in bits:
+        failures.append("canonical countries share residence bits")
+
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Seeding {args.grants} grants...")
+        seed(engine, grants=args.grants)
+        db = sessionmaker(bind=engine)()
+        grants = models.Grant.__table__
+        ids = db.execute(select(grants.c.id)).scalars().all()
+        db.execute(
+            update(grants).where(grants.c.id == bindparam("grant_id")).values(eligibility_criteria=bindparam("criteria")),
+            [{"grant_id": grant_id, "criteria": _criteria(rng)} for grant_id in ids],
+        )
+        db.commit()
+        started = time.perf_counter()
+        grant_eligibility.recompile(db)
+        print(f"Compiled criteria of {len(ids)} grants in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        index = PublicGrantIndex(max_age_seconds=3600)
+        index.rebuild(db)
+        profiles = [grant_eligibility.profile_requirements(_profile(rng)) for _ in range(args.profiles)]
+
+        def parse_path(requirements, limit):
+            eligible = []
+            for grant in public_grants_query(db).all():
+                if _matches(requirements, *grant_eligibility.compile_criteria(grant.eligibility_criteria)):
+                    eligible.append(grant)
+                    if len(eligible) == limit:
+                        break
+            return [schemas.Grant.model_validate(grant) for grant in eligible]
+
+        def sql_path(requirements, limit):
+            query = public_grants_query(db).filter(*grant_eligibility.sql_conditions(requirements))
+            return [schemas.Grant.model_validate(grant) for grant in query.limit(limit).all()]
+
+        def index_path(requirements, limit):
+            return index.query(limit=limit, eligible=requirements)
+
+        paths = {"parse": parse_path, "sql": sql_path, "index": index_path}
+        matched = 0
+        for requirements in profiles:
+            # Deadline order only; ties may come back in any order
+            results = {name: sorted(grant.id for grant in path(requirements, args.grants)) for name, path in paths.items()}
+            matched += len(results["index"])
+            for name, found in results.items():
+                if found != results["index"]:
+                    failures.append(f"{name} disagrees with the index for requirements {requirements}")
+
+        print(f"{len(index)} public grants, {args.profiles} profiles, "
+              f"{matched / args.profiles:.0f} eligible grants per profile on average\n")
+        print(f"{'path':<8}{'ms/request':>12}{'speedup':>10}")
+        timings = {
+            name: sum(_time(lambda: path(requirements, args.limit), 3) for requirements in profiles) / len(profiles)
+            for name, path in paths.items()
+        }
+        for name, ms in timings.items():
+            print(f"{name:<8}{ms:>12.3f}{timings['parse'] / ms:>9.1f}x")
+
+        db.close()
+        engine.dispose()
+
+    if failures:
+        for failure in failures[:10]:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Eligibility matching OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Near-Duplicate Detection Benchmark: Cost per Check vs Table Size
+
+Grows a temporary SQLite database of synthetic grants (random text over a
+Zipf-distributed vocabulary, so unrelated grants share common words but
+rarely whole phrases) and, at each size, times the check a submission or an
+imported grant goes through in app/services/grant_dedup.py (fingerprint +
+find_duplicate) for:
+
+- edited copies of indexed grants (one to three words changed, different
+  case / punctuation / accents): found when their exact shingle Jaccard
+  similarity to the original is clearly over DEDUP_THRESHOLD (by MARGIN,
+  ~1.5 standard errors of the 120-value MinHash estimate; closer copies go
+  either way and aren't scored)
+- unrelated new grants: never found
+
+Fails (exit code 1) if recall or the false-positive rate miss their targets,
+or if a check at the largest size costs more than MAX_GROWTH times the
+smallest: the LSH lookup must stay close to constant instead of growing
+with the table like a pairwise comparison does (also timed, for reference).
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.grant_dedup [--sizes 10000,50000,100000]
+"""
+
+import os
+import sys
+import argparse
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+
+from db import models
+from app.core.config import settings
+from app.services import grant_dedup
+
+MIN_RECALL = 0.95
+MAX_FALSE_POSITIVES = 0.01
+MAX_GROWTH = 3.0
+MARGIN = 0.05
+VOCABULARY = 20000
+WORD_WEIGHTS = [1 / (rank + 1) for rank in range(VOCABULARY)]
+ORGANIZERS = [f"Foundation {i}" for i in range(500)]
+
+
+def _words(rng: random.Random, count: int):
+    return [f"w{i}" for i in rng.choices(range(VOCABULARY), weights=WORD_WEIGHTS, k=count)]
+
+
+def _grant(rng: random.Random):
+    return (" ".join(_words(rng, rng.randint(4, 10))), rng.choice(ORGANIZERS),
+            " ".join(_words(rng, rng.randint(40, 120))))
+
+
+def _near_duplicate(rng: random.Random, title: str, organizer: str, description: str):
+    words = description.split()
+    for _ in range(rng.randint(1, 3)):
+        words[rng.randrange(len(words))] = _words(rng, 1)[0]
+    return f"{title.upper()}!", organizer.replace("Foundation", "FOUNDATIÓN"), ", ".join(words)
+
+
+def _jaccard(text, other) -> float:
+    a, b = grant_dedup.shingles(*text), grant_dedup.shingles(*other)
+    return len(a & b) / len(a | b)
+
+
+def _load(engine, grants):
+    rows, prints, buckets = [], [], []
+    with engine.begin() as conn:
+        start = conn.execute(select(models.Grant.id).order_by(models.Grant.id.desc()).limit(1)).scalar() or 0
+        for offset, (title, organizer, description) in enumerate(grants, start=start + 1):
+            fp = grant_dedup.fingerprint(title, organizer, description)
+            rows.append({"id": offset, "title": title, "organizer": organizer,
+                         "description": description, "apply_url": "https://example.org"})
+            prints.append({"grant_id": offset, "signature": fp.signature})
+            buckets.extend({"bucket": bucket, "grant_id": offset} for bucket in set(fp.buckets))
+        conn.execute(insert(models.Grant), rows)
+        conn.execute(insert(models.GrantFingerprint), prints)
+        conn.execute(insert(models.GrantLshBucket), buckets)
+
+
+def _brute_force_ms(conn, fp) -> float:
+    """What a check costs without LSH: read every signature and compare."""
+    np = grant_dedup.np
+    started = time.perf_counter()
+    signatures = conn.execute(select(models.GrantFingerprint.signature)).scalars().all()
+    matrix = np.frombuffer(b"".join(signatures), dtype="<u4").reshape(len(signatures), -1)
+    (matrix == np.frombuffer(fp.signature, dtype="<u4")).mean(axis=1).max()
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,50000,100000")
+    parser.add_argument("--probes", type=int, default=500)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    if not grant_dedup.HAS_NUMPY:
+        print("NumPy is not installed")
+        return 1
+
+    rng = random.Random(42)
+    corpus = []
+    failures = []
+    per_check = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        print(f"{'grants':>8}  {'check ms':>9}  {'recall':>7}  {'false +':>7}  {'brute force ms':>14}")
+        for size in sizes:
+            batch = [_grant(rng) for _ in range(size - len(corpus))]
+            _load(engine, batch)
+            corpus.extend(batch)
+
+            probes = []
+            for original in rng.sample(corpus, args.probes // 2):
+                edited = _near_duplicate(rng, *original)
+                similarity = _jaccard(edited, original)
+                if similarity >= settings.DEDUP_THRESHOLD + MARGIN:
+                    probes.append(("duplicate", edited))
+                elif similarity >= settings.DEDUP_THRESHOLD - MARGIN:
+                    probes.append(("borderline", edited))
+                else:
+                    probes.append(("different", edited))
+            probes += [("unrelated", _grant(rng)) for _ in range(args.probes - len(probes))]
+            rng.shuffle(probes)
+            found = false_positives = 0
+            samples = []
+            with engine.connect() as conn:
+                for kind, text in probes:
+                    started = time.perf_counter()
+                    duplicate = grant_dedup.find_duplicate(conn, grant_dedup.fingerprint(*text))
+                    samples.append((time.perf_counter() - started) * 1000)
+                    if duplicate and kind == "duplicate":
+                        found += 1
+                    elif duplicate and kind == "unrelated":
+                        false_positives += 1
+                brute_ms = _brute_force_ms(conn, grant_dedup.fingerprint(*probes[0][1]))
+
+            samples.sort()
+            per_check[size] = samples[len(samples) // 2]
+            duplicates = sum(1 for kind, _ in probes if kind == "duplicate")
+            unrelated = sum(1 for kind, _ in probes if kind == "unrelated")
+            recall = found / duplicates
+            false_rate = false_positives / unrelated
+            print(f"{size:>8}  {per_check[size]:>9.2f}  {recall:>7.3f}  {false_rate:>7.3f}  {brute_ms:>14.1f}")
+            if recall < MIN_RECALL:
+                failures.append(f"recall {recall:.3f} < {MIN_RECALL} at {size} grants")
+            if false_rate > MAX_FALSE_POSITIVES:
+                failures.append(f"false positives {false_rate:.3f} > {MAX_FALSE_POSITIVES} at {size} grants")
+        engine.dispose()
+
+    growth = per_check[sizes[-1]] / per_check[sizes[0]]
+    print(f"\nCheck cost {sizes[0]} -> {sizes[-1]} grants: x{growth:.2f}")
+    if growth > MAX_GROWTH:
+        failures.append(f"check cost grew x{growth:.2f} (> x{MAX_GROWTH})")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Country / Category Filter Benchmark: Integer Keys vs Free-Text Columns
+
+Seeds a temporary SQLite database and compares the public feed's country
+and category filters before and after the dimension tables:
+
+- index size: the country_id / category_id feed indexes against the same
+  partial indexes on the refugee_country / category text columns
+- query time: the filtered feed through the database (key = ?, through the
+  cached alias map) against the old exact string match
+- correctness: other spellings of each filter value ("germany", "DE",
+  "Deutschland ", "shelter") against the canonical name
+- unknown values: a user submission's typo is saved without a key and adds
+  no canonical row (only trusted writes, create=True, do)
+
+Fails (exit code 1) if any spelling returns other grants than the canonical
+name, if the key indexes aren't smaller than the text ones, or if an
+untrusted write adds a canonical row or its grant can't be found by its
+text (filtered as typed, with stray whitespace).
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.grant_dimensions [--grants 50000] [--repeat 50]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from db import models
+from app.services import grant_dimensions
+from app.services.grant_queries import public_grants_query
+from benchmarks.query_plans import seed
+
+# The string indexes the feed used before (migration 9 drops them)
+TEXT_INDEXES = {
+    "ix_bench_country_text": "refugee_country, deadline",
+    "ix_bench_category_text": "category, deadline",
+}
+KEY_INDEXES = ["ix_grants_public_country_id_deadline", "ix_grants_public_category_id_deadline"]
+
+SPELLINGS = {
+    "country": {"Germany": ["germany", "DE", "deu", "Deutschland ", "GERMANY"],
+                "Netherlands": ["nl", "Holland", "the netherlands"]},
+    "category": {"Housing": ["housing", "Shelter"], "Healthcare": ["health care", "Medical"]},
+}
+
+
+def _time(fn, repeat: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _index_kb(db, names) -> float:
+    return db.execute(
+        text(f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({', '.join(repr(name) for name in names)})")
+    ).scalar() / 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    failures = []
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Seeding {args.grants} grants...")
+        seed(engine, grants=args.grants)
+        db = sessionmaker(bind=engine)()
+        for name, columns in TEXT_INDEXES.items():
+            db.execute(text(f"CREATE INDEX {name} ON grants ({columns}) WHERE {models.PUBLIC_GRANT_PREDICATE_SQLITE}"))
+        db.execute(text("ANALYZE"))
+        db.commit()
+        grant_dimensions.ensure_fresh(db)
+
+        text_kb, key_kb = _index_kb(db, TEXT_INDEXES), _index_kb(db, KEY_INDEXES)
+        print(f"\nFeed filter indexes: text {text_kb:.0f}KB, keys {key_kb:.0f}KB ({key_kb / text_kb:.0%})")
+        if key_kb >= text_kb:
+            failures.append("key indexes aren't smaller than the text ones")
+
+        print(f"\n{'filter':<22}{'text (ms)':>12}{'keys (ms)':>12}{'grants':>9}")
+        for dimension, column in (("country", models.Grant.refugee_country), ("category", models.Grant.category)):
+            for canonical, spellings in SPELLINGS[dimension].items():
+                def by_text():
+                    query = public_grants_query(db, now=now).filter(column == canonical)
+                    return query.offset(0).limit(args.limit).all()
+
+                def by_key(value=canonical):
+                    return public_grants_query(db, now=now, **{dimension: value}).offset(0).limit(args.limit).all()
+
+                text_ms, key_ms = _time(by_text, args.repeat), _time(by_key, args.repeat)
+                expected = [grant.id for grant in public_grants_query(db, now=now, **{dimension: canonical})]
+                print(f"{dimension + '=' + canonical:<22}{text_ms:>12.3f}{key_ms:>12.3f}{len(expected):>9}")
+
+                for spelling in spellings:
+                    found = [grant.id for grant in public_grants_query(db, now=now, **{dimension: spelling})]
+                    exact = public_grants_query(db, now=now).filter(column == spelling).count()
+                    print(f"  {spelling!r:<20}{'':>12}{'':>12}{len(found):>9}   (exact string match: {exact})")
+                    if found != expected:
+                        failures.append(f"{dimension}={spelling!r} found {len(found)} grants, {canonical!r} {len(expected)}")
+
+        rows = {"user": {"refugee_country": "Germny ", "category": "Housing"},
+                "admin": {"refugee_country": "Syria", "category": "Housing"}}
+        before = db.query(models.Country).count()
+        grant_dimensions.assign(db, [rows["user"]])
+        grant_dimensions.assign(db, [rows["admin"]], create=True)
+        print(f"\nUntrusted write: {rows['user']}\nTrusted write:   {rows['admin']}")
+        if rows["user"]["country_id"] is not None or rows["user"]["refugee_country"] != "Germny":
+            failures.append(f"untrusted write keyed its unknown country: {rows['user']}")
+        if rows["admin"]["country_id"] is None:
+            failures.append(f"trusted write didn't add its country: {rows['admin']}")
+        if db.query(models.Country).count() != before + 1:
+            failures.append("untrusted write added a canonical country")
+        db.add(models.Grant(title="Typo", organizer="Bench", apply_url="https://example.org",
+                            is_verified=True, is_active=True, **rows["user"]))
+        db.commit()
+        if [grant.title for grant in public_grants_query(db, now=now, country="Germny")] != ["Typo"]:
+            failures.append("the feed doesn't find a grant by its unmapped country")
+        country, _ = grant_dimensions.canonical_filters(db, " Germny ", None)
+        if [grant.title for grant in public_grants_query(db, now=now, country=country)] != ["Typo"]:
+            failures.append(f"unmapped country filter {country!r} isn't the form the grant was saved with")
+
+        started = time.perf_counter()
+        for _ in range(10000):
+            grant_dimensions.canonical_filters(db, "deu", "shelter")
+        print(f"\nCached alias resolution: {(time.perf_counter() - started) * 100:.2f}µs per (country, category)")
+
+        db.close()
+        engine.dispose()
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Dimension filters OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Public Feed Benchmark: Columnar Index vs SQLAlchemy
+
+Seeds a temporary SQLite database and times the /grants/public workload
+(query + schemas.Grant serialization) through the SQL path and through the
+in-memory columnar index.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.grant_index [--grants 20000] [--repeat 200]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.schemas import grant as schemas
+from app.services.grant_index import PublicGrantIndex
+from app.services.grant_queries import public_grants_query
+from benchmarks.query_plans import seed
+
+CASES = {
+    "all": {},
+    "country": {"country": "Germany"},
+    "country+category": {"country": "Germany", "category": "Housing"},
+    "deadline_window": {
+        "deadline_from": datetime.now() + timedelta(days=30),
+        "deadline_to": datetime.now() + timedelta(days=90),
+    },
+}
+
+
+def _time(fn, repeat: int) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Seeding {args.grants} grants...")
+        seed(engine, grants=args.grants)
+        db = sessionmaker(bind=engine)()
+
+        index = PublicGrantIndex(max_age_seconds=3600)
+        started = time.perf_counter()
+        index.rebuild(db)
+        print(f"Index build: {(time.perf_counter() - started) * 1000:.1f}ms for {len(index)} live grants\n")
+
+        print(f"{'case':<18}{'sql (ms)':>12}{'index (ms)':>12}{'speedup':>10}")
+        for name, filters in CASES.items():
+            def sql_path():
+                rows = public_grants_query(db, **filters).offset(0).limit(args.limit).all()
+                return [schemas.Grant.model_validate(row) for row in rows]
+
+            def index_path():
+                return index.query(skip=0, limit=args.limit, **filters)
+
+            sql_ms = _time(sql_path, args.repeat)
+            index_ms = _time(index_path, args.repeat)
+            print(f"{name:<18}{sql_ms:>12.3f}{index_ms:>12.3f}{sql_ms / index_ms:>9.1f}x")
+
+        db.close()
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
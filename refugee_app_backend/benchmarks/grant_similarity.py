@@ -0,0 +1,143 @@
+"""
+Similar Grants Benchmark: Build Time and Memory
+
+Seeds a temporary SQLite database and measures the batch side of
+app/services/grant_similarity.py over every seeded grant (not just the public
+ones), then the production paths:
+
+- vectorizing the catalogue into the hashed TF-IDF matrix, and its size
+- the chunked all-pairs top-k, and peak process memory
+- rebuild_similarities() over the public grants, including the table
+  rewrite, and its longest write transaction (the other writers' wait)
+- one incremental update as the background thread applies it: vectorize
+  and score the grant, rewrite its list and offer it to its neighbours,
+  committed
+- the /grants/{id}/similar lookup query
+
+Fails (exit code 1) if a rebuild transaction holds the database for longer
+than MAX_WRITE_SECONDS.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.grant_similarity [--grants 100000]
+"""
+
+import os
+import sys
+import argparse
+import resource
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from db import models
+from app.core.config import settings
+from app.services import grant_similarity
+from app.services.grant_queries import public_grants_query
+from benchmarks.query_plans import seed
+
+MAX_WRITE_SECONDS = 1.0
+
+
+def _max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    k = settings.SIMILAR_GRANTS_K
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Seeding {args.grants} grants...")
+        seed(engine, grants=args.grants)
+        db = sessionmaker(bind=engine)()
+
+        rows = db.query(models.Grant.id, models.Grant.title, models.Grant.description, models.Grant.eligibility).all()
+        rss_before = _max_rss_mb()
+        started = time.perf_counter()
+        model = grant_similarity.SimilarityModel.build(rows)
+        vectorize_s = time.perf_counter() - started
+        started = time.perf_counter()
+        pairs = sum(len(similar) for similar in model.neighbours(model.matrix, k, own_rows=range(len(rows))))
+        neighbours_s = time.perf_counter() - started
+        print(f"\nAll {len(rows)} grants (k={k}):")
+        print(f"  vectorize:      {vectorize_s:>8.2f}s  matrix {model.memory_bytes / 1024 / 1024:.1f}MB, "
+              f"{model.matrix.nnz / len(rows):.1f} terms/grant")
+        print(f"  top-k pairs:    {neighbours_s:>8.2f}s  {pairs} pairs")
+        print(f"  peak RSS delta: {_max_rss_mb() - rss_before:>8.1f}MB")
+
+        transactions = []  # Seconds from each transaction's first write to its commit
+        first_write = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _write_started(conn, cursor, statement, parameters, context, executemany):
+            if not first_write and not statement.lstrip().upper().startswith("SELECT"):
+                first_write.append(time.perf_counter())
+
+        @event.listens_for(engine, "commit")
+        def _committed(conn):
+            if first_write:
+                transactions.append(time.perf_counter() - first_write.pop())
+
+        started = time.perf_counter()
+        public = grant_similarity.rebuild_similarities(db)
+        longest = max(transactions)
+        print(f"\nrebuild_similarities ({len(public)} public grants, incl. table rewrite): "
+              f"{time.perf_counter() - started:.2f}s, {len(transactions)} write transactions, "
+              f"longest {longest:.2f}s")
+        failures = []
+        if longest > MAX_WRITE_SECONDS:
+            failures.append(f"a rebuild transaction held the database for {longest:.2f}s (max {MAX_WRITE_SECONDS}s)")
+
+        updater = grant_similarity.SimilarityUpdater()
+        updater._model = public
+        grants = iter(db.query(models.Grant.id, models.Grant.title, models.Grant.description,
+                               models.Grant.eligibility).filter(models.Grant.id.in_(public.ids[:args.repeat])).all())
+
+        def incremental():
+            # An edit of a public grant: its list and its neighbours' rewritten, then committed
+            updater._apply(db, grant_similarity._Change(upserted=[tuple(next(grants))]))
+
+        grant_id = public.ids[0]
+
+        def lookup():
+            public_grants_query(db).join(
+                models.GrantSimilarity, models.GrantSimilarity.similar_id == models.Grant.id
+            ).filter(models.GrantSimilarity.grant_id == grant_id).order_by(None).order_by(
+                models.GrantSimilarity.score.desc()
+            ).limit(6).all()
+
+        print(f"incremental update (incl. DB writes):   {_median_ms(incremental, args.repeat):.2f}ms")
+        print(f"endpoint lookup query:                  {_median_ms(lookup, args.repeat):.2f}ms")
+
+        db.close()
+        engine.dispose()
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Similar grants OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Grant Stats Benchmark: Write-Behind Counters and the Trending Job
+
+Against a temporary file-backed SQLite database seeded with seed_scale.py
+grants, measures what app/services/grant_stats.py replaces and adds:
+
+- view throughput from THREADS threads: GrantStatsRecorder.record() against
+  the obvious UPDATE grant_stats SET views = views + 1 per view (on a sample)
+- one flush of counts for FLUSH_GRANTS distinct grants (one batched upsert)
+- one trending run over every grant (decay + new counts in one UPDATE)
+- the trending feed: first page of GET /grants/public?sort=trending
+
+Fails (exit code 1) if the counts written by the flush differ from the views
+recorded, if the trending run takes longer than MAX_TRENDING_SECONDS (it
+runs every GRANT_TRENDING_INTERVAL_SECONDS on a live database), or if the
+trending feed leaves out a public grant: any before the first trending run
+(as with GRANT_STATS_ENABLED off), one submitted since the last run (its
+row added by add_grants), or one written without a row once the next run
+has added it.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.grant_stats [--grants 100000] [--views 200000]
+"""
+
+import os
+import sys
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import Session
+
+from db import models
+from app.services.grant_queries import public_grants_query, trending_grants_query
+from app.services.grant_stats import VIEW, GrantStatsRecorder, add_grants, update_trending
+from seed_scale import seed_scale
+
+THREADS = 8
+FLUSH_GRANTS = 50000
+UPDATE_SAMPLE = 2000
+MAX_TRENDING_SECONDS = 5.0
+
+
+def _in_threads(count: int, work):
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=100000)
+    parser.add_argument("--views", type=int, default=200000)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'stats.db')}")
+        seed_scale(engine, users=100, organizations=20, grants=args.grants, reset=True, password_hash="x")
+        with Session(engine) as db:
+            # No trending run yet, as with GRANT_STATS_ENABLED off: seed_scale added the rows, as submissions do
+            public = public_grants_query(db).count()
+            listed = trending_grants_query(db).count()
+            if listed != public:
+                failures.append(f"trending feed before the first run lists {listed} of {public} public grants")
+            update_trending(db, 0)
+            grant_ids = list(db.execute(select(models.Grant.id)).scalars())
+
+        # Popularity is skewed: most views go to a few grants
+        rng = random.Random(3)
+        weights = [1 / (rank + 1) for rank in range(len(grant_ids))]
+        per_thread = args.views // THREADS
+        views = [rng.choices(grant_ids, weights=weights, k=per_thread) for _ in range(THREADS)]
+
+        recorder = GrantStatsRecorder()
+        elapsed = _in_threads(THREADS, lambda i: [recorder.record(grant_id, VIEW) for grant_id in views[i]])
+        total = per_thread * THREADS
+        print(f"\nrecord():      {total / elapsed:>10.0f} views/s ({THREADS} threads)")
+
+        sample = UPDATE_SAMPLE // THREADS
+        stats = models.GrantStats
+
+        def update_per_view(i: int):
+            with Session(engine) as db:
+                for grant_id in views[i][:sample]:
+                    db.execute(update(stats).where(stats.grant_id == grant_id).values(views=stats.views + 1))
+                    db.commit()
+
+        elapsed = _in_threads(THREADS, update_per_view)
+        print(f"UPDATE / view: {sample * THREADS / elapsed:>10.0f} views/s ({THREADS} threads, "
+              f"{sample * THREADS} view sample)")
+
+        with Session(engine) as db:
+            db.execute(update(stats).values(views=0))
+            db.commit()
+            pending = sum(len(shard.counts) for shard in recorder._shards)  # Grants repeat across shards
+            started = time.perf_counter()
+            recorder.flush(db)
+            elapsed = time.perf_counter() - started
+            written = db.execute(select(func.sum(stats.views))).scalar()
+            print(f"\nFlush of {total} views over ~{pending} grants: {elapsed:.2f}s")
+            if written != total:
+                failures.append(f"flush wrote {written} views, {total} recorded")
+
+            # Many distinct grants at once, as after a crawl
+            for grant_id in rng.sample(grant_ids, min(FLUSH_GRANTS, len(grant_ids))):
+                recorder.record(grant_id, VIEW)
+            started = time.perf_counter()
+            recorder.flush(db)
+            print(f"Flush of {min(FLUSH_GRANTS, len(grant_ids))} distinct grants: "
+                  f"{time.perf_counter() - started:.2f}s")
+
+            started = time.perf_counter()
+            update_trending(db, 600)
+            elapsed = time.perf_counter() - started
+            print(f"\nTrending run over {len(grant_ids)} grants: {elapsed:.2f}s")
+            if elapsed > MAX_TRENDING_SECONDS:
+                failures.append(f"trending run took {elapsed:.2f}s (max {MAX_TRENDING_SECONDS}s)")
+
+            query = trending_grants_query(db, now=datetime.now()).limit(100)
+            started = time.perf_counter()
+            page = query.all()
+            print(f"Trending feed, first page: {(time.perf_counter() - started) * 1000:.1f}ms "
+                  f"({len(page)} grants)")
+
+            submitted, unlisted = (models.Grant(
+                title=title, organizer="Bench", apply_url="https://example.org", is_verified=True, is_active=True,
+            ) for title in ("Submitted after the trending run", "Written without a grant_stats row"))
+            db.add_all([submitted, unlisted])
+            db.flush()
+            add_grants(db, [submitted.id])  # As POST /grants/submit does
+            db.commit()
+            if (submitted.id,) not in trending_grants_query(db).with_entities(models.Grant.id).all():
+                failures.append("trending feed leaves out a grant submitted since the last trending run")
+            update_trending(db, 60)
+            if (unlisted.id,) not in trending_grants_query(db).with_entities(models.Grant.id).all():
+                failures.append("the trending run didn't add a row for a grant written without one")
+        engine.dispose()
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Grant stats OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
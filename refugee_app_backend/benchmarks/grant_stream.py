@@ -0,0 +1,266 @@
+"""
+Grant Stream Load Test: Thousands of Idle SSE Connections per Worker
+
+Boots app.main:app under uvicorn (one worker) and opens --connections
+GET /grants/stream connections from a single asyncio client, a third of
+them filtered to Germany, a third to France, the rest unfiltered. Then:
+
+- reports the worker's resident memory per open connection
+- submits a Germany grant as a trusted organization and times how long until
+  every unfiltered / Germany subscriber has the "grant" event (France
+  subscribers must not get it)
+- inserts a grant straight into the database, as another worker or the
+  importer would, and waits for the poll to stream it
+- deletes the submitted grant and times the "retire" event to every
+  subscriber
+- reconnects with the Last-Event-ID of the first event and checks the
+  missed events are replayed
+- stops the worker with every stream still open: it must exit once the
+  streams reach GRANT_STREAM_MAX_SECONDS
+
+Fails (exit code 1) if a connection is refused, an event is missing or
+misrouted, a fan-out takes longer than MAX_FANOUT_SECONDS or the worker
+doesn't shut down.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.grant_stream [--connections 5000]
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import models
+from benchmarks.load_test import PASSWORD, seed_load_users, start_server
+from benchmarks.query_plans import seed
+
+MAX_FANOUT_SECONDS = 2.0
+CONNECT_BATCH = 200
+POLL_SECONDS = 1
+STREAM_SECONDS = 20  # GRANT_STREAM_MAX_SECONDS: longer than the checks, short enough to wait for
+HEARTBEAT_SECONDS = 2
+SHUTDOWN_SECONDS = STREAM_SECONDS + HEARTBEAT_SECONDS + 5
+FILTERS = [None, "Germany", "France"]
+
+GRANT = {
+    "title": "Stream Test Housing Grant",
+    "organizer": "Stream Test Foundation",
+    "apply_url": "https://example.org/apply",
+    "refugee_country": "Germany",
+    "category": "Housing",
+    "deadline": "2030-01-01T00:00:00",
+}
+
+
+class Client:
+    """One SSE connection over a raw socket: cheap enough to open thousands."""
+
+    def __init__(self, country: Optional[str]):
+        self.country = country
+        self.events: List[Dict[str, str]] = []
+        self.received: Dict[str, float] = {}  # event name -> first arrival
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self, port: int, last_event_id: Optional[str] = None):
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+        query = f"?country={self.country}" if self.country else ""
+        resume = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id else ""
+        self.writer.write(f"GET /grants/stream{query} HTTP/1.1\r\nHost: bench\r\n{resume}\r\n".encode())
+        await self.writer.drain()
+        status = await self.reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(f"stream refused: {status!r}")
+        while (await self.reader.readline()) not in (b"\r\n", b""):
+            pass
+
+    async def read(self):
+        """Collect events until the connection closes (chunk framing lines are skipped)."""
+        event: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            line = line.rstrip(b"\r\n").decode()
+            if line == "" and event:
+                self.events.append(event)
+                self.received.setdefault(event.get("event", ""), time.perf_counter())
+                event = {}
+            elif ": " in line and not line.startswith(":"):
+                field, _, value = line.partition(": ")
+                if field in ("id", "event", "data"):
+                    event[field] = value
+
+    def close(self):
+        self.writer.close()
+
+
+def _rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def _wait_for(clients: List[Client], name: str, timeout: float) -> Optional[float]:
+    """Seconds from now until every client has an event `name`, None on timeout."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if all(name in client.received for client in clients):
+            return max(client.received[name] for client in clients) - started
+        await asyncio.sleep(0.01)
+    return None
+
+
+def _reset(clients: List[Client]):
+    for client in clients:
+        client.received.clear()
+
+
+async def run(port: int, connections: int, server: subprocess.Popen, engine, failures: List[str]):
+    base = f"http://127.0.0.1:{port}"
+    rss_idle = _rss_kb(server.pid)
+    clients = [Client(FILTERS[i % len(FILTERS)]) for i in range(connections)]
+    started = time.perf_counter()
+    for start in range(0, connections, CONNECT_BATCH):
+        await asyncio.gather(*(client.connect(port) for client in clients[start:start + CONNECT_BATCH]))
+    readers = [asyncio.ensure_future(client.read()) for client in clients]
+    print(f"{connections} connections open in {time.perf_counter() - started:.1f}s")
+    metrics = requests.get(f"{base}/metrics", timeout=5).text
+    subscribers = [line for line in metrics.splitlines() if line.startswith("relivo_grant_stream_subscribers")]
+    print(f"  {subscribers[0] if subscribers else 'subscriber gauge missing'}")
+    rss_open = _rss_kb(server.pid)
+    print(f"  worker RSS {rss_idle / 1024:.0f} MB idle, {rss_open / 1024:.0f} MB with the streams open "
+          f"(~{(rss_open - rss_idle) / connections:.1f} KB per connection)")
+
+    loop = asyncio.get_running_loop()
+    token = (await loop.run_in_executor(None, lambda: requests.post(
+        f"{base}/auth/login", json={"email": "loadtest0@example.org", "password": PASSWORD}, timeout=30
+    ))).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    interested = [client for client in clients if client.country in (None, "Germany")]
+    others = [client for client in clients if client.country == "France"]
+
+    sent = time.perf_counter()
+    response = await loop.run_in_executor(None, lambda: requests.post(
+        f"{base}/grants/submit", json=GRANT, headers=auth, timeout=30
+    ))
+    grant_id = response.json()["id"]
+    elapsed = await _wait_for(interested, "grant", MAX_FANOUT_SECONDS * 5)
+    if elapsed is None:
+        failures.append(f"'grant' event missing on {sum('grant' not in c.received for c in interested)} connections")
+    else:
+        total = max(c.received["grant"] for c in interested) - sent
+        print(f"\n'grant' to {len(interested)} subscribers: {total * 1000:.0f}ms after submit")
+        if total > MAX_FANOUT_SECONDS:
+            failures.append(f"'grant' fan-out took {total:.2f}s")
+    if any("grant" in client.received for client in others):
+        failures.append("France subscribers got a Germany grant")
+    first_id = clients[0].events[0]["id"] if clients[0].events else None
+
+    # Written by "another process": only the poll can find it
+    _reset(clients)
+    db = sessionmaker(bind=engine)()
+    db.add(models.Grant(**{**GRANT, "title": "Imported elsewhere", "deadline": datetime(2030, 1, 1)},
+                        is_verified=True, is_active=True))
+    db.commit()
+    db.close()
+    elapsed = await _wait_for(interested, "grant", POLL_SECONDS * 5)
+    if elapsed is None:
+        failures.append("grant from another process not streamed")
+    else:
+        print(f"grant from another process: streamed after {elapsed * 1000:.0f}ms (poll every {POLL_SECONDS}s)")
+
+    _reset(clients)
+    sent = time.perf_counter()
+    await loop.run_in_executor(None, lambda: requests.delete(
+        f"{base}/grants/my-submissions/{grant_id}", headers=auth, timeout=30
+    ))
+    if await _wait_for(clients, "retire", MAX_FANOUT_SECONDS * 5) is None:
+        failures.append("'retire' event missing")
+    else:
+        total = max(c.received["retire"] for c in clients) - sent
+        print(f"'retire' to {len(clients)} subscribers: {total * 1000:.0f}ms after delete")
+        if total > MAX_FANOUT_SECONDS:
+            failures.append(f"'retire' fan-out took {total:.2f}s")
+
+    if first_id:
+        resumed = Client(None)
+        await resumed.connect(port, last_event_id=first_id)
+        reader = asyncio.ensure_future(resumed.read())
+        await asyncio.sleep(0.5)
+        names = [event.get("event") for event in resumed.events]
+        print(f"resume after {first_id}: replayed {names}")
+        if names[:2] != ["grant", "retire"]:
+            failures.append(f"Last-Event-ID resume replayed {names}")
+        resumed.close()
+        reader.cancel()
+
+    # Uvicorn waits for open responses: streams must end by themselves
+    started = time.perf_counter()
+    server.terminate()
+    try:
+        await loop.run_in_executor(None, server.wait, SHUTDOWN_SECONDS)
+        print(f"\nGraceful shutdown with {connections} streams open: {time.perf_counter() - started:.1f}s "
+              f"(GRANT_STREAM_MAX_SECONDS={STREAM_SECONDS})")
+    except subprocess.TimeoutExpired:
+        failures.append(f"worker still shutting down after {SHUTDOWN_SECONDS}s")
+
+    for client in clients:
+        client.close()
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'stream.db')}"
+        engine = create_engine(database_url)
+        seed(engine, grants=1000)
+        seed_load_users(engine, count=1)
+
+        server = start_server(database_url, args.port, 1, GRANT_STREAM_POLL_SECONDS=str(POLL_SECONDS),
+                              GRANT_STREAM_MAX_SECONDS=str(STREAM_SECONDS),
+                              GRANT_STREAM_HEARTBEAT_SECONDS=str(HEARTBEAT_SECONDS),
+                              WARM_UP_ENABLED="false", FEED_SNAPSHOT_ENABLED="false",
+                              GRANT_STREAM_MAX_SUBSCRIBERS=str(args.connections + 10))
+        try:
+            asyncio.run(run(args.port, args.connections, server, engine, failures))
+        finally:
+            if server.poll() is None:
+                server.kill()
+                server.wait()
+        engine.dispose()
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("✅ Grant stream OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
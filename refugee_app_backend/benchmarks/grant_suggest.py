@@ -0,0 +1,104 @@
+"""
+Typeahead Benchmark: Prefix Index vs SQL LIKE
+
+Seeds a temporary SQLite database and times /grants/suggest lookups for
+prefixes of increasing length through the in-memory prefix index and through
+a case-insensitive SQL LIKE on titles (what the endpoint would otherwise run
+per keystroke). Also reports the index build time and its memory.
+
+Fails (exit code 1) when the index's p95 lookup exceeds the budget.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.grant_suggest [--grants 20000] [--budget-ms 1]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import models
+from app.services.grant_queries import public_grants_query
+from app.services.grant_suggest import GrantSuggestIndex
+from benchmarks.query_plans import seed
+
+# Keystroke sequences a user might type
+PREFIXES = ["h", "ho", "hou", "housing", "housing emer", "ed", "educ", "unh", "berl", "fam yo", "zzz"]
+
+
+def _time(fn: Callable[[], object], repeat: int) -> Tuple[float, float]:
+    """(median, p95) milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="p95 budget per index lookup")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Seeding {args.grants} grants...")
+        seed(engine, grants=args.grants)
+        db = sessionmaker(bind=engine)()
+
+        index = GrantSuggestIndex(max_age_seconds=3600)
+        tracemalloc.start()
+        started = time.perf_counter()
+        index.rebuild(db)
+        build_ms = (time.perf_counter() - started) * 1000
+        memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+        print(f"Index build: {build_ms:.1f}ms for {len(index)} grants, "
+              f"{index.token_count} tokens, ~{memory_mb:.1f}MB\n")
+
+        print(f"{'prefix':<16}{'hits':>6}{'sql p50':>10}{'index p50':>11}{'index p95':>11}")
+        for prefix in PREFIXES:
+            def sql_path():
+                return public_grants_query(db).filter(
+                    models.Grant.title.ilike(f"%{prefix}%")
+                ).with_entities(models.Grant.id, models.Grant.title).limit(args.limit).all()
+
+            def index_path():
+                return index.suggest(prefix, args.limit)
+
+            hits = len(index_path())
+            sql_ms, _ = _time(sql_path, max(args.repeat // 10, 5))
+            index_ms, index_p95 = _time(index_path, args.repeat)
+            print(f"{prefix!r:<16}{hits:>6}{sql_ms:>10.3f}{index_ms:>11.3f}{index_p95:>11.3f}")
+            if index_p95 > args.budget_ms:
+                failures.append(f"{prefix!r}: p95 {index_p95:.3f}ms > {args.budget_ms}ms")
+
+        db.close()
+        engine.dispose()
+
+    if failures:
+        print("\n❌ Typeahead lookups over budget:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ All typeahead lookups within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
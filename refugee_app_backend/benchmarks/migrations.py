@@ -0,0 +1,164 @@
+"""
+Migration Upgrade Check: a Pre-Migration Database to the Latest Version
+
+Fresh databases get the current schema from migration 1 (create_all), so
+they never run the later migrations against the tables those were written
+for. This check builds the schema the app had before versioned migrations
+(BASELINE_SCHEMA, SQLite), adds a few grants and runs db.migrate to the
+latest version, as a deploy of an old installation does.
+
+Fails (exit code 1) if a migration raises, if the grants table doesn't end
+up with exactly the current model's indexes (no legacy ones left), if the
+backfills left a grant without its country / category keys, compiled
+criteria or grant_stats row (the trending feed), or if migrating again
+applies anything.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.migrations
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, inspect, text
+
+from db import models
+from db.migrate import current_version, latest_version, migrate
+
+# What create_all made of db/models.py before db/migrate.py existed
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL PRIMARY KEY, email VARCHAR(255) NOT NULL, hashed_password VARCHAR(255) NOT NULL,
+    full_name VARCHAR(255), is_active BOOLEAN, is_verified BOOLEAN, role VARCHAR(50),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE INDEX ix_users_id ON users (id);
+CREATE TABLE verification_codes (
+    id INTEGER NOT NULL PRIMARY KEY, email VARCHAR(255) NOT NULL, code VARCHAR(10) NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX ix_verification_codes_email ON verification_codes (email);
+CREATE INDEX ix_verification_codes_id ON verification_codes (id);
+CREATE INDEX ix_verification_email_code ON verification_codes (email, code);
+CREATE TABLE organizations (
+    id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL, name VARCHAR(200) NOT NULL, description TEXT,
+    verification_documents JSON, status VARCHAR(50), website VARCHAR(200), contact_email VARCHAR(200),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME
+);
+CREATE INDEX ix_organizations_id ON organizations (id);
+CREATE INDEX ix_organizations_name ON organizations (name);
+CREATE INDEX ix_organizations_status ON organizations (status);
+CREATE INDEX ix_organizations_user_id ON organizations (user_id);
+CREATE TABLE grants (
+    id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(500) NOT NULL, organizer VARCHAR(200) NOT NULL,
+    deadline DATETIME, description TEXT, eligibility TEXT, apply_url VARCHAR(500) NOT NULL, source VARCHAR(50),
+    external_id VARCHAR(100), refugee_country VARCHAR(100), is_verified BOOLEAN, is_active BOOLEAN,
+    rejection_reason TEXT, creator_id INTEGER REFERENCES users (id),
+    organization_id INTEGER REFERENCES organizations (id), amount VARCHAR(100), location VARCHAR(200),
+    eligibility_criteria JSON, required_documents JSON, category VARCHAR(100),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME
+);
+CREATE INDEX ix_grants_category ON grants (category);
+CREATE INDEX ix_grants_country_verified ON grants (refugee_country, is_verified);
+CREATE INDEX ix_grants_creator_id ON grants (creator_id);
+CREATE INDEX ix_grants_deadline ON grants (deadline);
+CREATE INDEX ix_grants_deadline_verified ON grants (deadline, is_verified);
+CREATE UNIQUE INDEX ix_grants_external_id ON grants (external_id);
+CREATE INDEX ix_grants_id ON grants (id);
+CREATE INDEX ix_grants_is_active ON grants (is_active);
+CREATE INDEX ix_grants_is_verified ON grants (is_verified);
+CREATE INDEX ix_grants_organization_id ON grants (organization_id);
+CREATE INDEX ix_grants_refugee_country ON grants (refugee_country);
+CREATE INDEX ix_grants_source ON grants (source);
+CREATE INDEX ix_grants_title ON grants (title);
+CREATE INDEX ix_grants_verified_active ON grants (is_verified, is_active);
+"""
+
+# (refugee_country, category, eligibility_criteria JSON) as old installations have them
+GRANTS = [
+    ("Germany", "Housing", '["Refugees"]'),
+    ("germany", "General", '["residence: DE"]'),
+    ("DE ", "shelter", None),
+    ("Syria", "Legal", '["Families with children under 5"]'),
+    (None, None, None),
+]
+
+
+def _index_names(engine, table: str) -> set:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def main() -> int:
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'baseline.db')}")
+        with engine.begin() as conn:
+            for statement in BASELINE_SCHEMA.split(";"):
+                if statement.strip():
+                    conn.exec_driver_sql(statement)
+            for i, (country, category, criteria) in enumerate(GRANTS):
+                conn.execute(text(
+                    "INSERT INTO grants (title, organizer, apply_url, refugee_country, category, eligibility_criteria, "
+                    "is_verified, is_active) VALUES (:title, 'Org', 'https://example.org', :country, :category, "
+                    ":criteria, 1, 1)"
+                ), {"title": f"Grant {i}", "country": country, "category": category, "criteria": criteria})
+
+        try:
+            applied = migrate(engine)
+        except Exception as e:
+            failures.append(f"migrating the baseline schema failed: {e!r}")
+            applied = []
+        print(f"Applied migrations {applied}; schema version {current_version(engine)} (latest {latest_version()})")
+
+        if not failures:
+            indexes = _index_names(engine, "grants")
+            for index in models.Grant.__table__.indexes:
+                if index.name not in indexes:
+                    failures.append(f"missing index {index.name}")
+            for name in models.LEGACY_GRANT_INDEXES:
+                if name in indexes:
+                    failures.append(f"legacy index {name} left behind")
+
+            with engine.connect() as conn:
+                rows = conn.execute(text(
+                    "SELECT refugee_country, country_id, category, category_id, eligibility_criteria, "
+                    "eligibility_mask, eligibility_countries FROM grants ORDER BY id"
+                )).all()
+            for row in rows:
+                print(f"  {row.refugee_country!r:>10} -> {row.country_id!r:<5}{row.category!r:>12} -> "
+                      f"{row.category_id!r:<5}{row.eligibility_criteria}")
+                if (row.refugee_country is None) != (row.country_id is None):
+                    failures.append(f"country {row.refugee_country!r} has key {row.country_id!r}")
+                if (row.category is None) != (row.category_id is None):
+                    failures.append(f"category {row.category!r} has key {row.category_id!r}")
+                if row.eligibility_criteria and row.eligibility_mask is None and row.eligibility_countries is None:
+                    failures.append(f"criteria {row.eligibility_criteria} not compiled")
+            with engine.connect() as conn:
+                unlisted = conn.execute(text(
+                    "SELECT COUNT(*) FROM grants WHERE id NOT IN (SELECT grant_id FROM grant_stats)"
+                )).scalar()
+            if unlisted:
+                failures.append(f"{unlisted} grants without a grant_stats row")
+            if len({row.country_id for row in rows[:3]}) != 1:
+                failures.append("spellings of Germany got different country keys")
+
+            again = migrate(engine)
+            if again:
+                failures.append(f"migrating again applied {again}")
+        engine.dispose()
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Baseline schema migrates to the latest version")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
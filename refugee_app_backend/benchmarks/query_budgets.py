@@ -0,0 +1,151 @@
+"""
+Per-Endpoint SQL Query Budgets
+
+Drives the API in-process against a temporary SQLite database and fails
+(exit code 1) if any endpoint issues more SQL statements than its budget,
+so N+1s and accidental extra round trips are caught in CI.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.query_budgets
+"""
+
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="relivo-budgets-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'budgets.db')}"
+os.environ["DATABASE_READ_URL"] = ""
+# Background publishers / warm-up would otherwise show up in the captures
+os.environ["FEED_SNAPSHOT_ENABLED"] = "false"
+os.environ["WARM_UP_ENABLED"] = "false"
+os.environ["SIMILAR_GRANTS_ENABLED"] = "false"  # Its background updater too
+os.environ["SAVED_SEARCHES_ENABLED"] = "false"  # And the saved search matcher
+os.environ["GRANT_STATS_ENABLED"] = "false"  # And the view counter flushes
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core import security
+from db import models
+from db.session import SessionLocal, engine
+from db.migrate import migrate
+from db.query_stats import assert_max_queries
+from app.services import grant_dimensions
+
+PASSWORD = "budget-password"
+
+GRANT = {
+    "title": "Emergency Housing Assistance",
+    "organizer": "UN Refugee Agency",
+    "apply_url": "https://example.org/apply",
+    "refugee_country": "Germany",
+    "category": "Housing",
+    "deadline": "2030-01-01T00:00:00",
+}
+
+
+def _seed_users():
+    db = SessionLocal()
+    try:
+        hashed = security.get_password_hash(PASSWORD)
+        org_user = models.User(email="org@example.org", hashed_password=hashed, is_verified=True, role="organization")
+        db.add(org_user)
+        db.flush()
+        db.add(models.Organization(user_id=org_user.id, name="Example Org", status="approved"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def main() -> int:
+    failures = []
+
+    def check(label: str, limit: int, call):
+        try:
+            with assert_max_queries(limit, label) as stats:
+                response = call()
+            if response.status_code != 304:  # Not Modified is a success here
+                response.raise_for_status()
+            print(f"  [ok] {label}: {stats.count}/{limit}")
+            return response
+        except AssertionError as e:
+            failures.append(str(e))
+            print(f"  [FAIL] {e}")
+
+    migrate(engine)
+    _seed_users()
+    db = SessionLocal()
+    grant_dimensions.ensure_fresh(db)  # Alias map loaded, as by the warm-up
+    db.close()
+    with TestClient(app) as client:
+        login = check("POST /auth/login", 1, lambda: client.post(
+            "/auth/login", json={"email": "org@example.org", "password": PASSWORD}
+        ))
+        auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        check("GET /auth/me", 1, lambda: client.get("/auth/me", headers=auth))
+        # user, organization, duplicate candidates, INSERT, grant_stats + fingerprint + LSH buckets INSERTs,
+        # refresh SELECT
+        submitted = check("POST /grants/submit", 8, lambda: client.post("/grants/submit", json=GRANT, headers=auth))
+        grant_id = submitted.json()["id"]
+        # user, bucket lookup, candidate signatures, organization, INSERT ... RETURNING,
+        # grant_stats + fingerprint + LSH buckets INSERTs, reload: the same for 1 or GRANT_BATCH_MAX_ITEMS grants
+        check("POST /grants/submit/batch", 9, lambda: client.post("/grants/submit/batch", json=[
+            {**GRANT, "title": f"Batch {word} grant", "description": f"{word} support for families in need"}
+            for word in ("housing", "school", "clinic", "legal", "job")
+        ], headers=auth))
+        # First call rebuilds the columnar (or typeahead) index, later ones are served from it
+        check("GET /grants/public (cold)", 1, lambda: client.get("/grants/public"))
+        check("GET /grants/public (warm)", 0, lambda: client.get("/grants/public?country=Germany"))
+        check("GET /grants/public?sort=trending", 1, lambda: client.get("/grants/public?sort=trending"))
+        check("GET /grants/public (MessagePack)", 0, lambda: client.get(
+            "/grants/public?country=Germany", headers={"Accept": "application/msgpack"}
+        ))
+        check("GET /grants/{id}", 1, lambda: client.get(f"/grants/{grant_id}"))
+        batch_get = check("POST /grants/batch-get", 1, lambda: client.post(
+            "/grants/batch-get", json={"ids": list(range(1, 501))}
+        ))
+        check("POST /grants/batch-get (304)", 1, lambda: client.post(
+            "/grants/batch-get", json={"ids": list(range(1, 501))},
+            headers={"If-None-Match": batch_get.headers["ETag"]},
+        ))
+        # Counted in memory, written behind
+        check("POST /grants/{id}/view", 0, lambda: client.post(f"/grants/{grant_id}/view"))
+        check("GET /grants/suggest (cold)", 1, lambda: client.get("/grants/suggest?prefix=hou"))
+        check("GET /grants/suggest (warm)", 0, lambda: client.get("/grants/suggest?prefix=hous"))
+        # grant, same-category fallback (the neighbour table lookup replaces it when enabled)
+        check("GET /grants/{id}/similar", 2, lambda: client.get(f"/grants/{grant_id}/similar"))
+        # user, per-user count, INSERT, refresh SELECT
+        saved = check("POST /saved-searches/", 4, lambda: client.post(
+            "/saved-searches/", json={"category": "Housing", "refugee_country": "Germany"}, headers=auth
+        ))
+        check("GET /saved-searches/", 2, lambda: client.get("/saved-searches/", headers=auth))
+        check("PUT /eligibility/profile", 4, lambda: client.put(
+            "/eligibility/profile", json={"status": "refugee", "residence_country": "Germany"}, headers=auth
+        ))
+        check("GET /grants/eligible", 2, lambda: client.get("/grants/eligible", headers=auth))
+        # user, search, matches DELETE, DELETE
+        check("DELETE /saved-searches/{id}", 4, lambda: client.delete(
+            f"/saved-searches/{saved.json()['id']}", headers=auth
+        ))
+        check("GET /grants/my-submissions", 2, lambda: client.get("/grants/my-submissions", headers=auth))
+        # user, grant, organization, UPDATE, refresh SELECT
+        check("PUT /grants/my-submissions/{id}", 5, lambda: client.put(
+            f"/grants/my-submissions/{grant_id}", json={"amount": "€5,000"}, headers=auth
+        ))
+        # user, grant, organization, LSH buckets + fingerprint DELETEs, clear duplicate_of_id, DELETE
+        check("DELETE /grants/my-submissions/{id}", 7, lambda: client.delete(
+            f"/grants/my-submissions/{grant_id}", headers=auth
+        ))
+
+    if failures:
+        print("❌ Query budget exceeded")
+        return 1
+    print("✅ All endpoints within their query budgets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
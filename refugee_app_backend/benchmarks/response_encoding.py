@@ -0,0 +1,154 @@
+"""
+Response Encoding Benchmark: Size and Encode Time of a 1000-Grant Page
+
+Loads a page of public grants from a temporary seed_scale.py database and
+encodes it the ways /grants/public can answer (app/services/grant_encoding.py):
+
+- JSON through the response model, as FastAPI does for the default Accept
+- columnar JSON (keys once, epoch dates, dictionary-coded category / country)
+- MessagePack of the same columnar document
+
+Reports body size raw and gzipped (GZIP_LEVEL, as GZipMiddleware sends it to
+clients that accept it) and encode time per page, relative to plain JSON.
+Fails (exit code 1) if a compact encoding isn't smaller than JSON or doesn't
+decode back to the grants of the JSON body. Runs in a server time zone
+other than UTC (SERVER_TZ), where naive dates are easy to get wrong.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.response_encoding [--page 1000]
+"""
+
+import os
+import sys
+import argparse
+import gzip
+import json
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, List
+
+SERVER_TZ = "Asia/Kolkata"  # UTC+05:30, no DST
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ["TZ"] = SERVER_TZ
+if hasattr(time, "tzset"):
+    time.tzset()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.schemas import grant as schemas
+from app.services import grant_encoding
+from app.services.grant_queries import public_grants_query
+from benchmarks.query_plans import seed
+
+REPEATS = 20
+GRANT_LIST = TypeAdapter(List[schemas.Grant])
+
+
+def _json(grants) -> bytes:
+    # What FastAPI does with response_model=List[schemas.Grant]
+    validated = GRANT_LIST.validate_python(grants, from_attributes=True)
+    return json.dumps(GRANT_LIST.dump_python(validated, mode="json")).encode()
+
+
+def _time(encode: Callable[[], bytes]) -> float:
+    encode()
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        encode()
+    return (time.perf_counter() - started) / REPEATS
+
+
+def _local(value: datetime) -> datetime:
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+def _from_json(body: bytes) -> List[dict]:
+    """Rows of a JSON body, dates as naive local datetimes to the second."""
+    rows = json.loads(body)
+    for row in rows:
+        for field in grant_encoding.DATETIME_FIELDS:
+            if row[field] is not None:
+                row[field] = _local(datetime.fromisoformat(row[field])).replace(microsecond=0)
+    return rows
+
+
+def _decode(document: dict) -> List[dict]:
+    """Rows back from a columnar document, dates as naive local datetimes."""
+    columns, dictionaries = document["columns"], document["dictionaries"]
+    rows = []
+    for i in range(document["count"]):
+        row = {}
+        for field, values in columns.items():
+            value = values[i]
+            if value is not None and field in grant_encoding.DATETIME_FIELDS:
+                value = datetime.fromtimestamp(value)
+            elif value is not None and field in dictionaries:
+                value = dictionaries[field][value]
+            row[field] = value
+        rows.append(row)
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'encoding.db')}")
+        seed(engine, grants=max(5000, args.page * 3))
+        db = sessionmaker(bind=engine)()
+        grants = [schemas.Grant.model_validate(grant) for grant in public_grants_query(db).limit(args.page).all()]
+        db.close()
+        engine.dispose()
+
+    encoders = {
+        "JSON": lambda: _json(grants),
+        "columnar JSON": lambda: grant_encoding.encode(grants, grant_encoding.COLUMNS_JSON),
+    }
+    if grant_encoding.HAS_MSGPACK:
+        encoders["MessagePack"] = lambda: grant_encoding.encode(grants, grant_encoding.MSGPACK)
+    else:
+        print("msgpack not installed: MessagePack skipped")
+
+    print(f"{len(grants)} grants per page, gzip level {settings.GZIP_LEVEL}\n")
+    print(f"{'encoding':<16}{'raw KB':>9}{'gzip KB':>9}{'vs JSON':>9}{'encode ms':>11}{'+gzip ms':>10}")
+    failures = []
+    baseline = None
+    for name, encode in encoders.items():
+        body = encode()
+        compressed = gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+        encode_seconds = _time(encode)
+        gzip_seconds = _time(lambda: gzip.compress(body, compresslevel=settings.GZIP_LEVEL))
+        if baseline is None:
+            baseline = (len(body), len(compressed), encode_seconds)
+        print(f"{name:<16}{len(body) / 1024:>9.1f}{len(compressed) / 1024:>9.1f}"
+              f"{len(compressed) / baseline[1]:>8.0%} {encode_seconds * 1000:>10.2f}{gzip_seconds * 1000:>10.2f}")
+        if name == "JSON":
+            continue
+        if len(compressed) >= baseline[1]:
+            failures.append(f"{name} is not smaller than JSON once gzipped")
+        if name == "MessagePack":
+            import msgpack
+            document = msgpack.unpackb(body, raw=False)
+        else:
+            document = json.loads(body)
+        if _decode(document) != _from_json(encoders["JSON"]()):
+            failures.append(f"{name} doesn't decode back to the grants of the JSON body")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("\n✅ Compact encodings smaller and lossless (dates to the second)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
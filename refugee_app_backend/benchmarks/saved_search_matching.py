@@ -0,0 +1,119 @@
+"""
+Saved Search Matching Benchmark: Throughput with 100k Searches
+
+Builds the saved search index of app/services/saved_searches.py over
+synthetic searches (category / country mixes weighted like seed_scale.py,
+keywords from a Zipf-distributed vocabulary, some deadline windows) and
+matches synthetic new public grants against it:
+
+- index build time
+- grants matched per second, searches checked in full per grant
+- the same for a plain scan over every search, on a sample
+
+Fails (exit code 1) if the index and the scan disagree on any sampled grant.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.saved_search_matching [--searches 100000] [--grants 5000]
+"""
+
+import os
+import sys
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.saved_searches import GrantFacts, SavedSearchIndex
+from app.services.text import tokenize
+from seed_scale import CATEGORY_WEIGHTS, COUNTRY_WEIGHTS
+
+VOCABULARY = [f"term{i}" for i in range(5000)]
+WORD_WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+SCAN_SAMPLE = 200
+
+# Share of searches per shape; most people filter by place and topic
+SHAPES = {"category+country": 40, "category": 15, "country": 10, "keywords": 20,
+          "keywords+category": 10, "deadline only": 1, "category+window": 4}
+
+
+def _pick(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _search(rng: random.Random, now: datetime):
+    shape = _pick(rng, SHAPES)
+    category = _pick(rng, CATEGORY_WEIGHTS) if "category" in shape else None
+    country = _pick(rng, {k: v for k, v in COUNTRY_WEIGHTS.items() if k}) if "country" in shape else None
+    keywords = None
+    if "keywords" in shape:
+        # Content words people type, not the ubiquitous head of the vocabulary
+        keywords = " ".join(rng.choices(VOCABULARY[20:2000], k=rng.randint(1, 2)))
+    deadline_from = deadline_to = None
+    if "window" in shape or "deadline" in shape:
+        deadline_from = now + timedelta(days=rng.randint(0, 60))
+        deadline_to = deadline_from + timedelta(days=rng.randint(7, 120))
+    return category, country, keywords, deadline_from, deadline_to, rng.choice(("daily", "instant"))
+
+
+def _grant(rng: random.Random, grant_id: int, now: datetime) -> GrantFacts:
+    words = rng.choices(VOCABULARY, weights=WORD_WEIGHTS, k=rng.randint(20, 80))
+    deadline = now + timedelta(days=rng.randint(1, 365)) if rng.random() < 0.8 else None
+    return GrantFacts(grant_id, _pick(rng, CATEGORY_WEIGHTS), _pick(rng, COUNTRY_WEIGHTS), deadline,
+                      frozenset(tokenize(" ".join(words))))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=100000)
+    parser.add_argument("--grants", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    now = datetime.now()
+    rows = [(search_id, *_search(rng, now)) for search_id in range(1, args.searches + 1)]
+    grants = [_grant(rng, grant_id, now) for grant_id in range(1, args.grants + 1)]
+
+    started = time.perf_counter()
+    index = SavedSearchIndex()
+    for row in rows:
+        index.add(*row)
+    print(f"Index of {len(index)} searches built in {time.perf_counter() - started:.2f}s "
+          f"({len(index._anchored)} anchor keys)")
+
+    checked = matched = 0
+    started = time.perf_counter()
+    for grant in grants:
+        matched += len(index.match(grant))
+    elapsed = time.perf_counter() - started
+    for grant in grants:
+        keys = [("any",), ("category", grant.category), ("country", grant.country),
+                ("place", grant.category, grant.country)] + [("keyword", token) for token in grant.tokens]
+        checked += sum(len(index._anchored.get(key, ())) for key in keys)
+    print(f"\nIndex: {len(grants) / elapsed:>9.0f} grants/s  {elapsed / len(grants) * 1000:.3f}ms/grant  "
+          f"{checked / len(grants):.0f} searches checked, {matched / len(grants):.1f} matched per grant")
+
+    # Baseline: check every search against every grant
+    searches = [search for bucket in index._anchored.values() for search in bucket]
+    sample = grants[:SCAN_SAMPLE]
+    mismatches = 0
+    started = time.perf_counter()
+    scanned = [{search.id for search in searches if search.matches(grant)} for grant in sample]
+    elapsed = time.perf_counter() - started
+    print(f"Scan:  {len(sample) / elapsed:>9.0f} grants/s  {elapsed / len(sample) * 1000:.3f}ms/grant  "
+          f"{len(searches)} searches checked per grant")
+    for grant, expected in zip(sample, scanned):
+        if {search.id for search in index.match(grant)} != expected:
+            mismatches += 1
+
+    if mismatches:
+        print(f"\nFAIL: index and scan disagree on {mismatches}/{len(sample)} grants")
+        return 1
+    print(f"\nIndex and scan agree on all {len(sample)} sampled grants")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+SQLite Mode Benchmark: NullPool vs Pooled WAL
+
+Runs the same HTTP workloads against a seeded SQLite file with the legacy
+configuration (SQLITE_POOLED=false: a new connection per request, rollback
+journal, default pragmas) and with the pooled WAL mode from db/sqlite.py:
+
+- feed: public feed reads (index and snapshot off, so every read hits SQLite)
+- submit: concurrent grant submissions (errors = "database is locked")
+- mixed: both at once
+
+Fails (exit code 1) if any pooled WAL request errors: its writer queue is
+meant to make "database is locked" impossible at this load.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.sqlite_mode [--clients 16] [--duration 10] [--workers 2]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+from typing import Dict
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+
+from benchmarks.load_test import drive, print_summary, seed_load_users, start_server
+from benchmarks.query_plans import seed
+
+CONFIGS = {
+    "nullpool (legacy)": {"SQLITE_POOLED": "false"},
+    "pooled WAL": {"SQLITE_POOLED": "true"},
+}
+WORKLOADS = {
+    "feed": {"public_feed": 60, "public_feed_country": 40},
+    "submit": {"submit": 100},
+    "mixed": {"public_feed": 50, "public_feed_country": 20, "my_submissions": 15, "submit": 15},
+}
+# Keep reads on SQLite instead of the in-memory index / mmap snapshot
+READ_PATH_ENV = {"GRANT_INDEX_ENABLED": "false", "FEED_SNAPSHOT_ENABLED": "false"}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grants", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per workload")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for config, env in CONFIGS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{os.path.join(tmp, 'mode.db')}"
+            engine = create_engine(database_url)
+            seed(engine, grants=args.grants)
+            emails = seed_load_users(engine)
+            engine.dispose()
+
+            server = start_server(database_url, args.port, args.workers, **env, **READ_PATH_ENV)
+            try:
+                for workload, mix in WORKLOADS.items():
+                    print(f"{config} / {workload}: {args.clients} clients, {args.duration:.0f}s")
+                    summary = drive(f"http://127.0.0.1:{args.port}", emails, args.clients, args.duration, mix)
+                    print_summary(summary)
+                    print()
+                    results[f"{config} / {workload}"] = summary
+            finally:
+                server.terminate()
+                server.wait()
+
+    failures = []
+    print(f"{'run':<32}{'req/s':>9}{'errors':>8}{'p95 ms (worst endpoint)':>26}")
+    for run, summary in results.items():
+        rps = sum(row["rps"] for row in summary.values())
+        errors = sum(row["errors"] for row in summary.values())
+        p95 = max(row["p95_ms"] for row in summary.values())
+        print(f"{run:<32}{rps:>9.1f}{errors:>8}{p95:>26}")
+        if run.startswith("pooled WAL") and errors:
+            failures.append(f"{run}: {errors} errors")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Cold Start Budget
+
+Measures what a fresh API process costs before it can serve traffic:
+
+- `python -X importtime -c "import app.main"`: median cumulative import time
+  and the slowest top-level imports
+- modules that must stay out of the import path (importer, email, hashing
+  backends, NumPy / SciPy; all loaded lazily or by the background warm-up)
+- time from spawning uvicorn to the first response, and to the first
+  /grants/public response
+
+Fails (exit code 1) when a budget is exceeded or a deferred module is
+imported eagerly again.
+
+Usage (from refugee_app_backend/):
+    python -m benchmarks.startup [--import-budget-ms 1500] [--ttfr-budget-ms 3000]
+"""
+
+import os
+import sys
+import argparse
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from sqlalchemy import create_engine
+
+from seed_scale import seed_scale
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported by `import app.main`
+DEFERRED_MODULES = [
+    "requests",
+    "numpy",
+    "scipy",
+    "xml.etree.ElementTree",
+    "passlib.handlers.argon2",
+    "passlib.handlers.bcrypt",
+    "app.services.grants_gov_importer",
+]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure_imports(env: Dict[str, str]) -> Tuple[float, Dict[str, int], List[Tuple[str, int]]]:
+    """(cumulative ms for app.main, every module -> cumulative us, top-level imports under app.main)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    modules, children, top_level = {}, [], []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        modules[name] = cumulative
+        if indent == 3:
+            children.append((name, cumulative))
+        elif indent == 1:
+            # Children are printed before their parent; keep the ones under app.main
+            if name == "app.main":
+                top_level = children
+            children = []
+    return modules["app.main"] / 1000, modules, top_level
+
+
+def measure_first_response(env: Dict[str, str], port: int) -> Tuple[float, float]:
+    """(ms until GET / answers, ms until GET /grants/public answers), from process spawn."""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_ROOT, env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            if time.perf_counter() - started > 60:
+                raise RuntimeError("uvicorn did not answer within 60s")
+            try:
+                if requests.get(f"{base}/", timeout=1).ok:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.01)
+        first_response = (time.perf_counter() - started) * 1000
+        requests.get(f"{base}/grants/public", timeout=30).raise_for_status()
+        first_feed = (time.perf_counter() - started) * 1000
+        return first_response, first_feed
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--ttfr-budget-ms", type=float, default=3000, help="Budget for the first GET / response")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        seed_scale(create_engine(database_url), users=100, organizations=10, grants=2000, password_hash="x")
+        env = dict(os.environ, DATABASE_URL=database_url, FEED_SNAPSHOT_DIR=os.path.join(tmp, "feed"))
+
+        import_runs = [measure_imports(env) for _ in range(args.runs)]
+        import_ms = statistics.median(run[0] for run in import_runs)
+        _, modules, top_level = import_runs[-1]
+        print(f"import app.main: {import_ms:.0f}ms (median of {args.runs}, budget {args.import_budget_ms:.0f}ms)")
+        for name, cumulative in sorted(top_level, key=lambda item: -item[1])[:10]:
+            print(f"  {cumulative / 1000:>8.1f}ms  {name}")
+        if import_ms > args.import_budget_ms:
+            failures.append(f"import time {import_ms:.0f}ms > {args.import_budget_ms:.0f}ms")
+        for name in DEFERRED_MODULES:
+            if name in modules:
+                failures.append(f"{name} is imported by app.main (should be deferred)")
+
+        first_runs = [measure_first_response(env, args.port) for _ in range(args.runs)]
+        ttfr_ms = statistics.median(run[0] for run in first_runs)
+        feed_ms = statistics.median(run[1] for run in first_runs)
+        print(f"\nfirst response:      {ttfr_ms:.0f}ms (budget {args.ttfr_budget_ms:.0f}ms)")
+        print(f"first /grants/public: {feed_ms:.0f}ms")
+        if ttfr_ms > args.ttfr_budget_ms:
+            failures.append(f"time to first response {ttfr_ms:.0f}ms > {args.ttfr_budget_ms:.0f}ms")
+
+    if failures:
+        print("\n❌ Cold start budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ Cold start within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
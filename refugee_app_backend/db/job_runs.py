@@ -0,0 +1,47 @@
+"""
+Periodic Jobs Across Processes
+
+Every worker runs the same background threads, but some periodic jobs must
+run once per interval for the whole deployment (e.g. decaying trending
+scores). claim_job() records each run in job_runs with a compare-and-set on
+the previous run time: of the processes that find the job due, exactly one
+wins the UPDATE, the others skip until the next interval.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db import models
+
+
+def claim_job(db: Session, name: str, interval_seconds: float) -> Optional[float]:
+    """
+    Seconds since the previous run if this process gets to run `name` now
+    (0 for the first run ever), None if it isn't due or another process
+    claimed it. Commits the claim.
+    """
+    table = models.JobRun.__table__
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    previous = db.execute(select(table.c.last_run_at).where(table.c.name == name)).scalar()
+    if previous is None:
+        try:
+            db.execute(table.insert().values(name=name, last_run_at=now))
+            db.commit()
+        except IntegrityError:  # Another process ran it first
+            db.rollback()
+            return None
+        return 0.0
+
+    elapsed = (now - previous).total_seconds()
+    if elapsed < interval_seconds:
+        db.rollback()
+        return None
+    claimed = db.execute(
+        table.update().where(table.c.name == name, table.c.last_run_at == previous).values(last_run_at=now)
+    ).rowcount
+    db.commit()
+    return elapsed if claimed else None
@@ -0,0 +1,464 @@
+"""
+Versioned Schema Migrations
+
+Replaces create_all on every worker's startup and the ad-hoc /migrate-schema
+queries. Migrations are numbered functions registered with @migration; the
+applied versions are recorded in schema_migrations, and only one process
+migrates at a time (pg_advisory_lock on Postgres, an flock next to the
+database file on SQLite). App startup only compares versions.
+
+Data backfills run through backfill(): keyset batches by primary key, each
+committed together with its checkpoint in schema_backfills, so an interrupted
+run resumes where it stopped instead of redoing (or locking) the whole table.
+
+Migration 1 creates the current schema from db/models.py, so on a fresh
+database later migrations find their changes already applied: keep them
+idempotent (see add_column_if_missing). On an old database they run against
+the schema of their time, so they don't build on model definitions a later
+migration changes (see _v2_grant_indexes); benchmarks/migrations.py upgrades
+the pre-migration schema to check.
+
+Usage (from refugee_app_backend/):
+    python -m db.migrate            # apply pending migrations
+    python -m db.migrate --status   # show current / latest version
+"""
+
+import contextlib
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Index, Integer, MetaData, String, Table, bindparam, func, inspect, select, text
+)
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK_ID = 724_130_037  # pg_advisory_lock key, arbitrary but fixed
+BACKFILL_BATCH_SIZE = 1000
+
+# Bookkeeping tables live outside Base.metadata so create_all never owns them
+bookkeeping = MetaData()
+schema_migrations = Table(
+    "schema_migrations", bookkeeping,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+schema_backfills = Table(
+    "schema_backfills", bookkeeping,
+    Column("name", String(100), primary_key=True),
+    Column("last_id", Integer, nullable=False, default=0),
+    Column("done", Boolean, nullable=False, default=False),
+)
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Engine], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register a migration; versions must be unique and increasing."""
+    def register(fn: Callable[[Engine], None]):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"Migration {version} registered out of order")
+        MIGRATIONS.append(Migration(version, description, fn))
+        return fn
+    return register
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied version, 0 for a database that was never migrated."""
+    if not inspect(engine).has_table(schema_migrations.name):
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+# ----------------------------------------------------------------------------
+# Helpers for migrations
+# ----------------------------------------------------------------------------
+
+def add_column_if_missing(conn: Connection, table: str, column: str, ddl: str):
+    """ALTER TABLE ... ADD COLUMN unless the column exists (`ddl` is the type and default)."""
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def backfill(engine: Engine, name: str, table: str,
+             update: Callable[[Connection, int, int], None],
+             batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Run update(conn, low_id, high_id) over `table` in keyset batches of ids
+    (low_id exclusive, high_id inclusive), committing a checkpoint with each
+    batch. Returns the number of rows visited in this run.
+    """
+    with engine.begin() as conn:
+        row = conn.execute(
+            select(schema_backfills.c.last_id, schema_backfills.c.done).where(schema_backfills.c.name == name)
+        ).first()
+        if row is None:
+            conn.execute(schema_backfills.insert().values(name=name, last_id=0, done=False))
+            last_id = 0
+        elif row.done:
+            return 0
+        else:
+            last_id = row.last_id
+            logger.info(f"Resuming backfill {name} after id {last_id}")
+
+    visited = 0
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                text(f"SELECT id FROM {table} WHERE id > :last_id ORDER BY id LIMIT :batch_size"),
+                {"last_id": last_id, "batch_size": batch_size},
+            ).scalars().all()
+            checkpoint = schema_backfills.update().where(schema_backfills.c.name == name)
+            if not ids:
+                conn.execute(checkpoint.values(done=True))
+                return visited
+            update(conn, last_id, ids[-1])
+            last_id = ids[-1]
+            visited += len(ids)
+            conn.execute(checkpoint.values(last_id=last_id))
+
+
+# ----------------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def migration_lock(engine: Engine) -> Iterator[None]:
+    """Block until this process is the only one migrating this database."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            conn.commit()
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+                conn.commit()
+        return
+
+    database = engine.url.database
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:" or fcntl is None:
+        yield  # In-memory databases are private to this process
+        return
+    with open(f"{database}.migrate.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to `target` (default: latest). Returns the versions applied."""
+    applied_now = []
+    with migration_lock(engine):
+        bookkeeping.create_all(bind=engine)
+        with engine.connect() as conn:
+            applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+        for m in MIGRATIONS:
+            if m.version in applied or (target is not None and m.version > target):
+                continue
+            logger.info(f"Applying migration {m.version}: {m.description}")
+            m.apply(engine)
+            with engine.begin() as conn:
+                conn.execute(schema_migrations.insert().values(version=m.version, description=m.description))
+            applied_now.append(m.version)
+    return applied_now
+
+
+def check_version(engine: Engine) -> Tuple[int, int]:
+    """(current, latest); what app startup does instead of migrating."""
+    return current_version(engine), latest_version()
+
+
+# ----------------------------------------------------------------------------
+# Migrations
+# ----------------------------------------------------------------------------
+
+@migration(1, "Baseline schema")
+def _baseline(engine: Engine):
+    from db import models  # Registers every model with Base.metadata
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Databases created before grants.category existed
+        add_column_if_missing(conn, "grants", "category", "VARCHAR(100) DEFAULT 'General'")
+
+
+def _v2_grant_indexes() -> List[Index]:
+    """
+    The grant indexes as of migration 2, frozen: the model's current ones
+    may use columns later migrations add (country_id, category_id: 9).
+    """
+    from db import models
+    grants = Table(
+        "grants", MetaData(),
+        *(Column(name) for name in ("deadline", "refugee_country", "category", "creator_id", "created_at",
+                                    "is_verified", "is_active")),
+    )
+    public = dict(
+        sqlite_where=text(models.PUBLIC_GRANT_PREDICATE_SQLITE),
+        postgresql_where=text(models.PUBLIC_GRANT_PREDICATE_POSTGRES),
+        postgresql_include=["id", "title", "organizer", "category", "amount"],
+    )
+    return [
+        Index("ix_grants_public_deadline", grants.c.deadline, **public),
+        Index("ix_grants_public_country_deadline", grants.c.refugee_country, grants.c.deadline, **public),
+        Index("ix_grants_public_category_deadline", grants.c.category, grants.c.deadline, **public),
+        Index("ix_grants_creator_created", grants.c.creator_id, grants.c.created_at),
+        Index("ix_grants_verified_active", grants.c.is_verified, grants.c.is_active),
+    ]
+
+
+@migration(2, "Query-driven grant indexes")
+def _grant_indexes(engine: Engine):
+    # create_all never touches indexes on an existing table
+    from db import models
+    with engine.begin() as conn:
+        for index_name in models.LEGACY_GRANT_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        for index in _v2_grant_indexes():
+            index.create(bind=conn, checkfirst=True)
+
+
+# Earlier rules win, as in the original one-off categorization
+CATEGORY_KEYWORDS = [
+    ("Housing", ["housing", "shelter"]),
+    ("Education", ["education", "training"]),
+    ("Healthcare", ["health", "medical"]),
+    ("Employment", ["employment", "job", "business"]),
+    ("Legal", ["legal", "asylum"]),
+    ("Emergency", ["emergency", "urgent"]),
+]
+
+
+@migration(3, "Categorize 'General' grants by keyword")
+def _categorize_grants(engine: Engine):
+    statements = []
+    for category, keywords in CATEGORY_KEYWORDS:
+        matches = " OR ".join(
+            f"LOWER({column}) LIKE '%{keyword}%'" for column in ("title", "description") for keyword in keywords
+        )
+        statements.append(text(
+            f"UPDATE grants SET category = '{category}' "
+            f"WHERE id > :low AND id <= :high AND category = 'General' AND ({matches})"
+        ))
+
+    def update(conn: Connection, low: int, high: int):
+        for statement in statements:
+            conn.execute(statement, {"low": low, "high": high})
+
+    backfill(engine, "categorize_general_grants", "grants", update)
+
+
+@migration(4, "Grant similarity table")
+def _grant_similarities(engine: Engine):
+    # Filled by `python -m app.services.grant_similarity` / after imports
+    from db import models
+    models.GrantSimilarity.__table__.create(bind=engine, checkfirst=True)
+
+
+@migration(5, "Near-duplicate fingerprints")
+def _grant_fingerprints(engine: Engine):
+    from db import models
+    from app.services import grant_dedup
+    with engine.begin() as conn:
+        add_column_if_missing(conn, "grants", "duplicate_of_id",
+                              "INTEGER REFERENCES grants(id) ON DELETE SET NULL")
+    models.GrantFingerprint.__table__.create(bind=engine, checkfirst=True)
+    models.GrantLshBucket.__table__.create(bind=engine, checkfirst=True)
+    if not grant_dedup.HAS_NUMPY:
+        logger.warning("NumPy not installed: existing grants are not fingerprinted")
+        return
+
+    grants = models.Grant.__table__
+
+    def update(conn: Connection, low: int, high: int):
+        # In id order, so the older of two duplicates stays the original;
+        # existing grants are only flagged, their verification is left alone
+        rows = conn.execute(
+            select(grants.c.id, grants.c.title, grants.c.organizer, grants.c.description, grants.c.duplicate_of_id)
+            .where(grants.c.id > low, grants.c.id <= high).order_by(grants.c.id)
+        )
+        for row in rows.all():
+            fingerprint = grant_dedup.fingerprint(row.title, row.organizer, row.description)
+            if fingerprint is None:
+                continue
+            duplicate = grant_dedup.find_duplicate(conn, fingerprint)
+            if duplicate and row.duplicate_of_id is None:
+                conn.execute(grants.update().where(grants.c.id == row.id).values(duplicate_of_id=duplicate[0]))
+            grant_dedup.store_fingerprint(conn, row.id, fingerprint)
+
+    backfill(engine, "fingerprint_grants", "grants", update)
+
+
+@migration(6, "Saved searches")
+def _saved_searches(engine: Engine):
+    from db import models
+    models.SavedSearch.__table__.create(bind=engine, checkfirst=True)
+    models.SavedSearchMatch.__table__.create(bind=engine, checkfirst=True)
+
+
+@migration(7, "Grant stats and job runs")
+def _grant_stats(engine: Engine):
+    # Rows for existing grants are added by the first trending run
+    from db import models
+    models.GrantStats.__table__.create(bind=engine, checkfirst=True)
+    models.JobRun.__table__.create(bind=engine, checkfirst=True)
+
+
+def _compile_eligibility(conn: Connection, low: int, high: int):
+    """Backfill step: compile the criteria of grants low < id <= high (changed rows only)."""
+    from db import models
+    from app.services import grant_eligibility
+    grants = models.Grant.__table__
+    # Grants without criteria stay NULL: unconstrained
+    rows = conn.execute(select(
+        grants.c.id, grants.c.eligibility_criteria, grants.c.eligibility_mask, grants.c.eligibility_countries
+    ).where(grants.c.id > low, grants.c.id <= high, grants.c.eligibility_criteria != None))
+    for row in rows.all():
+        columns = grant_eligibility.compiled_columns(row.eligibility_criteria)
+        if (columns["eligibility_mask"], columns["eligibility_countries"]) != (
+            row.eligibility_mask, row.eligibility_countries
+        ):
+            conn.execute(grants.update().where(grants.c.id == row.id).values(**columns))
+
+
+@migration(8, "Eligibility profiles and compiled criteria")
+def _eligibility(engine: Engine):
+    from db import models
+    with engine.begin() as conn:
+        add_column_if_missing(conn, "grants", "eligibility_mask", "BIGINT")
+        add_column_if_missing(conn, "grants", "eligibility_countries", "BIGINT")
+    models.EligibilityProfile.__table__.create(bind=engine, checkfirst=True)
+    backfill(engine, "compile_eligibility_criteria", "grants", _compile_eligibility)
+
+
+@migration(9, "Country and category dimension tables")
+def _grant_dimensions(engine: Engine):
+    from db import models
+    from app.services import grant_dimensions
+    for model in (models.Country, models.CountryAlias, models.Category, models.CategoryAlias):
+        model.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        add_column_if_missing(conn, "grants", "country_id", "SMALLINT REFERENCES countries(id)")
+        add_column_if_missing(conn, "grants", "category_id", "SMALLINT REFERENCES categories(id)")
+        grant_dimensions.seed(conn)
+
+    grants, searches = models.Grant.__table__, models.SavedSearch.__table__
+    assign_grants = grants.update().where(grants.c.id == bindparam("grant_id")).values(
+        refugee_country=bindparam("country_name"), country_id=bindparam("country_key"),
+        category=bindparam("category_name"), category_id=bindparam("category_key"),
+    )
+
+    def update_grants(conn: Connection, low: int, high: int):
+        # Every spelling in use becomes (or joins) a canonical row, as on trusted writes: no grant loses its value
+        rows = [dict(row._mapping) for row in conn.execute(
+            select(grants.c.id, grants.c.refugee_country, grants.c.category).where(
+                grants.c.id > low, grants.c.id <= high,
+                (grants.c.refugee_country != None) | (grants.c.category != None),
+            )
+        )]
+        grant_dimensions.assign(conn, rows, create=True)
+        if rows:
+            conn.execute(assign_grants, [{
+                "grant_id": row["id"], "country_name": row["refugee_country"], "country_key": row["country_id"],
+                "category_name": row["category"], "category_key": row["category_id"],
+            } for row in rows])
+
+    def update_searches(conn: Connection, low: int, high: int):
+        # Matched against the canonical names grants now carry; unknown values are left as typed
+        rows = conn.execute(select(searches.c.id, searches.c.refugee_country, searches.c.category).where(
+            searches.c.id > low, searches.c.id <= high
+        ))
+        for row in rows.all():
+            country, category = grant_dimensions.canonical_filters(conn, row.refugee_country, row.category)
+            if (country, category) != (row.refugee_country, row.category):
+                conn.execute(searches.update().where(searches.c.id == row.id).values(
+                    refugee_country=country, category=category
+                ))
+
+    backfill(engine, "assign_grant_dimensions", "grants", update_grants)
+    backfill(engine, "canonicalize_saved_searches", "saved_searches", update_searches)
+
+    # The feed indexes move from the text columns to the keys
+    with engine.begin() as conn:
+        for index_name in models.LEGACY_GRANT_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        for index in models.Grant.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
+    grant_dimensions.invalidate()  # Loaded from this migration's connections
+
+
+
+@migration(10, "Recompile eligibility criteria")
+def _recompile_eligibility(engine: Engine):
+    # Countries by their seeded spellings and ISO codes (12 more with their own bit), and ages
+    # of children no longer read as the applicant's
+    backfill(engine, "recompile_eligibility_criteria", "grants", _compile_eligibility)
+
+
+
+@migration(11, "Similar grants reverse lookup index")
+def _similarity_reverse_index(engine: Engine):
+    from db import models
+    for index in models.GrantSimilarity.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+def _add_grant_stats(conn: Connection, low: int, high: int):
+    """Backfill step: a zero grant_stats row for grants low < id <= high without one."""
+    conn.execute(text(
+        "INSERT INTO grant_stats (grant_id) SELECT id FROM grants WHERE id > :low AND id <= :high "
+        "AND NOT EXISTS (SELECT 1 FROM grant_stats WHERE grant_stats.grant_id = grants.id)"
+    ), {"low": low, "high": high})
+
+
+@migration(12, "Grant stats row for every grant")
+def _grant_stats_rows(engine: Engine):
+    # The trending feed walks ix_grant_stats_trending: grants without a row aren't listed
+    backfill(engine, "add_grant_stats_rows", "grants", _add_grant_stats)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE grant_stats"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    logging.basicConfig(level=logging.INFO)
+    from db.session import engine as default_engine
+
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="Only print the current and latest version")
+    parser.add_argument("--target", type=int, help="Stop after this version")
+    args = parser.parse_args()
+
+    current, latest = check_version(default_engine)
+    if args.status:
+        print(f"Schema version {current} (latest {latest})")
+        sys.exit(0 if current >= latest else 1)
+    applied = migrate(default_engine, target=args.target)
+    print(f"✅ Applied {applied or 'nothing'}; schema version {current_version(default_engine)}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, Text, Index, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, SmallInteger, String, Boolean, DateTime, Float, JSON, Text, Index, ForeignKey, text
 from sqlalchemy.sql import func
 from .session import Base
 
@@ -29,49 +29,141 @@ class VerificationCode(Base):
     )
 
 
+# Must match the literal predicate the public feed query renders on each
+# dialect, otherwise the partial indexes below can't be used.
+PUBLIC_GRANT_PREDICATE_SQLITE = "is_verified = 1 AND is_active = 1"
+PUBLIC_GRANT_PREDICATE_POSTGRES = "is_verified = true AND is_active = true"
+
+# Columns shown on feed list cards; carried by the public indexes on Postgres
+GRANT_SUMMARY_INDEX_COLUMNS = ["id", "title", "organizer", "category", "amount"]
+
+# Indexes dropped by the query-driven redesign; kept here so db/migrate.py
+# (migrations 2 and 9) can remove them from databases created before it.
+LEGACY_GRANT_INDEXES = [
+    "ix_grants_title",
+    "ix_grants_deadline",
+    "ix_grants_source",
+    "ix_grants_refugee_country",
+    "ix_grants_is_verified",
+    "ix_grants_is_active",
+    "ix_grants_creator_id",
+    "ix_grants_category",
+    "ix_grants_country_verified",
+    "ix_grants_deadline_verified",
+    # String-keyed feed indexes, replaced by the country_id / category_id ones
+    "ix_grants_public_country_deadline",
+    "ix_grants_public_category_deadline",
+]
+
+# Small integer keys of the dimension tables; SQLite only auto-numbers INTEGER PRIMARY KEY
+DimensionKey = SmallInteger().with_variant(Integer(), "sqlite")
+
+
+class Country(Base):
+    """Canonical refugee_country values (app/services/grant_dimensions.py)"""
+    __tablename__ = "countries"
+
+    id = Column(DimensionKey, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+    iso_code = Column(String(2), nullable=True)  # ISO 3166-1 alpha-2, for seeded countries
+
+
+class CountryAlias(Base):
+    """Spellings of a country: its name, ISO codes, synonyms"""
+    __tablename__ = "country_aliases"
+
+    alias = Column(String(100), primary_key=True)  # grant_dimensions.alias_key()
+    country_id = Column(DimensionKey, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False)
+
+
+class Category(Base):
+    """Canonical grant categories (app/services/grant_dimensions.py)"""
+    __tablename__ = "categories"
+
+    id = Column(DimensionKey, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False)
+
+
+class CategoryAlias(Base):
+    """Spellings of a category: its name and synonyms"""
+    __tablename__ = "category_aliases"
+
+    alias = Column(String(100), primary_key=True)  # grant_dimensions.alias_key()
+    category_id = Column(DimensionKey, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+
+
 class Grant(Base):
     __tablename__ = "grants"
 
     # Core Fields
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(500), index=True, nullable=False)
+    title = Column(String(500), nullable=False)
     organizer = Column(String(200), nullable=False)  # Agency/Organization name
-    deadline = Column(DateTime, nullable=True, index=True)  # Index for sorting
+    deadline = Column(DateTime, nullable=True)  # Sorted via the public feed indexes below
     description = Column(Text, nullable=True)  # Use Text for long content
     eligibility = Column(Text, nullable=True)  # Text description of eligibility
     apply_url = Column(String(500), nullable=False)
     
     # Source & Tracking
-    source = Column(String(50), default="manual", index=True)  # "manual" or "grants.gov"
+    source = Column(String(50), default="manual")  # "manual" or "grants.gov"
     external_id = Column(String(100), unique=True, nullable=True, index=True)  # Grants.gov opportunity ID
     
     # Admin Curation Fields
-    refugee_country = Column(String(100), nullable=True, index=True)  # For filtering
-    is_verified = Column(Boolean, default=False, index=True)  # Admin verification
-    is_active = Column(Boolean, default=True, index=True)  # Active/disabled status
+    refugee_country = Column(String(100), nullable=True)  # Canonical name of country_id, for display
+    country_id = Column(SmallInteger, ForeignKey("countries.id"), nullable=True)  # For filtering
+    is_verified = Column(Boolean, default=False)  # Admin verification
+    is_active = Column(Boolean, default=True)  # Active/disabled status
     rejection_reason = Column(Text, nullable=True) # Reason for rejection if applicable
 
     # Ownership & Trust
-    creator_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True) # User who submitted
+    creator_id = Column(Integer, ForeignKey("users.id"), nullable=True) # User who submitted
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True, index=True) # Linked Org (if trusted)
+    # Earlier grant this one nearly duplicates (app/services/grant_dedup.py); kept unverified for review
+    duplicate_of_id = Column(Integer, ForeignKey("grants.id", ondelete="SET NULL"), nullable=True)
     
     # Legacy/Optional Fields (for backward compatibility)
     amount = Column(String(100), nullable=True)  # Grant amount as string
     location = Column(String(200), nullable=True)  # Geographic location
     eligibility_criteria = Column(JSON, nullable=True)  # Structured eligibility list
+    # eligibility_criteria compiled to bitsets (app/services/grant_eligibility.py); NULL = unconstrained
+    eligibility_mask = Column(BigInteger, nullable=True)
+    eligibility_countries = Column(BigInteger, nullable=True)
     required_documents = Column(JSON, nullable=True)  # Required documents list
     
-    category = Column(String(100), nullable=True, index=True, default="General")
+    category = Column(String(100), nullable=True, default="General")  # Canonical name of category_id
+    category_id = Column(SmallInteger, ForeignKey("categories.id"), nullable=True)  # For filtering
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Composite indexes for common queries
+    # Indexes are shaped around the queries in app/services/grant_queries.py.
+    # The public feed ones are partial (live grants only) so they stay small and
+    # unverified imports don't pay for them; on Postgres they also carry the
+    # summary columns so list views can be answered from the index alone.
     __table_args__ = (
+        Index(
+            'ix_grants_public_deadline', 'deadline',
+            sqlite_where=text(PUBLIC_GRANT_PREDICATE_SQLITE),
+            postgresql_where=text(PUBLIC_GRANT_PREDICATE_POSTGRES),
+            postgresql_include=GRANT_SUMMARY_INDEX_COLUMNS,
+        ),
+        Index(
+            'ix_grants_public_country_id_deadline', 'country_id', 'deadline',
+            sqlite_where=text(PUBLIC_GRANT_PREDICATE_SQLITE),
+            postgresql_where=text(PUBLIC_GRANT_PREDICATE_POSTGRES),
+            postgresql_include=GRANT_SUMMARY_INDEX_COLUMNS,
+        ),
+        Index(
+            'ix_grants_public_category_id_deadline', 'category_id', 'deadline',
+            sqlite_where=text(PUBLIC_GRANT_PREDICATE_SQLITE),
+            postgresql_where=text(PUBLIC_GRANT_PREDICATE_POSTGRES),
+            postgresql_include=GRANT_SUMMARY_INDEX_COLUMNS,
+        ),
+        # "My submissions" list: WHERE creator_id = ? ORDER BY created_at DESC
+        Index('ix_grants_creator_created', 'creator_id', 'created_at'),
+        # Moderation queue (pending / disabled grants)
         Index('ix_grants_verified_active', 'is_verified', 'is_active'),
-        Index('ix_grants_country_verified', 'refugee_country', 'is_verified'),
-        Index('ix_grants_deadline_verified', 'deadline', 'is_verified'),
     )
 
 class Organization(Base):
@@ -91,3 +183,116 @@ class Organization(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+
+class GrantSimilarity(Base):
+    """Precomputed nearest neighbours behind /grants/{id}/similar (app/services/grant_similarity.py)"""
+    __tablename__ = "grant_similarities"
+
+    # Primary key order serves the lookup: WHERE grant_id = ?
+    grant_id = Column(Integer, ForeignKey("grants.id", ondelete="CASCADE"), primary_key=True)
+    similar_id = Column(Integer, ForeignKey("grants.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)  # Cosine similarity of the TF-IDF vectors
+
+    __table_args__ = (
+        # A grant's removal also drops it from the other lists (and the CASCADE checks this column)
+        Index('ix_grant_similarities_similar', 'similar_id'),
+    )
+
+
+class GrantFingerprint(Base):
+    """MinHash signature of a grant's text, for near-duplicate checks (app/services/grant_dedup.py)"""
+    __tablename__ = "grant_fingerprints"
+
+    grant_id = Column(Integer, ForeignKey("grants.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+
+
+class GrantLshBucket(Base):
+    """One row per LSH band of a grant's signature: grants sharing a bucket are duplicate candidates"""
+    __tablename__ = "grant_lsh_buckets"
+
+    # Primary key order serves the lookup: WHERE bucket IN (...)
+    bucket = Column(BigInteger, primary_key=True)
+    grant_id = Column(Integer, ForeignKey("grants.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        # Removing a grant's buckets
+        Index('ix_grant_lsh_buckets_grant', 'grant_id'),
+    )
+
+
+
+class SavedSearch(Base):
+    """A user's stored /grants/public filters, matched against new public grants (app/services/saved_searches.py)"""
+    __tablename__ = "saved_searches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(100), nullable=True)
+    # Every given predicate must hold (same semantics as the /grants/public filters)
+    category = Column(String(100), nullable=True)
+    refugee_country = Column(String(100), nullable=True)
+    keywords = Column(String(200), nullable=True)  # All words in the title / organizer / description
+    deadline_from = Column(DateTime, nullable=True)
+    deadline_to = Column(DateTime, nullable=True)
+    frequency = Column(String(20), nullable=False, default="daily")  # "daily" or "instant" digests
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SavedSearchMatch(Base):
+    """A new public grant matching a saved search; pending until sent in a digest"""
+    __tablename__ = "saved_search_matches"
+
+    search_id = Column(Integer, ForeignKey("saved_searches.id", ondelete="CASCADE"), primary_key=True)
+    grant_id = Column(Integer, ForeignKey("grants.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    notified_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Digest runs: the pending matches only
+        Index(
+            'ix_saved_search_matches_pending', 'search_id',
+            sqlite_where=text('notified_at IS NULL'),
+            postgresql_where=text('notified_at IS NULL'),
+        ),
+    )
+
+
+class GrantStats(Base):
+    """View / apply-click totals and the trending score behind ?sort=trending (app/services/grant_stats.py)"""
+    __tablename__ = "grant_stats"
+
+    grant_id = Column(Integer, ForeignKey("grants.id", ondelete="CASCADE"), primary_key=True)
+    views = Column(Integer, nullable=False, default=0, server_default="0")
+    clicks = Column(Integer, nullable=False, default=0, server_default="0")
+    # Totals already folded into trending_score by the trending job
+    trended_views = Column(Integer, nullable=False, default=0, server_default="0")
+    trended_clicks = Column(Integer, nullable=False, default=0, server_default="0")
+    trending_score = Column(Float, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Trending feed: walked in score order, grants looked up by primary key
+        Index('ix_grant_stats_trending', trending_score.desc(), 'grant_id'),
+    )
+
+
+class JobRun(Base):
+    """Last run of a periodic job shared by all processes (claimed with a compare-and-set)"""
+    __tablename__ = "job_runs"
+
+    name = Column(String(100), primary_key=True)
+    last_run_at = Column(DateTime, nullable=False)
+
+
+class EligibilityProfile(Base):
+    """What a user's eligibility is judged on by GET /grants/eligible (app/services/grant_eligibility.py)"""
+    __tablename__ = "eligibility_profiles"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Values from grant_eligibility.VOCABULARY; NULL = not given, excludes no grant
+    residence_country = Column(String(100), nullable=True)
+    status = Column(String(30), nullable=True)
+    age_band = Column(String(20), nullable=True)
+    household = Column(String(30), nullable=True)
+    occupation = Column(String(30), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,156 @@
+"""
+Connection Pool Instrumentation
+
+Wraps the pooled engines so we can see how long requests wait for a
+connection, how many connections are in use / in overflow, how many threads
+are queued for one, and what pool_pre_ping costs.
+
+Waiting is measured in InstrumentedQueuePool._do_get (the only place a
+checkout blocks); everything else comes from SQLAlchemy pool events.
+"""
+
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import REGISTRY, Counter, Gauge, Histogram
+
+PRE_PING_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+class PoolStats:
+    """Live metrics for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkout_wait = Histogram()
+        self.pre_ping = Histogram(PRE_PING_BUCKETS)
+        self.waiting = Gauge()  # Threads blocked in checkout right now
+        self.timeouts = Counter()  # Checkouts that hit pool_timeout
+        self.connects = Counter()  # New DBAPI connections opened
+        self.invalidations = Counter()  # Connections discarded (pre-ping failures, disconnects)
+        self.in_use = Gauge()
+        self.overflow = Gauge()
+        self.size = Gauge()
+        self._local = threading.local()
+
+    def bind(self, pool: QueuePool):
+        """Read occupancy straight from the pool when sampled."""
+        self.in_use = Gauge(read=pool.checkedout)
+        self.overflow = Gauge(read=lambda: max(pool.overflow(), 0))
+        self.size = Gauge(read=pool.size)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "in_use": self.in_use.value,
+            "overflow": self.overflow.value,
+            "size": self.size.value,
+            "waiting": self.waiting.value,
+            "timeouts": self.timeouts.value,
+            "connects": self.connects.value,
+            "invalidations": self.invalidations.value,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+            "pre_ping_seconds": self.pre_ping.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited."""
+
+    stats: PoolStats = None  # Set per engine by instrument()
+
+    def _do_get(self):
+        stats = self.stats
+        stats.waiting.inc()
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            stats.timeouts.inc()
+            raise
+        finally:
+            stats.waiting.dec()
+        got_at = time.perf_counter()
+        stats.checkout_wait.observe(got_at - started)
+        # Pre-ping (skipped for brand-new connections) runs between here and
+        # the "checkout" event on this thread
+        stats._local.got_at = None if record.fresh else got_at
+        return record
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        self.stats.bind(pool)
+        return pool
+
+
+_pools: Dict[str, PoolStats] = {}
+
+
+def instrument(engine, name: str) -> PoolStats:
+    """Attach metrics to an engine created with poolclass=InstrumentedQueuePool."""
+    pool = engine.pool
+    stats = PoolStats(name)
+    pool.stats = stats
+    stats.bind(pool)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        got_at = getattr(stats._local, "got_at", None)
+        if got_at is not None:
+            stats.pre_ping.observe(time.perf_counter() - got_at)
+            stats._local.got_at = None
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.connects.inc()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations.inc()
+
+    _pools[name] = stats
+    return stats
+
+
+def pool_stats() -> Dict[str, PoolStats]:
+    """All instrumented pools in this process, keyed by name."""
+    return dict(_pools)
+
+
+def max_waiting() -> float:
+    """Most threads currently queued on any one pool."""
+    return max((stats.waiting.value for stats in _pools.values()), default=0)
+
+
+@REGISTRY.register_collector
+def _collect_pools():
+    gauges = [
+        ("in_use", "Connections checked out"),
+        ("overflow", "Connections open beyond pool_size"),
+        ("size", "Configured pool size"),
+        ("waiting", "Threads waiting for a connection"),
+    ]
+    counters = [
+        ("timeouts", "Checkouts that hit pool_timeout"),
+        ("connects", "New database connections opened"),
+        ("invalidations", "Connections invalidated"),
+    ]
+    pools = pool_stats()
+    for attr, help in gauges:
+        yield f"relivo_db_pool_{attr}", "gauge", help, [
+            ({"pool": name}, getattr(stats, attr).value) for name, stats in pools.items()
+        ]
+    for attr, help in counters:
+        yield f"relivo_db_pool_{attr}_total", "counter", help, [
+            ({"pool": name}, getattr(stats, attr).value) for name, stats in pools.items()
+        ]
+    yield "relivo_db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection", [
+        ({"pool": name}, stats.checkout_wait) for name, stats in pools.items()
+    ]
+    yield "relivo_db_pool_pre_ping_seconds", "histogram", "pool_pre_ping cost per checkout", [
+        ({"pool": name}, stats.pre_ping) for name, stats in pools.items()
+    ]
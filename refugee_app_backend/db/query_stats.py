@@ -0,0 +1,138 @@
+"""
+SQL Query Accounting
+
+Counts and times every statement through SQLAlchemy's cursor events:
+
+- per request: QueryStats in a context variable (set by QueryTimingMiddleware)
+  feeding the Server-Timing header, /metrics and the N+1 detector
+- slow query log: statements over SLOW_QUERY_MS, logged with literals stripped
+  so similar queries group together
+- tests / CI: count_queries() and assert_max_queries() capture statements from
+  any thread while active, e.g. around TestClient calls
+
+    with assert_max_queries(4):
+        client.post("/grants/submit", json=payload, headers=auth)
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("db.slow_queries")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+|\?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Replace literals and placeholders with ?, collapse IN lists and whitespace."""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAM_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """Statements issued during one request (or one capture block)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: List[str] = []
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements.append(statement)
+
+    def repeated(self, threshold: int) -> List[str]:
+        """Normalized statements issued at least `threshold` times (N+1 suspects)."""
+        tally = Tally(normalize_sql(s) for s in self.statements)
+        return [sql for sql, seen in tally.items() if seen >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Active count_queries() captures; see the module docstring
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+
+@contextmanager
+def track_request():
+    """Collect stats for the statements run in this context (one request)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def count_queries():
+    """Capture every statement executed by this process while the block runs."""
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = ""):
+    """Fail (AssertionError) if the block issues more than `limit` statements."""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i + 1}. {normalize_sql(s)}" for i, s in enumerate(stats.statements))
+        raise AssertionError(
+            f"{label or 'Block'} issued {stats.count} queries (limit {limit}):\n{listing}"
+        )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    seconds = time.perf_counter() - started
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.record(statement, seconds)
+
+    if seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({seconds * 1000:.1f}ms): {normalize_sql(statement)}")
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed_timer(context):
+    # after_cursor_execute doesn't fire for failed statements
+    connection = context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
@@ -1,10 +1,15 @@
 import os
 import logging
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Dict
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import NullPool
 from app.core.config import settings
+from db.pool_metrics import InstrumentedQueuePool, instrument
+from db.sqlite import create_sqlite_engine, is_memory_url
 
 logger = logging.getLogger(__name__)
 
@@ -12,25 +17,40 @@ if not settings.DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in .env")
 
 DATABASE_URL = settings.DATABASE_URL
+DATABASE_READ_URL = settings.DATABASE_READ_URL
 logger.info(f"Connecting to database: {DATABASE_URL.split('@')[0]}@***")  # Hide credentials in logs
 
-# Configure engine with appropriate settings
-# For PostgreSQL, use connection pooling; for SQLite, use NullPool
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},  # SQLite specific
-        poolclass=NullPool
-    )
-else:
+def _create_engine(url: str, name: str):
+    """Configure engine with appropriate settings"""
+    # For PostgreSQL and file-backed SQLite, use connection pooling;
+    # for in-memory SQLite (or with SQLITE_POOLED=false), use NullPool
+    if url.startswith("sqlite") and settings.SQLITE_POOLED and not is_memory_url(url):
+        return create_sqlite_engine(url, name)
+    if url.startswith("sqlite"):
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},  # SQLite specific
+            poolclass=NullPool
+        )
     # PostgreSQL configuration
-    engine = create_engine(
-        DATABASE_URL,
+    pg_engine = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,  # Checkout wait / occupancy metrics
         pool_pre_ping=True,  # Verify connections before using them
         pool_size=5,
         max_overflow=10,
         pool_recycle=3600,  # Recycle connections after 1 hour
     )
+    instrument(pg_engine, name)
+    return pg_engine
+
+engine = _create_engine(DATABASE_URL, "primary")
+
+# Optional read replica for read-only endpoints (see get_read_db in app/api/deps.py)
+read_engine = None
+if DATABASE_READ_URL:
+    logger.info(f"Using read replica: {DATABASE_READ_URL.split('@')[0]}@***")
+    read_engine = _create_engine(DATABASE_READ_URL, "replica")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -47,3 +67,87 @@ def get_db():
         raise
     finally:
         db.close()
+
+# ----------------------------------------------------------------------------
+# Read replica routing
+# ----------------------------------------------------------------------------
+
+REPLICA_CHECK_SECONDS = 10  # How long a replica health verdict is trusted
+
+_replica_lock = threading.Lock()
+_replica_healthy = True
+_replica_checked_at = 0.0
+
+
+def replica_healthy() -> bool:
+    """
+    Whether reads may go to the replica. Re-probed at most every
+    REPLICA_CHECK_SECONDS; one thread probes while others reuse the verdict.
+    """
+    global _replica_healthy, _replica_checked_at
+    if read_engine is None:
+        return False
+    if time.monotonic() - _replica_checked_at < REPLICA_CHECK_SECONDS:
+        return _replica_healthy
+    if not _replica_lock.acquire(blocking=False):
+        return _replica_healthy
+    try:
+        with read_engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        if not _replica_healthy:
+            logger.info("Read replica is reachable again")
+        _replica_healthy = True
+    except Exception as e:
+        logger.warning(f"Read replica unavailable, reading from primary: {e}")
+        _replica_healthy = False
+    finally:
+        _replica_checked_at = time.monotonic()
+        _replica_lock.release()
+    return _replica_healthy
+
+
+if read_engine is not None:
+    @event.listens_for(read_engine, "handle_error")
+    def _mark_replica_down(context):
+        # Stop routing to the replica right away instead of at the next probe
+        global _replica_healthy, _replica_checked_at
+        if context.is_disconnect or context.connection is None:
+            _replica_healthy = False
+            _replica_checked_at = time.monotonic()
+
+
+class ReadSession(Session):
+    """
+    Session for read-only work. Binds to the replica while it is healthy and
+    to the primary otherwise; the choice is made once per session so a
+    request never mixes the two.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not hasattr(self, "_routed_bind"):
+            self._routed_bind = read_engine if replica_healthy() else engine
+        return self._routed_bind
+
+
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+
+# Read-your-writes: after a user writes, their reads stay on the primary for
+# a short window so replication lag can't hide their own change. Tracked per
+# process.
+_sticky_until: Dict[int, float] = {}
+
+
+def mark_user_write(user_id: int):
+    """Pin this user's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    if read_engine is None or user_id is None:
+        return
+    now = time.monotonic()
+    if len(_sticky_until) > 10000:
+        for stale in [uid for uid, until in _sticky_until.items() if until <= now]:
+            _sticky_until.pop(stale, None)
+    _sticky_until[user_id] = now + settings.READ_YOUR_WRITES_SECONDS
+
+
+def is_sticky(user_id: int) -> bool:
+    until = _sticky_until.get(user_id)
+    return until is not None and until > time.monotonic()
@@ -0,0 +1,147 @@
+"""
+SQLite Production Mode
+
+Engine setup for file-backed SQLite deployments (small regional instances,
+tests and benchmarks):
+
+- a pooled engine (InstrumentedQueuePool, so /metrics and load shedding
+  work as on Postgres) instead of a new file connection per request
+- pragmas on every new connection: WAL journal, synchronous=NORMAL, mmap,
+  page cache size and busy_timeout
+- a single-writer queue so concurrent submissions wait their turn instead of
+  failing with "database is locked"
+
+The writer queue: SQLAlchemy transactions start as plain (deferred) BEGIN, so
+reads never block. Before the first write statement of a transaction the
+connection takes its turn in the process-wide writer queue (first come,
+first served, waiting up to SQLITE_WRITE_QUEUE_TIMEOUT_MS), then swaps its
+read-only transaction for BEGIN IMMEDIATE. Dropping the read snapshot there is what
+avoids SQLITE_BUSY_SNAPSHOT, the "database is locked" error busy_timeout
+can't retry; rows read earlier in the request are then as current as under
+Postgres' default READ COMMITTED. Writers in other processes (gunicorn
+workers) are queued by busy_timeout, which BEGIN IMMEDIATE honours.
+
+The queue only stays short if nobody holds the turn for long, so background
+writers (similarity rebuild and updates, grant stats flush) commit in small
+batches and do their reads and computation before their first write.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from db.pool_metrics import InstrumentedQueuePool, instrument
+
+logger = logging.getLogger(__name__)
+
+_READ_PREFIXES = ("SELECT", "PRAGMA", "EXPLAIN", "WITH")
+
+
+
+class _WriterQueue:
+    """
+    A lock granted in arrival order. threading.Lock wakes an arbitrary
+    waiter, so under a steady stream of writes one request could keep
+    losing until it timed out.
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()  # Tickets whose writer gave up before its turn
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._abandoned.add(ticket)
+                    return False
+                self._changed.wait(remaining)
+            return True
+
+    def release(self):
+        with self._changed:
+            self._serving += 1
+            while self._serving in self._abandoned:
+                self._abandoned.remove(self._serving)
+                self._serving += 1
+            self._changed.notify_all()
+
+
+# One writer per process at a time (SQLite allows one per database anyway)
+_write_lock = _WriterQueue()
+
+
+def is_memory_url(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def create_sqlite_engine(url: str, name: str) -> Engine:
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},  # Pooled connections move between threads
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.SQLITE_POOL_SIZE,
+        max_overflow=settings.SQLITE_POOL_SIZE * 2,
+    )
+    instrument(engine, name)
+    configure_sqlite(engine)
+    return engine
+
+
+def configure_sqlite(engine: Engine):
+    busy_timeout_ms = settings.SQLITE_BUSY_TIMEOUT_MS
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        # BEGIN is emitted by _begin below instead of by pysqlite
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; safe with WAL
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_MB * 1024}")  # Negative = KiB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        # Straight on the DBAPI connection: not a query for db/query_stats.py
+        conn.connection.dbapi_connection.execute("BEGIN")
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _queue_writer(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("holds_write_lock") or statement.lstrip()[:7].upper().startswith(_READ_PREFIXES):
+            return
+        if not _write_lock.acquire(timeout=settings.SQLITE_WRITE_QUEUE_TIMEOUT_MS / 1000):
+            raise sqlite3.OperationalError("database is locked (timed out waiting for the writer queue)")
+        conn.info["holds_write_lock"] = True
+        dbapi_connection = cursor.connection
+        if dbapi_connection.in_transaction:
+            # Swap the deferred transaction (and its read snapshot) for a write one
+            dbapi_connection.execute("COMMIT")
+            dbapi_connection.execute("BEGIN IMMEDIATE")
+
+    def _release(conn):
+        if conn.info.pop("holds_write_lock", False):
+            _write_lock.release()
+
+    event.listen(engine, "commit", _release)
+    event.listen(engine, "rollback", _release)
+
+    @event.listens_for(engine, "reset")
+    def _release_on_reset(dbapi_connection, connection_record, reset_state):
+        # Connections returned to the pool without an explicit commit/rollback
+        if connection_record.info.pop("holds_write_lock", False):
+            _write_lock.release()